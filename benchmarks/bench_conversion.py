@@ -0,0 +1,95 @@
+"""Microbenchmarks for QImage -> upload payload conversion.
+
+Compares the original path (repaint into RGB888, PIL, PNG, base64) with
+app.conversion (strided zero-copy view, PNG straight from the array) at
+1080p, 4K and triple-4K multi-monitor sizes.
+
+    python benchmarks/bench_conversion.py [--repeat N]
+"""
+import argparse
+import base64
+import io
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtGui import QGuiApplication, QImage  # noqa: E402
+
+from app.conversion import composite_on_white, encode_png, qimage_to_array  # noqa: E402
+from synthetic import render_timesheet  # noqa: E402
+
+SIZES = {
+    "1080p": (1920, 1080),
+    "4K": (3840, 2160),
+    "3x4K": (3 * 3840, 2160),
+}
+
+
+def make_capture(width, height):
+    """A screen-grab-like RGB32 QImage tiled from a synthetic timesheet"""
+    tile, _ = render_timesheet(count=24, font_size=14, seed=width)
+    reps = (-(-height // tile.shape[0]), -(-width // tile.shape[1]), 1)
+    rgb = np.tile(tile, reps)[:height, :width]
+    bgra = np.empty((height, width, 4), np.uint8)
+    bgra[..., 0], bgra[..., 1], bgra[..., 2], bgra[..., 3] = rgb[..., 2], rgb[..., 1], rgb[..., 0], 255
+    return QImage(bgra.data, width, height, width * 4, QImage.Format.Format_RGB32).copy()
+
+
+def legacy_convert(image):
+    """Returns the RGB888 QImage too: the array doesn't keep it alive"""
+    temp_image = composite_on_white(image)
+    width, height = temp_image.width(), temp_image.height()
+    ptr = temp_image.bits()
+    ptr.setsize(height * width * 3)
+    return temp_image, np.frombuffer(ptr, np.uint8).reshape((height, width, 3))
+
+
+def legacy_payload(image):
+    temp_image, arr = legacy_convert(image)
+    buffer = io.BytesIO()
+    Image.fromarray(arr).save(buffer, format='PNG')
+    return base64.b64encode(buffer.getvalue())
+
+
+def new_payload(image):
+    return base64.b64encode(encode_png(qimage_to_array(image)))
+
+
+def timeit(fn, arg, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    app = QGuiApplication(sys.argv)  # noqa: F841
+
+    print(f"{'size':6s} {'stage':10s} {'legacy ms':>10s} {'new ms':>10s} {'speedup':>8s}")
+    for name, (width, height) in SIZES.items():
+        image = make_capture(width, height)
+        rows = [
+            ("convert", legacy_convert, qimage_to_array),
+            ("payload", legacy_payload, new_payload),
+        ]
+        for stage, old, new in rows:
+            old_ms = timeit(old, image, args.repeat)
+            new_ms = timeit(new, image, args.repeat)
+            print(f"{name:6s} {stage:10s} {old_ms:10.2f} {new_ms:10.2f} {old_ms / new_ms:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
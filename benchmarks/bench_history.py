@@ -0,0 +1,110 @@
+"""Benchmark for the capture history store and the history window.
+
+Fills a fresh history file with synthetic captures spread over the last
+months, then times what the app does with it: adding a capture (the
+capture path only queues it), reopening the file, counting, fetching
+pages by time and by total, and opening the history window on Qt's
+offscreen platform. For comparison the window is also filled with every
+entry at once, as the in-memory history list was shown before.
+
+    python benchmarks/bench_history.py [--entries 100000] [--legacy-rows 20000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np  # noqa: E402
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+from app.history_store import HistoryStore  # noqa: E402
+from app.history_window import HistoryWindow  # noqa: E402
+
+
+def synthetic_results(rng):
+    minutes = [rng.randint(1, 180) for _ in range(rng.randint(1, 12))]
+    total = sum(minutes)
+    return {
+        "times": minutes,
+        "times_formatted": [f"{m // 60}:{m % 60:02d}" for m in minutes],
+        "total": total,
+        "total_formatted": f"{total // 60}:{total % 60:02d}",
+        "count": len(minutes),
+        "backend": "openai",
+    }
+
+
+def ms(seconds):
+    return f"{seconds * 1000:8.2f} ms"
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000, help="captures in the history")
+    parser.add_argument("--days", type=int, default=120, help="spread over this many days")
+    parser.add_argument("--legacy-rows", type=int, default=20_000,
+                        help="rows for the fill-everything window comparison")
+    args = parser.parse_args()
+    app = QApplication(sys.argv)
+    rng = random.Random(0)
+    path = Path(tempfile.mkdtemp()) / "history.sqlite3"
+    thumbnail = np.full((60, 200, 3), 255, np.uint8)
+
+    store = HistoryStore(path, max_entries=None, retention_days=None)
+    now = time.time()
+    start = now - args.days * 86400
+    latencies = []
+    for i in range(args.entries):
+        results = synthetic_results(rng)
+        timestamp = start + (now - start) * i / args.entries
+        # A thumbnail for the last few, like a day of real captures
+        image = thumbnail if i >= args.entries - 200 else None
+        begin = time.perf_counter()
+        store.add(results, image=image, timestamp=timestamp)
+        latencies.append(time.perf_counter() - begin)
+    _, flushed = timed(store.flush)
+    store.close()
+    latencies.sort()
+    print(f"{args.entries} captures over {args.days} days, {path.stat().st_size / 1e6:.1f} MB")
+    print(f"add (capture path)   p50 {latencies[len(latencies) // 2] * 1e6:6.1f} us   "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:6.1f} us")
+    print(f"writer caught up      {ms(flushed)} after the last add, "
+          f"{store.counters['commits']} commits")
+
+    store, opened = timed(HistoryStore, path)
+    print(f"reopen               {ms(opened)}")
+    _, counted = timed(store.count)
+    print(f"count                {ms(counted)}")
+    for label, offset, order in [("newest page", 0, "time"),
+                                 ("middle page", args.entries // 2, "time"),
+                                 ("largest totals", 0, "total")]:
+        samples = [timed(store.page, offset, 200, order)[1] for _ in range(20)]
+        print(f"{label:<20} {ms(statistics.median(samples))}  (200 rows)")
+
+    window, shown = timed(HistoryWindow, store)
+    print(f"history window       {ms(shown)}  (one page)")
+    window.close()
+
+    entries = store.page(0, args.legacy_rows)
+    window = HistoryWindow(store)
+    _, legacy = timed(window.populate_history, entries)
+    print(f"every row at once    {ms(legacy)}  ({len(entries)} rows, the old window)")
+    store.close()
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Benchmark for hotkey matching on a stream of key events.
+
+Simulates typing (letters, digits, the odd modifier combo) as the names
+the hotkey listener produces, and compares the original per-event set,
+sort and join matching with app.hotkey_matcher.HotkeyMatcher, with one
+hotkey bound and with many. Also counts the combos each one recognizes;
+the original drops CTRL, so Ctrl hotkeys never matched.
+
+    python benchmarks/bench_hotkeys.py [--events 200000] [--bindings 50] [--repeat 5]
+"""
+import argparse
+import random
+import statistics
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from app.hotkey_matcher import HotkeyMatcher  # noqa: E402
+
+
+class LegacyMatcher:
+    """HotkeyManager's on_press/on_release as they were before the matcher"""
+
+    def __init__(self, hotkey):
+        combo = [key.strip().upper() for key in hotkey.split('+')]
+        self.registered_hotkey = '+'.join(sorted(combo))
+        self.pressed_keys = set()
+
+    def press(self, key_str):
+        self.pressed_keys.add(key_str)
+        current = set()
+        if any(k in self.pressed_keys for k in ['ALT', 'ALT_L', 'ALT_R']):
+            current.add('ALT')
+        if any(k in self.pressed_keys for k in ['SHIFT', 'SHIFT_L', 'SHIFT_R']):
+            current.add('SHIFT')
+        others = {k for k in self.pressed_keys
+                  if k not in {'CTRL', 'CTRL_L', 'CTRL_R',
+                               'SHIFT', 'SHIFT_L', 'SHIFT_R',
+                               'ALT', 'ALT_L', 'ALT_R'}}
+        current.update(others)
+        combo = '+'.join(sorted(current))
+        if combo == self.registered_hotkey:
+            return "capture"
+        return None
+
+    def release(self, key_str):
+        self.pressed_keys.discard(key_str)
+        self.pressed_keys.discard(f"{key_str}_L")
+        self.pressed_keys.discard(f"{key_str}_R")
+
+
+def key_events(count, seed=0):
+    """(pressed, name) pairs: mostly plain typing, some shortcuts"""
+    rng = random.Random(seed)
+    keys = string.ascii_uppercase + string.digits
+    events = []
+    while len(events) < count:
+        modifiers = []
+        roll = rng.random()
+        if roll < 0.05:
+            modifiers = ["ALT_L", "SHIFT"]
+        elif roll < 0.10:
+            modifiers = ["CTRL_L"]
+        elif roll < 0.15:
+            modifiers = ["CTRL_L", "ALT_L"]
+        elif roll < 0.25:
+            modifiers = ["SHIFT"]
+        key = rng.choice(keys)
+        events += [(True, m) for m in modifiers]
+        events += [(True, key), (False, key)]
+        events += [(False, m) for m in reversed(modifiers)]
+    return events
+
+
+def drive(matcher, events):
+    matched = 0
+    for pressed, name in events:
+        if pressed:
+            if matcher.press(name):
+                matched += 1
+        else:
+            matcher.release(name)
+    return matched
+
+
+def timed(make, events, repeat):
+    samples = []
+    for _ in range(repeat):
+        matcher = make()
+        start = time.perf_counter()
+        matched = drive(matcher, events)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), matched
+
+
+def many(count, seed=1):
+    """count distinct bindings, always including the two measured ones"""
+    rng = random.Random(seed)
+    matcher = HotkeyMatcher()
+    matcher.bind("ALT+SHIFT+T", "capture")
+    matcher.bind("CTRL+ALT+R", "repeat_region")
+    modifiers = ["CTRL", "ALT", "SHIFT", "CTRL+ALT", "CTRL+SHIFT", "ALT+SHIFT", "CMD"]
+    while len(matcher.bindings) < count:
+        matcher.bind(f"{rng.choice(modifiers)}+F{rng.randint(1, 24)}", "other")
+    return matcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--bindings", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    events = key_events(args.events)
+
+    def one():
+        matcher = HotkeyMatcher()
+        matcher.bind("ALT+SHIFT+T", "capture")
+        matcher.bind("CTRL+ALT+R", "repeat_region")
+        return matcher
+
+    runs = [
+        ("legacy, 1 hotkey", lambda: LegacyMatcher("ALT+SHIFT+T")),
+        ("matcher, 2 hotkeys", one),
+        (f"matcher, {args.bindings} hotkeys", lambda: many(args.bindings)),
+    ]
+    print(f"{len(events)} key events")
+    legacy_time = None
+    for label, make in runs:
+        seconds, matched = timed(make, events, args.repeat)
+        legacy_time = legacy_time or seconds
+        print(f"{label:<22}{seconds / len(events) * 1e9:8.0f} ns/event "
+              f"{len(events) / seconds / 1e6:6.2f} M events/s  {matched:5d} matches "
+              f"({legacy_time / seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark for capture overlay repaints while dragging a selection.
+
+Drives a synthetic drag across a ScreenCaptureWidget sized like a large
+virtual desktop, on Qt's offscreen platform, and times each mouse move up
+to the finished repaint: once repainting the whole overlay on every move
+(as before dirty-region painting) and once with the dirty regions the
+widget invalidates now. One frame at 60 Hz is 16.7 ms.
+
+    python benchmarks/bench_overlay.py [--width 11520] [--height 2160] [--steps 120]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QPoint, QPointF, Qt  # noqa: E402
+from PyQt6.QtGui import QMouseEvent  # noqa: E402
+from PyQt6.QtWidgets import QApplication, QRubberBand  # noqa: E402
+
+from app.screen_capture import ScreenCaptureWidget  # noqa: E402
+
+
+class FullRepaintWidget(ScreenCaptureWidget):
+    """The overlay as it was: a rubber band child widget, and every move
+    repaints everything"""
+
+    def mousePressEvent(self, event):
+        super().mousePressEvent(event)
+        self.rubberband = QRubberBand(QRubberBand.Shape.Rectangle, self)
+        self.rubberband.setGeometry(self.selection)
+        self.rubberband.show()
+
+    def set_selection(self, new):
+        self.selection = new
+        if getattr(self, "rubberband", None):
+            self.rubberband.setGeometry(new)
+        self.update()
+
+
+def mouse(kind, point, buttons=Qt.MouseButton.LeftButton):
+    return QMouseEvent(kind, QPointF(point), QPointF(point), Qt.MouseButton.LeftButton,
+                       buttons, Qt.KeyboardModifier.NoModifier)
+
+
+def drag(app, widget, steps, width, height):
+    """Milliseconds from each mouse move to its repaint being done"""
+    start = QPoint(width // 10, height // 10)
+    widget.mousePressEvent(mouse(QMouseEvent.Type.MouseButtonPress, start))
+    app.processEvents()
+    samples = []
+    for step in range(1, steps + 1):
+        # Out and back again, like a user adjusting the selection
+        t = step / steps * 2
+        t = t if t <= 1 else 2 - t
+        point = QPoint(start.x() + int(t * width * 0.7) + 1, start.y() + int(t * height * 0.7) + 1)
+        begin = time.perf_counter()
+        widget.mouseMoveEvent(mouse(QMouseEvent.Type.MouseMove, point))
+        app.processEvents()
+        samples.append((time.perf_counter() - begin) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=11520, help="virtual desktop width")
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--steps", type=int, default=120, help="mouse moves per drag")
+    args = parser.parse_args()
+    app = QApplication(sys.argv)
+
+    print(f"{args.width}x{args.height} overlay, {args.steps} mouse moves")
+    for label, cls in [("full repaint", FullRepaintWidget), ("dirty regions", ScreenCaptureWidget)]:
+        widget = cls()
+        widget.setGeometry(0, 0, args.width, args.height)
+        widget.show()
+        app.processEvents()
+        samples = drag(app, widget, args.steps, args.width, args.height)
+        widget.hide()
+        samples.sort()
+        print(f"{label:<15} p50 {statistics.median(samples):7.2f} ms   "
+              f"p95 {samples[int(len(samples) * 0.95) - 1]:7.2f} ms   max {samples[-1]:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark for app startup: time to tray icon and time to ready.
+
+Starts the tray app in a fresh interpreter each run, the way src/main.py
+does, and reports how long the imports took, when the tray icon was up
+and when the warm-up had loaded the capture pipeline and built the
+overlay. Needs what the app needs (a display, a keyboard hook);
+OPENAI_API_KEY may be a dummy, nothing is sent.
+
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+# Run in the child; prints one JSON line of timings once the app is ready
+CHILD = """
+import time
+started = time.perf_counter()
+import json, sys
+sys.path.insert(0, sys.argv[1])
+from PyQt6.QtWidgets import QApplication
+from app.tray_app import TrayApp
+app = QApplication([])
+tray = TrayApp(started=started)
+def ready():
+    print(json.dumps({
+        "imports_ms": tray.import_time * 1000,
+        "tray_ms": tray.tray_time * 1000,
+        "ready_ms": (time.perf_counter() - started) * 1000,
+        "warmup_ms": {step: seconds * 1000 for step, seconds in tray.warmup.timings},
+    }), flush=True)
+    app.quit()
+tray.warmup.ready.connect(ready)
+tray.warmup.failed.connect(app.quit)
+app.exec()
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+    runs = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, "-c", CHILD, str(SRC)], env=env, cwd=SRC.parent,
+                             capture_output=True, text=True, timeout=120)
+        lines = [line for line in out.stdout.splitlines() if line.startswith("{")]
+        if not lines:
+            sys.exit(f"App didn't get ready:\n{out.stderr}")
+        runs.append(json.loads(lines[-1]))
+
+    print(f"median of {len(runs)} runs")
+    for key, label in [("imports_ms", "imports"), ("tray_ms", "tray icon"), ("ready_ms", "ready")]:
+        print(f"{label:<12} {statistics.median(run[key] for run in runs):8.0f} ms")
+    print("warm-up, off the GUI thread:")
+    for step in runs[0]["warmup_ms"]:
+        print(f"  {step:<14} {statistics.median(run['warmup_ms'][step] for run in runs):6.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
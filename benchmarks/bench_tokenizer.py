@@ -0,0 +1,89 @@
+"""Benchmark for the numeric token scanner on large OCR outputs.
+
+Generates OCR-like text (task names, durations in every supported
+spelling, percentages, amounts, dates and noise) and compares the original
+H:MM regex + time_to_minutes loop with app.tokenizer.scan. scan looks for
+every kind of value, so it costs several times more per line than the old
+loop; per value found the two are about the same.
+
+    python benchmarks/bench_tokenizer.py [--lines 100000] [--repeat 5]
+"""
+import argparse
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from app.tokenizer import scan  # noqa: E402
+
+LEGACY_PATTERN = re.compile(r'\b([0-9]{1,2}):([0-5][0-9])\b')
+
+
+def legacy_extract(text):
+    """extract_times + time_to_minutes as they were before the tokenizer"""
+    times = []
+    for hours, minutes in LEGACY_PATTERN.findall(text):
+        h, m = int(hours), int(minutes)
+        if 0 <= h <= 23 and 0 <= m <= 59:
+            times.append(f"{h}:{m:02d}")
+    minutes = []
+    for t in times:
+        hours, mins = map(int, t.split(':'))
+        minutes.append(hours * 60 + mins)
+    return times, minutes
+
+
+def ocr_text(lines, seed=0):
+    rng = random.Random(seed)
+    makers = [
+        lambda: f"Task {rng.randint(1, 500)}  {rng.randint(0, 12)}:{rng.randint(0, 59):02d}",
+        lambda: f"{rng.randint(0, 60)}:{rng.randint(0, 59):02d}",
+        lambda: f"{rng.randint(0, 9)}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}",
+        lambda: f"{rng.randint(0, 8)}h {rng.randint(0, 59)}m",
+        lambda: f"{rng.randint(0, 80) / 10} hours",
+        lambda: f"Progress {rng.randint(0, 1000) / 10}%",
+        lambda: f"${rng.randint(0, 99999):,}.{rng.randint(0, 99):02d}",
+        lambda: f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        lambda: rng.choice(["Total", "Meeting notes", "v1.2.3", "Review", "--"]),
+    ]
+    return "\n".join(rng.choice(makers)() for _ in range(lines))
+
+
+def timed(fn, text, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(text)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    text = ocr_text(args.lines)
+    legacy_time, (times, _) = timed(legacy_extract, text, args.repeat)
+    scan_time, tokens = timed(scan, text, args.repeat)
+
+    print(f"{args.lines} lines, {len(text) / 1e6:.1f} MB of text")
+    print(f"legacy H:MM only    {legacy_time * 1000:8.1f} ms  {len(times):7d} durations")
+    print(f"tokenizer.scan      {scan_time * 1000:8.1f} ms  {tokens.durations.size:7d} durations, "
+          f"{tokens.percentages.size} percentages, {tokens.amounts.size} amounts, "
+          f"{tokens.dates.size} dates")
+    found = (tokens.durations.size + tokens.percentages.size + tokens.amounts.size
+             + tokens.dates.size)
+    print(f"per line            {legacy_time / args.lines * 1e6:8.2f} us -> "
+          f"{scan_time / args.lines * 1e6:.2f} us")
+    print(f"per value found     {legacy_time / max(1, len(times)) * 1e6:8.2f} us -> "
+          f"{scan_time / max(1, found) * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Local stand-in for the OpenAI chat completions API.
+
+Answers every request with a few H:MM values per image after a
+configurable delay, fails a share of them with 500/429 errors and
+supports streamed responses, so the whole capture pipeline (pooling,
+retries, hedging, batching, streaming) can be driven without the real
+API. Point the app at it with "api": {"base_url": ...} or OPENAI_BASE_URL.
+
+    python benchmarks/mock_openai.py [--port 8765] [--latency 0.8] [--jitter 0.3] [--error-rate 0.05]
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockOpenAI:
+    """Threaded mock server; start() returns its base URL"""
+
+    def __init__(self, port=0, latency=0.8, jitter=0.3, error_rate=0.0, values=8, seed=0):
+        self.latency = latency
+        self.jitter = jitter  # Lognormal sigma, tails like a real API
+        self.error_rate = error_rate
+        self.values = values
+        self.rng = random.Random(seed)
+        self.counters = {"requests": 0, "images": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self.handler())
+        self.server.daemon_threads = True
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="mock-openai",
+                         daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def delay(self):
+        with self._lock:
+            if not self.jitter:
+                return self.latency
+            return self.latency * self.rng.lognormvariate(0, self.jitter)
+
+    def fails(self):
+        with self._lock:
+            return self.rng.random() < self.error_rate
+
+    def answer(self, image_urls):
+        """Same values for the same image, like a deterministic model"""
+        sections = []
+        for url in image_urls:
+            rng = random.Random(hashlib.blake2b(url.encode(), digest_size=8).digest())
+            values = [f"{rng.randint(0, 12)}:{rng.randint(0, 59):02d}" for _ in range(self.values)]
+            sections.append("\n".join(values))
+        if len(sections) == 1:
+            return sections[0]
+        return "\n".join(f"### IMAGE {i}\n{text}" for i, text in enumerate(sections, start=1))
+
+    def handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                # Connection pre-warm
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                image_urls = [part["image_url"]["url"]
+                              for message in body["messages"]
+                              for part in message["content"]
+                              if isinstance(part, dict) and part.get("type") == "image_url"]
+                with mock._lock:
+                    mock.counters["requests"] += 1
+                    mock.counters["images"] += len(image_urls)
+                time.sleep(mock.delay())
+
+                if mock.fails():
+                    with mock._lock:
+                        mock.counters["errors"] += 1
+                    status = mock.rng.choice([429, 500])
+                    self.send_json(status, {"error": {"message": "mock failure",
+                                                      "type": "server_error"}})
+                    return
+
+                text = mock.answer(image_urls)
+                if body.get("stream"):
+                    self.stream(text)
+                else:
+                    self.send_json(200, {
+                        "id": "mock", "object": "chat.completion", "created": int(time.time()),
+                        "model": body.get("model", "mock"),
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": text}}],
+                    })
+
+            def send_json(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def stream(self, text):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for line in text.splitlines(keepends=True):
+                    chunk = {"id": "mock", "object": "chat.completion.chunk",
+                             "created": int(time.time()), "model": "mock",
+                             "choices": [{"index": 0, "delta": {"content": line},
+                                          "finish_reason": None}]}
+                    self.write_chunk(f"data: {json.dumps(chunk)}\n\n")
+                self.write_chunk("data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def write_chunk(self, text):
+                data = text.encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.8, help="median seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.3,
+                        help="lognormal sigma of the latency, 0 for a fixed delay")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="share of requests answered with 429/500")
+    parser.add_argument("--values", type=int, default=8, help="H:MM values per image")
+    args = parser.parse_args()
+
+    mock = MockOpenAI(args.port, args.latency, args.jitter, args.error_rate, args.values)
+    print(f"Mock OpenAI API at {mock.base_url}, Ctrl+C to stop")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
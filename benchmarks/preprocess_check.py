@@ -0,0 +1,110 @@
+"""Payload size and accuracy regression check for the upload preprocessing.
+
+Renders synthetic timesheets, reports the bytes uploaded before and after
+preprocessing (and when only the text regions are sent as a mosaic) and
+checks with an extraction backend that the extracted times are identical
+for the raw and preprocessed image.
+
+    python benchmarks/preprocess_check.py --backend openai|tesseract
+    python benchmarks/preprocess_check.py --sizes-only
+
+Exits with status 1 if any capture extracts differently, 2 if no backend
+was given: sizes alone say nothing about accuracy.
+"""
+import argparse
+import io
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from app.backends import create_backend  # noqa: E402
+from app.preprocess import Preprocessor  # noqa: E402
+from app.processor import ImageProcessor  # noqa: E402
+from app.regions import RegionExtractor  # noqa: E402
+from synthetic import render_suite  # noqa: E402
+
+
+def png_size(image):
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, format="PNG")
+    return buffer.tell()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", help="check accuracy with this backend")
+    parser.add_argument("--sizes-only", action="store_true",
+                        help="only report payload sizes, accuracy is NOT checked")
+    parser.add_argument("--binarize", action="store_true",
+                        help="also binarize and allow JPEG, as the lossy settings do")
+    args = parser.parse_args()
+    if not args.backend and not args.sizes_only:
+        parser.error("pass --backend to check accuracy, or --sizes-only to skip the check")
+    if not args.backend:
+        print("WARNING: no backend given, accuracy is NOT checked, only sizes\n",
+              file=sys.stderr)
+
+    options = {"binarize": True, "allow_jpeg": True} if args.binarize else {}
+    preprocessor = Preprocessor(**options)
+    regions = RegionExtractor(None)
+    processor = raw_backend = None
+    if args.backend:
+        processor = ImageProcessor({"backend": args.backend, "cache": {"enabled": False},
+                                    "backends": {"openai": {"preprocess": options}}})
+        if args.backend == "openai":
+            # Same model, but uploading the untouched PNG
+            raw_backend = create_backend("openai", {"preprocess": {"enabled": False}})
+        else:
+            raw_backend = processor.backend
+
+    failures = 0
+    total_before = total_after = total_pixels = total_mosaic = 0
+    for name, (image, expected) in render_suite().items():
+        scale = 2 if "hidpi" in name else 1
+        before = png_size(image)
+        encoded = preprocessor.encode(image, device_pixel_ratio=scale)
+        total_before += before
+        total_after += encoded.encoded_bytes
+        mosaic = regions.pack(image)
+        packed = preprocessor.encode(image if mosaic is None else mosaic, device_pixel_ratio=scale)
+        # The vision model bills by image size, not by bytes
+        pixels = encoded.size[0] * encoded.size[1]
+        mosaic_pixels = packed.size[0] * packed.size[1]
+        total_pixels += pixels
+        total_mosaic += mosaic_pixels
+        line = (f"{name:14s} {image.shape[1]:5d}x{image.shape[0]:<5d} "
+                f"{before:9d} -> {encoded.encoded_bytes:8d} bytes "
+                f"({encoded.encoded_bytes / before:6.1%}, {encoded.mime}, "
+                f"{encoded.size[0]}x{encoded.size[1]}), "
+                f"mosaic {packed.size[0]}x{packed.size[1]} ({mosaic_pixels / pixels:6.1%} of the pixels)")
+
+        if processor:
+            raw_times = processor.extract_times(raw_backend.extract(image).text)
+            if args.backend == "openai":
+                # The backend preprocesses internally
+                processed = image
+            else:
+                processed = preprocessor.process(image, scale)
+                if processed.ndim == 2:
+                    processed = processed[..., None].repeat(3, axis=2)
+            new_times = processor.extract_times(processor.backend.extract(
+                processed, device_pixel_ratio=scale
+            ).text)
+            ok = raw_times == new_times
+            failures += not ok
+            line += "  OK" if ok else f"  MISMATCH {raw_times} != {new_times}"
+            if sorted(new_times) != sorted(expected):
+                line += f"  (expected {len(expected)} values, got {len(new_times)})"
+        print(line)
+
+    print(f"{'total':14s} {'':11s} {total_before:9d} -> {total_after:8d} bytes "
+          f"({total_after / total_before:6.1%}), mosaic {total_mosaic / total_pixels:6.1%} "
+          f"of the pixels")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""Benchmark and load-test suite, checked against a stored baseline.
+
+Micro: QImage conversion, upload encoding and parsing on synthetic
+timesheets of varying size, font and value count. End to end: concurrent
+ImageProcessor captures against the local mock API (mock_openai.py) with
+configurable latency and errors, reporting throughput and tail latency.
+
+Best times of the microbenchmarks and the end-to-end throughput, tail
+latency and failures are compared with benchmarks/baseline.json; the run
+exits with status 1 when one got worse by more than --tolerance. Timings
+depend on the machine, so save a baseline on the machine that compares.
+
+    python benchmarks/run.py                    # run and compare
+    python benchmarks/run.py --save-baseline    # store this run as the baseline
+    python benchmarks/run.py --only e2e --captures 200 --concurrency 16 --error-rate 0.05
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+from PyQt6.QtGui import QGuiApplication, QImage  # noqa: E402
+
+from app.conversion import qimage_to_array  # noqa: E402
+from app.instrumentation import Metrics  # noqa: E402
+from app.preprocess import Preprocessor  # noqa: E402
+from app.tokenizer import scan  # noqa: E402
+from mock_openai import MockOpenAI  # noqa: E402
+from synthetic import render_timesheet  # noqa: E402
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# Synthetic captures: size, font and number of values all vary
+CASES = {
+    "panel_small": dict(count=5, font_size=13),
+    "panel_serif": dict(count=12, font_size=15, font="DejaVuSerif.ttf"),
+    "panel_large_font": dict(count=12, font_size=24, dark=True),
+    "column_hidpi": dict(count=40, font_size=14, scale=2),
+    "month_wide": dict(count=124, font_size=12, columns=4),
+    "quarter_hidpi": dict(count=360, font_size=12, columns=6, scale=2),
+}
+
+# Differences below this are noise, whatever the percentage; sub-millisecond
+# stages swing by more than half between runs on a busy machine
+NOISE_MS = 0.5
+
+
+def to_qimage(arr):
+    """RGB array as the RGB32 QImage a screen grab produces"""
+    height, width = arr.shape[:2]
+    bgra = np.empty((height, width, 4), np.uint8)
+    bgra[..., 0], bgra[..., 1], bgra[..., 2], bgra[..., 3] = arr[..., 2], arr[..., 1], arr[..., 0], 255
+    return QImage(bgra.data, width, height, width * 4, QImage.Format.Format_RGB32).copy()
+
+
+def ocr_text(times, seed):
+    """What a model returns for a timesheet: values among task names and noise"""
+    rng = random.Random(seed)
+    lines = []
+    for i, value in enumerate(times):
+        lines.append(rng.choice([f"Task {i + 1}  {value}", value, f"{value} (billable)"]))
+        if rng.random() < 0.2:
+            lines.append(rng.choice(["Total", "v1.2.3", "Page 2/7", "--"]))
+    return "\n".join(lines)
+
+
+def percentiles(samples):
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return float(p50), float(p95), float(p99)
+
+
+def best_and_percentiles(samples):
+    return (float(min(samples)),) + percentiles(samples)
+
+
+def timed(fn, arg, repeat, min_sample=0.005):
+    """Best time and percentiles of fn(arg) in ms; fast calls are looped until
+    a sample takes ``min_sample`` seconds, below that the timer is mostly noise"""
+    start = time.perf_counter()
+    fn(arg)  # Warm-up: imports, caches, first allocation of big buffers
+    loops = max(1, int(min_sample / max(time.perf_counter() - start, 1e-7)))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn(arg)
+        samples.append((time.perf_counter() - start) * 1000 / loops)
+    return best_and_percentiles(samples)
+
+
+def run_micro(repeat):
+    metrics = {}
+    preprocessor = Preprocessor()
+    print(f"{'case':<18}{'size':>11}{'values':>7}  {'stage':<8}{'p50 ms':>9}{'p95 ms':>9}")
+    for name, options in CASES.items():
+        arr, times = render_timesheet(seed=len(name), **options)
+        image = to_qimage(arr)
+        text = ocr_text(times, len(name))
+        stages = {
+            "convert": (qimage_to_array, image),
+            "encode": (preprocessor.encode, arr),
+            "parse": (scan, text),
+        }
+        for stage, (fn, arg) in stages.items():
+            best, p50, p95, _ = timed(fn, arg, repeat)
+            metrics[f"micro.{name}.{stage}.min_ms"] = best
+            metrics[f"micro.{name}.{stage}.p50_ms"] = p50
+            metrics[f"micro.{name}.{stage}.p95_ms"] = p95
+            size = f"{arr.shape[1]}x{arr.shape[0]}"
+            print(f"{name:<18}{size:>11}{len(times):>7}  {stage:<8}{p50:9.2f}{p95:9.2f}")
+    return metrics
+
+
+def run_e2e(args):
+    from app.processor import ImageProcessor
+
+    mock = MockOpenAI(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    base_url = mock.start()
+    processor = ImageProcessor({
+        "api": {"base_url": base_url, "backoff_base": 0.05, "max_retries": 5},
+        # Every capture has to reach the mock
+        "cache": {"enabled": False},
+        "diagnostics": {"trace_memory": False, "export_seconds": 0, "prometheus_port": None},
+    })
+
+    # Distinct captures, so coalescing doesn't hide any of them
+    names = list(CASES)
+    captures = []
+    for i in range(args.captures):
+        options = CASES[names[i % len(names)]]
+        arr, _ = render_timesheet(seed=1000 + i, **options)
+        captures.append(to_qimage(arr))
+
+    def capture(image):
+        start = time.perf_counter()
+        results = processor.process_image(image)
+        return (time.perf_counter() - start) * 1000, bool(results.get("error"))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        outcomes = list(pool.map(capture, captures))
+    elapsed = time.perf_counter() - start
+    mock.stop()
+
+    latencies = [ms for ms, _ in outcomes]
+    failed = sum(error for _, error in outcomes)
+    p50, p95, p99 = percentiles(latencies)
+    throughput = len(captures) / elapsed
+    print(f"{len(captures)} captures, {args.concurrency} at a time, mock latency "
+          f"{args.latency}s (sigma {args.jitter}), error rate {args.error_rate:.0%}")
+    print(f"  {throughput:.2f} captures/s, latency p50 {p50:.0f} ms, p95 {p95:.0f} ms, "
+          f"p99 {p99:.0f} ms, {failed} failed")
+    print(f"  {mock.counters['requests']} requests for {mock.counters['images']} images, "
+          f"{mock.counters['errors']} injected errors")
+
+    # Where the time went, from the app's own instrumentation
+    for stage, span in Metrics.instance().summary()["spans"].items():
+        if "p95_ms" in span:
+            print(f"  {stage:<10} p50 {span['p50_ms']:8.1f} ms   p95 {span['p95_ms']:8.1f} ms")
+
+    return {
+        "e2e.throughput": throughput,
+        "e2e.p50_ms": p50,
+        "e2e.p95_ms": p95,
+        "e2e.p99_ms": p99,
+        "e2e.failed": failed,
+    }
+
+
+def e2e_settings(args):
+    return {"captures": args.captures, "concurrency": args.concurrency, "latency": args.latency,
+            "jitter": args.jitter, "error_rate": args.error_rate}
+
+
+def compare(metrics, baseline, tolerance, same_load):
+    """Return the regressions, as printable lines"""
+    regressions = []
+    for key, value in sorted(metrics.items()):
+        if key not in baseline:
+            continue
+        if key.startswith("e2e.") and not same_load:
+            continue
+        if key.startswith("micro.") and not key.endswith("min_ms"):
+            continue  # Anything above the best time is mostly the machine's
+        old = baseline[key]
+        if key == "e2e.throughput":
+            worse = value < old * (1 - tolerance)
+        elif key == "e2e.failed":
+            worse = value > old
+        else:
+            worse = value > old * (1 + tolerance) and value - old > NOISE_MS
+        if worse:
+            change = (value - old) / old if old else float("inf")
+            regressions.append(f"{key}: {old:.2f} -> {value:.2f} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", choices=["micro", "e2e"], help="run one half of the suite")
+    parser.add_argument("--repeat", type=int, default=30, help="samples per microbenchmark")
+    parser.add_argument("--captures", type=int, default=48)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.3, help="mock median seconds")
+    parser.add_argument("--jitter", type=float, default=0.3, help="mock lognormal sigma")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown before a metric counts as a regression")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+    app = QGuiApplication(sys.argv)  # noqa: F841
+
+    metrics = {}
+    if args.only != "e2e":
+        metrics.update(run_micro(args.repeat))
+    if args.only != "micro":
+        print()
+        metrics.update(run_e2e(args))
+
+    if args.save_baseline:
+        stored = {}
+        if args.baseline.exists():
+            stored = json.loads(args.baseline.read_text())
+        stored.setdefault("metrics", {}).update(metrics)
+        stored["machine"] = f"{platform.system()} {platform.machine()}, Python {platform.python_version()}"
+        if args.only != "micro":
+            stored["e2e_settings"] = e2e_settings(args)
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}, run with --save-baseline first")
+        return
+    stored = json.loads(args.baseline.read_text())
+    same_load = stored.get("e2e_settings") == e2e_settings(args)
+    if args.only != "micro" and not same_load:
+        print("\nEnd-to-end load differs from the baseline's, only microbenchmarks compared")
+    regressions = compare(metrics, stored["metrics"], args.tolerance, same_load)
+    if regressions:
+        print(f"\n{len(regressions)} regressions against {args.baseline.name} "
+              f"(tolerance {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nNo regressions against {args.baseline.name} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
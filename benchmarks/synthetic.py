@@ -0,0 +1,101 @@
+"""Synthetic timesheet captures for benchmarks and accuracy checks"""
+import random
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+FONT_CANDIDATES = [
+    "segoeui.ttf",
+    "arial.ttf",
+    "DejaVuSans.ttf",
+    "LiberationSans-Regular.ttf",
+]
+
+
+def load_font(size, font=None):
+    for name in ([font] if font else []) + FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def random_times(count, rng, max_hours=12):
+    return [f"{rng.randint(0, max_hours)}:{rng.randint(0, 59):02d}" for _ in range(count)]
+
+
+def render_timesheet(count=10, font_size=14, width=None, dark=False, scale=1,
+                     columns=1, seed=0, font=None):
+    """Render a timesheet panel, return (RGB array, expected H:MM strings).
+
+    ``scale`` mimics a HiDPI capture (devicePixelRatio); ``columns`` spreads
+    the values over several side-by-side columns of task rows. ``font`` is
+    tried before the usual candidates.
+    """
+    rng = random.Random(seed)
+    times = random_times(count, rng)
+
+    font = load_font(font_size * scale, font)
+    row_height = int(font_size * 2.2) * scale
+    rows = -(-count // columns)
+    column_width = 260 * scale
+    width = width * scale if width else column_width * columns + 40 * scale
+    height = rows * row_height + 60 * scale
+
+    background, ink, chrome = ((32, 32, 32), (230, 230, 230), (64, 64, 64)) if dark \
+        else ((255, 255, 255), (20, 20, 20), (220, 220, 220))
+    image = Image.new("RGB", (width, height), background)
+    draw = ImageDraw.Draw(image)
+    draw.text((20 * scale, 16 * scale), "Task", fill=ink, font=font)
+
+    for i, value in enumerate(times):
+        row, column = i % rows, i // rows
+        x = 20 * scale + column * column_width
+        y = 50 * scale + row * row_height
+        draw.line((x, y - 6 * scale, x + column_width - 30 * scale, y - 6 * scale), fill=chrome)
+        draw.text((x, y), f"Task {i + 1}", fill=ink, font=font)
+        draw.text((x + 160 * scale, y), value, fill=ink, font=font)
+
+    return np.asarray(image), times
+
+
+def render_suite(seed=0):
+    """A spread of realistic captures: small panels up to HiDPI full columns"""
+    return {
+        "panel_small": render_timesheet(count=5, font_size=13, seed=seed),
+        "panel_dark": render_timesheet(count=12, font_size=14, dark=True, seed=seed + 1),
+        "column_hidpi": render_timesheet(count=20, font_size=14, scale=2, seed=seed + 2),
+        "month_wide": render_timesheet(count=62, font_size=12, columns=4, seed=seed + 3),
+    }
+
+
+def render_grid(width, height, font_size=14, dense=False, seed=0):
+    """Fill a width x height capture with rows of values, as spread over screens.
+
+    Returns (RGB array, [((left, top, right, bottom), "H:MM"), ...]). With
+    ``dense`` the values are packed with no gaps wider than a space between
+    them and barely any space between lines, so tiling can't avoid cutting
+    through text.
+    """
+    rng = random.Random(seed)
+    font = load_font(font_size)
+    image = Image.new("RGB", (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    boxes = []
+
+    line_height = font_size + 2 if dense else int(font_size * 2.2)
+    for y in range(8, height - 2 * line_height, line_height):
+        if not dense:
+            draw.line((0, y - 4, width, y - 4), fill=(220, 220, 220))
+        x = 8
+        while True:
+            value = f"{rng.randint(0, 12)}:{rng.randint(0, 59):02d}"
+            box = draw.textbbox((x, y), value, font=font)
+            if box[2] > width - 8:
+                break
+            draw.text((x, y), value, fill=(20, 20, 20), font=font)
+            boxes.append((box, value))
+            x = box[2] + (3 if dense else 120)
+
+    return np.asarray(image), boxes
@@ -0,0 +1,82 @@
+"""Checks tiled extraction on multi-screen sized captures.
+
+A stand-in backend "reads" every value whose box lies completely inside
+the tile it is given and takes ``--latency`` seconds per request, so the
+numbers show how many values tiling loses or counts twice and how wall
+time grows with capture size, without any API calls.
+
+    python benchmarks/tiling_check.py [--latency 1.5]
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from app.backends import ExtractionResult  # noqa: E402
+from app.processor import ImageProcessor  # noqa: E402
+from app.tiling import TiledExtractor  # noqa: E402
+from app.tokenizer import durations_by_line  # noqa: E402
+from synthetic import render_grid  # noqa: E402
+
+SIZES = {
+    "1080p": (1920, 1080),
+    "4K": (3840, 2160),
+    "3x4K": (3 * 3840, 2160),
+    "8K": (7680, 4320),
+}
+
+
+class LayoutBackend:
+    """Returns the values laid out inside the crop it is handed"""
+    name = "layout"
+
+    def __init__(self, capture, boxes, latency):
+        self.capture = capture
+        self.boxes = boxes
+        self.latency = latency
+
+    def extract(self, image, progress=None, device_pixel_ratio=1.0, on_text=None):
+        # Tiles are views into the capture, their offset gives the position
+        offset = image.__array_interface__["data"][0] - self.capture.__array_interface__["data"][0]
+        y0, rest = divmod(offset, self.capture.strides[0])
+        x0 = rest // self.capture.strides[1]
+        y1, x1 = y0 + image.shape[0], x0 + image.shape[1]
+        values = [value for (left, top, right, bottom), value in self.boxes
+                  if left >= x0 and right <= x1 and top >= y0 and bottom <= y1]
+        time.sleep(self.latency)
+        return ExtractionResult("\n".join(values), None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=1.5,
+                        help="simulated seconds per request")
+    args = parser.parse_args()
+
+    processor = ImageProcessor({"cache": {"enabled": False}})
+    print(f"{'capture':<16}{'tiles':>6}{'values':>8}{'lost':>6}{'twice':>7}{'time':>8}")
+    for name, (width, height) in SIZES.items():
+        for dense in (False, True):
+            capture, boxes = render_grid(width, height, dense=dense, seed=width)
+            backend = LayoutBackend(capture, boxes, args.latency)
+            tiler = TiledExtractor(backend, processor.extract_times,
+                                   parse_lines=durations_by_line)
+
+            start = time.perf_counter()
+            result = tiler.extract(capture)
+            elapsed = time.perf_counter() - start
+
+            expected = Counter(value for _, value in boxes)
+            found = Counter(processor.extract_times(result.text))
+            tiles, _ = tiler.plan(tiler.ink_mask(capture))
+            label = f"{name}{' dense' if dense else ''}"
+            print(f"{label:<16}{len(tiles):>6}{sum(expected.values()):>8}"
+                  f"{sum((expected - found).values()):>6}{sum((found - expected).values()):>7}"
+                  f"{elapsed:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+from collections import namedtuple
+import base64
+import re
+
+import cv2
+
+from .client_manager import ClientManager
+from .conversion import to_bgr
+from .instrumentation import span
+from .preprocess import Preprocessor
+from .log import get_logger
+
+log = get_logger(__name__)
+
+# text: raw extracted text, one value per line
+# confidence: 0..1 when the engine reports one, otherwise None
+# payload: size of what was uploaded, for backends that upload anything
+# sources: (text, (x, y, w, h)) per region when the text can be traced back
+# to where it was in the capture
+# route: which backends were tried and why, when a BackendRouter picked one
+ExtractionResult = namedtuple(
+    "ExtractionResult", ["text", "confidence", "payload", "sources", "route"],
+    defaults=(None, None, None)
+)
+
+PROMPT = (
+    "Extract all time durations, dates, or numeric patterns from this image. "
+    "Return them exactly as they appear, one per line. Focus on time values "
+    "in H:MM format, but also note any other relevant numeric patterns."
+)
+
+BATCH_PROMPT = (
+    "You are given {count} separate images, each introduced by a label "
+    "'IMAGE n'. For every image, write a line '### IMAGE n' and below it "
+    "extract all time durations, dates, or numeric patterns from that image "
+    "only. Return them exactly as they appear, one per line. Focus on time "
+    "values in H:MM format, but also note any other relevant numeric patterns. "
+    "Write a section for every image, even if it is empty."
+)
+
+SECTION_PATTERN = re.compile(r'^\W*IMAGE\s+(\d+)\W*$', re.IGNORECASE | re.MULTILINE)
+
+
+def split_sections(text, count):
+    """Split a batched response into {image number: text} for 1..count"""
+    sections = {}
+    matches = list(SECTION_PATTERN.finditer(text or ""))
+    for i, match in enumerate(matches):
+        number = int(match.group(1))
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        if 1 <= number <= count and number not in sections:
+            sections[number] = text[match.end():end].strip()
+    return sections
+
+
+class ExtractionBackend:
+    """Turns an RGB capture into text for ImageProcessor to parse.
+
+    Backends only produce text; ImageProcessor builds the result dict from
+    it, so every backend yields the same result shape.
+    """
+    name = "base"
+
+    def extract(self, image, progress=None, device_pixel_ratio=1.0, on_text=None):
+        """Return an ExtractionResult for an (H, W, 3) uint8 RGB array.
+
+        ``progress`` is called with a stage name before each slow step.
+        ``device_pixel_ratio`` is the scale the capture was grabbed at.
+        ``on_text`` is called with pieces of the text as they become
+        available; backends that can't stream call it once with all of it.
+        """
+        raise NotImplementedError
+
+
+class OpenAIBackend(ExtractionBackend):
+    """Remote extraction with an OpenAI vision model"""
+    name = "openai"
+
+    def __init__(self, model="gpt-4o-mini-2024-07-18", max_tokens=300, preprocess=None):
+        self.model = model
+        self.max_tokens = max_tokens
+        # One pooled client for the whole process, see ClientManager
+        self.clients = ClientManager.instance()
+        self.client = self.clients.client
+        self.preprocessor = Preprocessor.from_settings(preprocess)
+
+    def encode(self, image, device_pixel_ratio=1.0):
+        """Preprocess the capture and return (data URL, payload stats)"""
+        with span("encode"):
+            encoded = self.preprocessor.encode(image, device_pixel_ratio)
+        with span("base64"):
+            base64_image = base64.b64encode(encoded.data).decode('utf-8')
+        payload = {
+            "original_bytes": encoded.original_bytes,
+            "encoded_bytes": encoded.encoded_bytes,
+            "base64_bytes": len(base64_image),
+            "mime": encoded.mime,
+            "size": list(encoded.size),
+        }
+        return f"data:{encoded.mime};base64,{base64_image}", payload
+
+    def extract(self, image, progress=None, device_pixel_ratio=1.0, on_text=None):
+        if progress:
+            progress("encoding")
+        image_url, payload = self.encode(image, device_pixel_ratio)
+        log.debug("Upload payload: %d -> %d bytes (%s, %dx%d)", payload["original_bytes"],
+                  payload["encoded_bytes"], payload["mime"], *payload["size"])
+
+        if progress:
+            progress("uploading")
+        if on_text:
+            return ExtractionResult(self.stream([image_url], on_text), None, payload)
+        return ExtractionResult(self.complete([image_url]), None, payload)
+
+    def extract_batch(self, encoded):
+        """Extract several pre-encoded captures with a single request.
+
+        ``encoded`` is a list of (image_url, payload) pairs from encode().
+        Returns one ExtractionResult per capture; captures whose section is
+        missing from the response are retried on their own.
+        """
+        if len(encoded) == 1:
+            image_url, payload = encoded[0]
+            return [ExtractionResult(self.complete([image_url]), None, payload)]
+
+        text = self.complete([image_url for image_url, _ in encoded])
+        sections = split_sections(text, len(encoded))
+        results = []
+        for number, (image_url, payload) in enumerate(encoded, start=1):
+            if number in sections:
+                results.append(ExtractionResult(sections[number], None, payload))
+            else:
+                log.warning("Batched response had no section for image %d, retrying alone", number)
+                results.append(ExtractionResult(self.complete([image_url]), None, payload))
+        return results
+
+    def complete(self, image_urls):
+        """Send one chat completion for one or more images, return its text"""
+        with span("network"):
+            response = self.clients.call(
+                self.client.chat.completions.create,
+                model=self.model,
+                messages=self.messages(image_urls),
+                max_tokens=self.max_tokens * len(image_urls)
+            )
+        return response.choices[0].message.content
+
+    def stream(self, image_urls, on_text):
+        """Like complete(), but hands each piece of text to on_text as it arrives"""
+        pieces = []
+        # Until the last piece has arrived; on_text's own work is included
+        with span("network"):
+            # Only opening the stream is retried; a duplicate stream can't be merged
+            response = self.clients.call(
+                self.client.chat.completions.create,
+                hedge=False,
+                model=self.model,
+                messages=self.messages(image_urls),
+                max_tokens=self.max_tokens * len(image_urls),
+                stream=True
+            )
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                piece = chunk.choices[0].delta.content
+                if piece:
+                    pieces.append(piece)
+                    on_text(piece)
+        return "".join(pieces)
+
+    def prewarm(self):
+        self.clients.prewarm()
+
+    def messages(self, image_urls):
+        if len(image_urls) == 1:
+            content = [{"type": "text", "text": PROMPT}]
+        else:
+            content = [{"type": "text", "text": BATCH_PROMPT.format(count=len(image_urls))}]
+        for number, image_url in enumerate(image_urls, start=1):
+            if len(image_urls) > 1:
+                content.append({"type": "text", "text": f"IMAGE {number}"})
+            content.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": image_url
+                }
+            })
+        return [
+            {
+                "role": "user",
+                "content": content
+            }
+        ]
+
+
+class TesseractBackend(ExtractionBackend):
+    """Local extraction with Tesseract, no network involved.
+
+    Tuned for screen text: the capture is converted to dark-on-light
+    grayscale, upscaled so small UI fonts reach a size Tesseract reads
+    reliably, binarized with Otsu and recognised with a numeric whitelist.
+    """
+    name = "tesseract"
+
+    def __init__(self, tesseract_cmd=None, whitelist="0123456789:.,-/%$",
+                 psm=6, upscale=2.0, max_upscale_pixels=2_000_000):
+        import pytesseract
+        self.pytesseract = pytesseract
+        if tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        self.upscale = upscale
+        self.max_upscale_pixels = max_upscale_pixels
+        # Skipping the dictionaries saves most of Tesseract's start-up time
+        # and they only hurt on numbers anyway
+        self.config = (
+            f"--oem 1 --psm {psm} "
+            f"-c tessedit_char_whitelist={whitelist} "
+            "-c load_system_dawg=0 -c load_freq_dawg=0"
+        )
+
+    def prepare(self, image):
+        """Grayscale, dark-on-light, upscaled and binarized copy of the capture"""
+        gray = cv2.cvtColor(to_bgr(image), cv2.COLOR_BGR2GRAY)
+        # Dark themes: Tesseract wants dark text on a light background
+        if gray.mean() < 128:
+            gray = cv2.bitwise_not(gray)
+        if self.upscale > 1 and gray.size * self.upscale ** 2 <= self.max_upscale_pixels:
+            gray = cv2.resize(gray, None, fx=self.upscale, fy=self.upscale,
+                              interpolation=cv2.INTER_CUBIC)
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return binary
+
+    def extract(self, image, progress=None, device_pixel_ratio=1.0, on_text=None):
+        if progress:
+            progress("recognizing")
+        with span("ocr"):
+            data = self.pytesseract.image_to_data(
+                self.prepare(image),
+                config=self.config,
+                output_type=self.pytesseract.Output.DICT
+            )
+
+        # Rebuild the text line by line, collecting word confidences
+        lines = {}
+        confidences = []
+        for i, word in enumerate(data["text"]):
+            word = word.strip()
+            if not word:
+                continue
+            line_key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(line_key, []).append(word)
+            conf = float(data["conf"][i])
+            if conf >= 0:
+                confidences.append(conf)
+
+        text = "\n".join(" ".join(words) for _, words in sorted(lines.items()))
+        confidence = sum(confidences) / len(confidences) / 100 if confidences else 0.0
+        if on_text:
+            on_text(text)
+        return ExtractionResult(text, confidence)
+
+
+BACKENDS = {
+    OpenAIBackend.name: OpenAIBackend,
+    TesseractBackend.name: TesseractBackend,
+}
+
+
+def create_backend(name, settings=None):
+    """Instantiate a backend by name with its section from settings.json"""
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown extraction backend: {name}")
+    return backend_class(**(settings or {}))
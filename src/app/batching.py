@@ -0,0 +1,120 @@
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+import threading
+import time
+
+from .log import get_logger
+
+log = get_logger(__name__)
+
+
+class BatchExtractor:
+    """Groups concurrent extractions into multi-image requests.
+
+    Wraps a backend that implements ``encode`` and ``extract_batch`` and
+    exposes the plain ``extract`` interface. Each caller encodes its own
+    capture on its own thread, then waits while a dispatcher thread
+    collects everything that arrives within ``window_ms`` of the first
+    capture (or until ``max_size`` are waiting) and sends them as a single
+    request. The window only stays open while another capture is still
+    being encoded; a capture that's alone is sent right away. While
+    waiting, ``is_cancelled`` is polled and ``cancelled`` (an exception
+    type) raised when it returns True, as in SingleFlight.
+    """
+
+    def __init__(self, backend, window_ms=75, max_size=4, max_in_flight=4,
+                 cancelled=RuntimeError):
+        self.backend = backend
+        self.window = window_ms / 1000
+        self.max_size = max(1, max_size)
+        self.cancelled = cancelled
+        self.counters = {"captures": 0, "requests": 0, "cancelled": 0}
+
+        self._pending = []  # [(image_url, payload, future)]
+        self._encoding = 0  # Callers that will queue a capture soon
+        self._cond = threading.Condition()
+        self._senders = ThreadPoolExecutor(max_workers=max_in_flight,
+                                           thread_name_prefix="batch-send")
+        self._dispatcher = threading.Thread(target=self._dispatch, name="batch-dispatch",
+                                            daemon=True)
+        self._dispatcher.start()
+
+    @property
+    def name(self):
+        return self.backend.name
+
+    @staticmethod
+    def supports(backend):
+        return hasattr(backend, "extract_batch") and hasattr(backend, "encode")
+
+    def extract(self, image, progress=None, device_pixel_ratio=1.0, on_text=None,
+                is_cancelled=None):
+        with self._cond:
+            self._encoding += 1
+        entry = None
+        try:
+            if progress:
+                progress("encoding")
+            image_url, payload = self.backend.encode(image, device_pixel_ratio)
+
+            if progress:
+                progress("uploading")
+            entry = (image_url, payload, Future())
+            with self._cond:
+                self._pending.append(entry)
+        finally:
+            with self._cond:
+                self._encoding -= 1
+                self._cond.notify_all()
+
+        future = entry[2]
+        while not future.done():
+            if is_cancelled and is_cancelled():
+                with self._cond:
+                    # Not sent yet: it doesn't have to be
+                    if entry in self._pending:
+                        self._pending.remove(entry)
+                    self.counters["cancelled"] += 1
+                raise self.cancelled()
+            wait([future], timeout=0.1)
+        result = future.result()
+        if on_text:
+            on_text(result.text)
+        return result
+
+    def stats(self):
+        with self._cond:
+            return dict(self.counters)
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # Hold the window open for captures still being encoded to join
+                deadline = time.monotonic() + self.window
+                while self._encoding and len(self._pending) < self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_size]
+                del self._pending[:self.max_size]
+                if not batch:
+                    continue  # Cancelled while the window was open
+                self.counters["captures"] += len(batch)
+                self.counters["requests"] += 1
+            self._senders.submit(self._send, batch)
+
+    def _send(self, batch):
+        try:
+            results = self.backend.extract_batch(
+                [(image_url, payload) for image_url, payload, _ in batch]
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        if len(batch) > 1:
+            log.debug("Sent %d captures in one request", len(batch))
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
@@ -0,0 +1,294 @@
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+# digest: exact hash of the pixels, trimmed: hash of the pixels without
+# their uniform margin (what a slightly different selection of the same
+# area still has in common), size: (width, height) of the capture
+CacheKey = namedtuple("CacheKey", ["digest", "trimmed", "size"])
+
+DEFAULT_CACHE_DIR = Path.home() / ".snaplytics"
+
+# Bumped when the entries table changes; older tables are dropped, it's a cache
+SCHEMA_VERSION = 3
+
+
+def _background(arr):
+    """The most common of the four corner pixels"""
+    corners = [tuple(np.atleast_1d(arr[y, x]).tolist()) for y in (0, -1) for x in (0, -1)]
+    return max(corners, key=corners.count)
+
+
+class ExtractionCache:
+    """Two-tier cache of extraction results keyed on capture pixels.
+
+    Lookups try an exact content hash first, then the hash of the capture
+    trimmed to its content, so a selection that's off by a pixel or two in
+    the margin around the text still hits. Both are exact: "2:15" never
+    matches a cached "2:16". Entries live in an in-memory LRU bounded by
+    count and bytes and in a SQLite file that survives restarts. Every
+    lookup is a dict or an indexed query, so the lock is held briefly;
+    safe to use from several worker threads.
+
+    ``scope`` describes whatever besides the pixels decides the results
+    (backend, model, preprocessing); entries stored under another scope
+    are never returned.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=7 * 24 * 3600,
+                 directory=None, max_disk_entries=5000, near_matches=True,
+                 max_bytes=16 * 1024 * 1024, persistent=True, scope=""):
+        self.scope = hashlib.blake2b(scope.encode(), digest_size=8).hexdigest()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.near_matches = near_matches
+
+        self._memory = OrderedDict()  # digest -> (trimmed, created, results, nbytes)
+        self._by_trimmed = {}  # trimmed -> digest of the newest entry with it
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {
+            "hits": 0,
+            "near_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+        }
+
+        self._db = None
+        if persistent:
+            directory = Path(directory) if directory else DEFAULT_CACHE_DIR
+            directory.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(
+                str(directory / "extraction_cache.sqlite3"),
+                check_same_thread=False
+            )
+            if self._db.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                # Entries keyed on full-size thumbnails or on pixels alone
+                self._db.execute("DROP TABLE IF EXISTS entries")
+                self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS entries (
+                    digest TEXT PRIMARY KEY,
+                    trimmed TEXT NOT NULL,
+                    width INTEGER NOT NULL,
+                    height INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL,
+                    results TEXT NOT NULL
+                )"""
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS entries_trimmed ON entries (trimmed)"
+            )
+            self._db.commit()
+            self._purge_expired()
+
+    @classmethod
+    def from_settings(cls, settings, scope=""):
+        """Build a cache from the "cache" section of settings.json"""
+        settings = settings or {}
+        if not settings.get("enabled", True):
+            return None
+        return cls(
+            max_entries=settings.get("max_entries", 256),
+            max_bytes=settings.get("max_bytes", 16 * 1024 * 1024),
+            ttl_seconds=settings.get("ttl_seconds", 7 * 24 * 3600),
+            directory=settings.get("directory"),
+            max_disk_entries=settings.get("max_disk_entries", 5000),
+            # near_distance was the perceptual hash distance, 0 turned near matches off
+            near_matches=settings.get("near_matches", settings.get("near_distance", 4) > 0),
+            persistent=settings.get("persistent", True),
+            scope=scope,
+        )
+
+    @staticmethod
+    def content_key(arr):
+        """Exact hash of an (H, W, C) uint8 pixel buffer"""
+        arr = np.ascontiguousarray(arr)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr(arr.shape).encode())
+        digest.update(arr.data)
+        return digest.hexdigest()
+
+    @classmethod
+    def trimmed_key(cls, arr):
+        """Exact hash of arr cropped to where it differs from its background
+        (the corner color); the same for any selection of the same content
+        that only moves within a plain margin"""
+        arr = np.asarray(arr)
+        background = _background(arr)
+        if arr.ndim == 2:
+            ink = arr != background[0]
+        else:
+            # A channel at a time: much faster than any() over the last axis
+            ink = arr[..., 0] != background[0]
+            for channel in range(1, arr.shape[2]):
+                ink |= arr[..., channel] != background[channel]
+        rows = np.flatnonzero(ink.any(axis=1))
+        if rows.size == 0:
+            # Blank: the same whatever its size
+            return cls.content_key(np.asarray([background], dtype=arr.dtype))
+        columns = np.flatnonzero(ink.any(axis=0))
+        return cls.content_key(arr[rows[0]:rows[-1] + 1, columns[0]:columns[-1] + 1])
+
+    @classmethod
+    def make_key(cls, arr):
+        # No state involved, so worker processes can compute keys too
+        return CacheKey(
+            cls.content_key(arr),
+            cls.trimmed_key(arr),
+            (arr.shape[1], arr.shape[0])
+        )
+
+    def get(self, key):
+        """Return a copy of the cached results for key, or None"""
+        key = self._scoped(key)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key.digest)
+            if entry and not self._expired(entry[1], now):
+                self._memory.move_to_end(key.digest)
+                self.counters["hits"] += 1
+                return copy.deepcopy(entry[2])
+
+            digest = self._by_trimmed.get(key.trimmed) if self.near_matches else None
+            entry = self._memory.get(digest) if digest else None
+            if entry and not self._expired(entry[1], now):
+                self._memory.move_to_end(digest)
+                self.counters["near_hits"] += 1
+                return copy.deepcopy(entry[2])
+
+            results = self._load_from_disk(key, now)
+            if results is not None:
+                self.counters["disk_hits"] += 1
+                return copy.deepcopy(results)
+
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, key, results):
+        key = self._scoped(key)
+        now = time.time()
+        payload = json.dumps(results)
+        results = copy.deepcopy(results)
+        with self._lock:
+            self._remember(key.digest, key.trimmed, now, results, len(payload))
+            if self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key.digest, key.trimmed, key.size[0], key.size[1], now, now, payload)
+                )
+                self._db.commit()
+                self._trim_disk()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._by_trimmed.clear()
+            self._bytes = 0
+            if self._db:
+                self._db.execute("DELETE FROM entries")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._bytes
+            if self._db:
+                stats["disk_entries"] = self._db.execute(
+                    "SELECT COUNT(*) FROM entries"
+                ).fetchone()[0]
+        lookups = stats["hits"] + stats["near_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (lookups - stats["misses"]) / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            if self._db:
+                self._db.close()
+                self._db = None
+
+    def _scoped(self, key):
+        # Keys are made without a cache at hand (worker processes), the
+        # scope goes in here
+        return key._replace(digest=f"{self.scope}:{key.digest}",
+                            trimmed=f"{self.scope}:{key.trimmed}")
+
+    def _expired(self, created, now):
+        return self.ttl_seconds is not None and now - created > self.ttl_seconds
+
+    def _remember(self, digest, trimmed, created, results, nbytes):
+        old = self._memory.pop(digest, None)
+        if old:
+            self._bytes -= old[3]
+        self._memory[digest] = (trimmed, created, results, nbytes)
+        self._by_trimmed[trimmed] = digest
+        self._bytes += nbytes
+        while len(self._memory) > self.max_entries or (
+                self._bytes > self.max_bytes and len(self._memory) > 1):
+            evicted, (trimmed, _, _, nbytes) = self._memory.popitem(last=False)
+            self._bytes -= nbytes
+            if self._by_trimmed.get(trimmed) == evicted:
+                del self._by_trimmed[trimmed]
+            self.counters["evictions"] += 1
+
+    def _load_from_disk(self, key, now):
+        if not self._db:
+            return None
+        oldest = now - self.ttl_seconds if self.ttl_seconds is not None else 0
+        if self.near_matches:
+            # An exact match wins over a trimmed one
+            row = self._db.execute(
+                "SELECT digest, trimmed, created, results FROM entries "
+                "WHERE (digest = ? OR trimmed = ?) AND created >= ? "
+                "ORDER BY digest = ? DESC, accessed DESC LIMIT 1",
+                (key.digest, key.trimmed, oldest, key.digest)
+            ).fetchone()
+        else:
+            row = self._db.execute(
+                "SELECT digest, trimmed, created, results FROM entries "
+                "WHERE digest = ? AND created >= ?",
+                (key.digest, oldest)
+            ).fetchone()
+        if row is None:
+            return None
+
+        digest, trimmed, created, payload = row
+        results = json.loads(payload)
+        self._db.execute("UPDATE entries SET accessed = ? WHERE digest = ?", (now, digest))
+        self._db.commit()
+        # Promote into the memory tier
+        self._remember(digest, trimmed, created, results, len(payload))
+        return results
+
+    def _trim_disk(self):
+        count = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        excess = count - self.max_disk_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM entries WHERE digest IN "
+                "(SELECT digest FROM entries ORDER BY accessed LIMIT ?)",
+                (excess,)
+            )
+            self._db.commit()
+            self.counters["evictions"] += excess
+
+    def _purge_expired(self):
+        if self.ttl_seconds is None:
+            return
+        self._db.execute(
+            "DELETE FROM entries WHERE created < ?",
+            (time.time() - self.ttl_seconds,)
+        )
+        self._db.commit()
@@ -0,0 +1,207 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import os
+import random
+import threading
+import time
+
+from .log import get_logger
+
+log = get_logger(__name__)
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class ClientManager:
+    """Process-wide OpenAI client shared by every ImageProcessor.
+
+    Owns one httpx connection pool with keep-alive so consecutive captures
+    reuse the same TLS connection, can pre-warm that connection before a
+    capture is ready, retries transient failures with jittered exponential
+    backoff and, optionally, hedges slow requests with a duplicate once they
+    run past the recent p95 latency.
+
+    Point ``base_url`` (or OPENAI_BASE_URL) at a local stand-in server to
+    exercise all of this without the real API.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, api_key=None, base_url=None, timeout=60.0,
+                 max_connections=16, keepalive_seconds=120.0, max_retries=3,
+                 backoff_base=0.5, backoff_max=8.0, hedge=False,
+                 hedge_percentile=95, hedge_min_samples=20, prewarm=True):
+        import httpx
+        from openai import OpenAI
+
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.prewarm_enabled = prewarm
+        self.keepalive_seconds = keepalive_seconds
+
+        self.http = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=keepalive_seconds
+            )
+        )
+        # Retries are handled here so they can be jittered and counted
+        self.client = OpenAI(
+            api_key=api_key or os.getenv('OPENAI_API_KEY'),
+            base_url=base_url,
+            http_client=self.http,
+            max_retries=0
+        )
+
+        self.latencies = deque(maxlen=200)  # Seconds, successful calls only
+        self.counters = {"calls": 0, "retries": 0, "hedged": 0, "hedge_wins": 0,
+                         "failures": 0, "prewarms": 0}
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        self._hedge_pool = ThreadPoolExecutor(max_workers=max_connections,
+                                              thread_name_prefix="api-hedge")
+
+    @classmethod
+    def configure(cls, settings=None):
+        """Create the shared manager from the "api" section of settings.json.
+
+        Only the first call creates it; later calls return the same manager.
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(**(settings or {}))
+            return cls._instance
+
+    @classmethod
+    def instance(cls):
+        return cls.configure()
+
+    def prewarm(self):
+        """Open (or refresh) a pooled connection in the background.
+
+        Called when the hotkey fires, so DNS, TCP and TLS setup overlap with
+        the user dragging out the selection. Cheap to call repeatedly.
+        """
+        if not self.prewarm_enabled:
+            return
+        with self._lock:
+            # A connection used recently is still alive in the pool
+            if time.monotonic() - self._last_used < self.keepalive_seconds / 2:
+                return
+            self._last_used = time.monotonic()
+        threading.Thread(target=self._prewarm, name="api-prewarm", daemon=True).start()
+
+    def _prewarm(self):
+        try:
+            # Any response will do, the point is the pooled connection
+            self.http.head(str(self.client.base_url), timeout=5.0)
+            self._count("prewarms")
+        except Exception as e:
+            log.warning("Connection pre-warm failed: %s", e)
+
+    def call(self, fn, *args, hedge=True, **kwargs):
+        """Call fn(*args, **kwargs) with retries and optional hedging"""
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                if hedge and self.hedge:
+                    result = self._hedged(fn, args, kwargs)
+                else:
+                    result = fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    self._count("failures")
+                    raise
+                attempt += 1
+                self._count("retries")
+                log.warning("API call failed (%s), retry %d in %.2fs", e, attempt, delay)
+                time.sleep(delay)
+                continue
+
+            with self._lock:
+                self.latencies.append(time.perf_counter() - start)
+                self.counters["calls"] += 1
+                self._last_used = time.monotonic()
+            return result
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def _count(self, name):
+        # From request, hedge and prewarm threads alike
+        with self._lock:
+            self.counters[name] += 1
+
+    def latency_percentile(self, percentile):
+        with self._lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def _hedged(self, fn, args, kwargs):
+        """Run fn, and race a duplicate against it once it passes p95"""
+        threshold = None
+        with self._lock:
+            enough = len(self.latencies) >= self.hedge_min_samples
+        if enough:
+            threshold = self.latency_percentile(self.hedge_percentile)
+
+        first = self._hedge_pool.submit(fn, *args, **kwargs)
+        if threshold is None:
+            return first.result()
+
+        done, _ = wait([first], timeout=threshold)
+        if done:
+            return first.result()
+
+        self._count("hedged")
+        second = self._hedge_pool.submit(fn, *args, **kwargs)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _retry_delay(self, error, attempt):
+        """Seconds to wait before retrying error, or None to give up"""
+        import openai
+
+        if attempt >= self.max_retries:
+            return None
+        if isinstance(error, openai.APIConnectionError):  # Includes timeouts
+            retry_after = None
+        elif isinstance(error, openai.APIStatusError) and error.status_code in RETRYABLE_STATUS:
+            retry_after = error.response.headers.get("retry-after")
+        else:
+            return None
+
+        # Full jitter: uniform in [0, min(max, base * 2^attempt)]
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.backoff_max))
+            except ValueError:
+                pass
+        return delay
+
+    def close(self):
+        self._hedge_pool.shutdown(wait=False)
+        self.http.close()
@@ -0,0 +1,142 @@
+import io
+import sys
+
+import numpy as np
+from PIL import Image
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage, QPainter, QPixmap
+
+Format = QImage.Format
+
+# Formats whose pixels can be viewed as RGB in place: format -> (bytes per
+# pixel, offset of the R byte, step between channels). 32-bit "xRGB"
+# formats are stored as native-endian uint32, so their byte order flips
+# with the platform.
+if sys.byteorder == "little":
+    _XRGB = (4, 2, -1)  # B G R A in memory
+    _XRGB_RAW = "BGRX"
+else:
+    _XRGB = (4, 1, 1)   # A R G B in memory
+    _XRGB_RAW = "XRGB"
+
+DIRECT_FORMATS = {
+    Format.Format_RGB888: (3, 0, 1),
+    Format.Format_BGR888: (3, 2, -1),
+    Format.Format_RGB32: _XRGB,
+    Format.Format_RGBX8888: (4, 0, 1),
+}
+
+# Formats with a real alpha channel: viewable in place only when fully opaque
+ALPHA_FORMATS = {
+    Format.Format_ARGB32: (_XRGB, 3 if sys.byteorder == "little" else 0),
+    Format.Format_ARGB32_Premultiplied: (_XRGB, 3 if sys.byteorder == "little" else 0),
+    Format.Format_RGBA8888: ((4, 0, 1), 3),
+    Format.Format_RGBA8888_Premultiplied: ((4, 0, 1), 3),
+}
+
+# PIL raw decoder modes that read the same layouts straight from the buffer
+RAW_MODES = {
+    Format.Format_RGB888: "RGB",
+    Format.Format_BGR888: "BGR",
+    Format.Format_RGB32: _XRGB_RAW,
+    Format.Format_RGBX8888: "RGBX",
+    Format.Format_ARGB32: _XRGB_RAW,
+    Format.Format_ARGB32_Premultiplied: _XRGB_RAW,
+    Format.Format_RGBA8888: "RGBX",
+    Format.Format_RGBA8888_Premultiplied: "RGBX",
+}
+
+
+class ImageArray(np.ndarray):
+    """ndarray view onto a QImage's pixels that keeps the QImage alive.
+
+    ``raw_mode`` is only set on the full-frame RGB view returned by
+    qimage_to_array; slices and other derived views don't inherit it.
+    """
+
+    def __array_finalize__(self, obj):
+        self.qimage = getattr(obj, "qimage", None)
+        self.raw_mode = None
+
+
+def _view(image, bytes_per_pixel, offset=0, channels=None, step=1):
+    """Read-only array over image's pixel buffer honouring bytesPerLine()"""
+    height, width = image.height(), image.width()
+    ptr = image.constBits()
+    ptr.setsize(image.sizeInBytes())
+    if channels is None:
+        shape = (height, width, bytes_per_pixel)
+        strides = (image.bytesPerLine(), bytes_per_pixel, 1)
+    else:
+        shape = (height, width, channels)
+        strides = (image.bytesPerLine(), bytes_per_pixel, step)
+    arr = np.ndarray(shape, np.uint8, buffer=ptr, offset=offset, strides=strides)
+    arr = arr.view(ImageArray)
+    arr.qimage = image
+    return arr
+
+
+def composite_on_white(image):
+    """The original conversion: paint image onto a white RGB888 canvas"""
+    canvas = QImage(image.width(), image.height(), Format.Format_RGB888)
+    canvas.fill(Qt.GlobalColor.white)
+    painter = QPainter(canvas)
+    painter.drawImage(0, 0, image)
+    painter.end()
+    return canvas
+
+
+def qimage_to_array(image):
+    """View a QImage (or QPixmap) as an (H, W, 3) uint8 RGB array.
+
+    Screen grabs come back in a format that can be viewed directly, in which
+    case no pixels are copied: the array's strides step over the row padding
+    and, for 32-bit formats, over the unused fourth byte. Other formats, and
+    images that are actually translucent, are composited onto white first.
+    The array is read-only and keeps the QImage alive.
+    """
+    if isinstance(image, QPixmap):
+        image = image.toImage()
+    if image.isNull():
+        return np.zeros((0, 0, 3), np.uint8)
+
+    fmt = image.format()
+    if fmt not in DIRECT_FORMATS:
+        alpha_layout = ALPHA_FORMATS.get(fmt)
+        if alpha_layout is None or _view(image, alpha_layout[0][0])[..., alpha_layout[1]].min() < 255:
+            image = composite_on_white(image)
+            fmt = image.format()
+
+    bpp, offset, step = DIRECT_FORMATS.get(fmt) or ALPHA_FORMATS[fmt][0]
+    arr = _view(image, bpp, offset, 3, step)
+    arr.raw_mode = RAW_MODES[fmt]
+    return arr
+
+
+def to_bgr(arr):
+    """BGR view of an RGB array for OpenCV, without copying"""
+    return arr[..., ::-1]
+
+
+def to_pil(arr):
+    """PIL image for an RGB array, decoding QImage views in place"""
+    raw_mode = getattr(arr, "raw_mode", None)
+    if raw_mode:
+        image = arr.qimage
+        ptr = image.constBits()
+        ptr.setsize(image.sizeInBytes())
+        pil_image = Image.frombuffer(
+            "RGB", (image.width(), image.height()), ptr, "raw", raw_mode,
+            image.bytesPerLine(), 1
+        )
+        # Pillow maps RGBX buffers in place as mode "RGBX"
+        return pil_image if pil_image.mode == "RGB" else pil_image.convert("RGB")
+    return Image.fromarray(np.ascontiguousarray(arr))
+
+
+def encode_png(arr, compress_level=6):
+    """PNG-encode an RGB array (any strides)"""
+    buffer = io.BytesIO()
+    to_pil(arr).save(buffer, format="PNG", compress_level=compress_level)
+    return buffer.getvalue()
+
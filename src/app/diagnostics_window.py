@@ -0,0 +1,82 @@
+from PyQt6.QtWidgets import (
+    QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+    QLabel, QPushButton
+)
+from PyQt6.QtCore import QTimer
+from .instrumentation import PERCENTILES
+
+
+class DiagnosticsWindow(QMainWindow):
+    """Stage timings and memory peaks of recent captures, refreshed live"""
+
+    def __init__(self, metrics):
+        super().__init__()
+        self.metrics = metrics
+        self.setWindowTitle("Snaplytics Diagnostics")
+        self.setMinimumSize(720, 420)
+
+        main_widget = QWidget()
+        self.setCentralWidget(main_widget)
+        layout = QVBoxLayout(main_widget)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(2 + 2 * len(PERCENTILES))
+        self.table.setHorizontalHeaderLabels(
+            ["Stage", "Count"]
+            + [f"p{p} ms" for p in PERCENTILES]
+            + [f"p{p} peak KB" for p in PERCENTILES]
+        )
+        layout.addWidget(self.table)
+
+        self.counters = QLabel()
+        self.counters.setWordWrap(True)
+        layout.addWidget(self.counters)
+
+        # Where the same numbers can be read from outside the app
+        exports = []
+        if metrics.export_seconds:
+            exports.append(f"Written to {metrics.metrics_file}")
+        if metrics.prometheus_port:
+            exports.append(f"Served at http://127.0.0.1:{metrics.prometheus_port}/metrics")
+        footer = QHBoxLayout()
+        footer.addWidget(QLabel(", ".join(exports) or "Not exported"))
+        footer.addStretch()
+        refresh = QPushButton("Refresh")
+        refresh.clicked.connect(self.refresh)
+        footer.addWidget(refresh)
+        layout.addLayout(footer)
+
+        if not metrics.enabled:
+            self.counters.setText('Diagnostics are off ("diagnostics": {"enabled": false})')
+
+        self.refresh()
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(2000)
+
+    def refresh(self):
+        summary = self.metrics.summary()
+        spans = summary["spans"]
+        self.table.setRowCount(len(spans))
+        for row, (name, span) in enumerate(spans.items()):
+            values = [name, str(span["count"])]
+            values += [f"{span[f'p{p}_ms']:.1f}" if f"p{p}_ms" in span else ""
+                       for p in PERCENTILES]
+            values += [f"{span[f'p{p}_peak_bytes'] / 1024:.0f}"
+                       if f"p{p}_peak_bytes" in span else "" for p in PERCENTILES]
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+        self.table.resizeColumnsToContents()
+
+        if self.metrics.enabled:
+            self.counters.setText("\n".join(
+                f"{source}: " + ", ".join(f"{key} {self.format_value(value)}"
+                                          for key, value in counters.items())
+                for source, counters in summary["counters"].items()
+            ))
+
+    @staticmethod
+    def format_value(value):
+        if isinstance(value, float):
+            return f"{value:.2f}"
+        return str(value)
@@ -0,0 +1,88 @@
+from PyQt6.QtCore import QRect, QRectF
+from PyQt6.QtGui import QGuiApplication, QImage, QPainter
+
+from .conversion import qimage_to_array
+
+
+class FrozenFrame:
+    """Every screen, grabbed once into one image of the whole virtual desktop.
+
+    The capture overlay shows it as its background, so what is selected is
+    exactly what was on screen when the hotkey was pressed, and selections
+    are cut out of it as array views: no second grab, no pixel copies, and
+    no clipping at monitor edges. ``ratio`` is the image's device pixels
+    per logical pixel (the highest of the screens; lower-density screens
+    are scaled up to it).
+    """
+
+    def __init__(self, image, geometry, ratio):
+        self.image = image  # QImage, device pixels
+        self.geometry = geometry  # Virtual desktop, logical coordinates
+        self.ratio = ratio
+        self.array = qimage_to_array(image)
+
+    @classmethod
+    def grab(cls, screens=None):
+        """Grab all screens, or None if the platform returns nothing"""
+        screens = screens or QGuiApplication.screens()
+        geometry = QRect()
+        for screen in screens:
+            geometry = geometry.united(screen.geometry())
+        grabs = [(screen, screen.grabWindow(0)) for screen in screens]
+        if not grabs or any(pixmap.isNull() for _, pixmap in grabs):
+            return None
+        ratio = max(pixmap.devicePixelRatio() for _, pixmap in grabs)
+
+        if len(grabs) == 1:
+            # One screen is already the whole frame
+            image = grabs[0][1].toImage()
+        else:
+            image = QImage(round(geometry.width() * ratio), round(geometry.height() * ratio),
+                           QImage.Format.Format_RGB32)
+            image.fill(0)
+            painter = QPainter(image)
+            for screen, pixmap in grabs:
+                target = screen.geometry().translated(-geometry.topLeft())
+                painter.drawPixmap(QRectF(target.x() * ratio, target.y() * ratio,
+                                          target.width() * ratio, target.height() * ratio),
+                                   pixmap, QRectF(pixmap.rect()))
+            painter.end()
+        image.setDevicePixelRatio(ratio)
+        return cls(image, geometry, ratio)
+
+    def pixel_rect(self, rect):
+        """Device-pixel box (x0, y0, x1, y1) of a rect in overlay coordinates"""
+        x0 = max(0, round(rect.left() * self.ratio))
+        y0 = max(0, round(rect.top() * self.ratio))
+        x1 = min(self.array.shape[1], round((rect.left() + rect.width()) * self.ratio))
+        y1 = min(self.array.shape[0], round((rect.top() + rect.height()) * self.ratio))
+        return x0, y0, x1, y1
+
+    def crop(self, rect):
+        """(H, W, 3) RGB view of rect (overlay coordinates), sharing the frame's pixels"""
+        x0, y0, x1, y1 = self.pixel_rect(rect)
+        return self.array[y0:y1, x0:x1]
+
+
+def grab_rect(rect):
+    """Grab a desktop rect (logical coordinates) as (RGB array, device pixel
+    ratio), or None when it's off the desktop or nothing could be grabbed.
+
+    Only the rect itself is grabbed when it lies on one screen; one that
+    spans screens is cut from a frame of just those screens.
+    """
+    screens = [screen for screen in QGuiApplication.screens()
+               if screen.geometry().intersects(rect)]
+    if not screens:
+        return None
+    if len(screens) == 1 and screens[0].geometry().contains(rect):
+        local = rect.translated(-screens[0].geometry().topLeft())
+        pixmap = screens[0].grabWindow(0, local.x(), local.y(), local.width(), local.height())
+        if pixmap.isNull():
+            return None
+        return qimage_to_array(pixmap.toImage()), pixmap.devicePixelRatio()
+    frame = FrozenFrame.grab(screens)
+    if frame is None:
+        return None
+    image = frame.crop(rect.translated(-frame.geometry.topLeft()))
+    return (image, frame.ratio) if image.size else None
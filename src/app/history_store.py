@@ -0,0 +1,246 @@
+from pathlib import Path
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from .log import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_HISTORY_FILE = Path.home() / ".snaplytics" / "history.sqlite3"
+
+# Sort orders offered to the history window; both are indexed
+ORDERS = {"time": "timestamp", "total": "total"}
+
+# Retention runs on open and then at most this often
+PURGE_SECONDS = 3600
+
+
+class HistoryStore:
+    """Every capture's results, kept in SQLite across restarts.
+
+    ``add()`` only queues the entry: a writer thread commits what has
+    queued up in one transaction every ``flush_seconds``, so a capture
+    never waits on the disk. The file is in WAL mode, so the history
+    window reads pages while the writer appends. Entries older than
+    ``retention_days``, or beyond the newest ``max_entries``, are deleted.
+    Thumbnails are small PNGs of the capture, made on the writer thread.
+    """
+
+    def __init__(self, path=None, persistent=True, retention_days=365, max_entries=100_000,
+                 flush_seconds=1.0, thumbnails=True, thumbnail_height=32):
+        self.retention_days = retention_days
+        self.max_entries = max_entries
+        self.flush_seconds = flush_seconds
+        self.thumbnails = thumbnails
+        self.thumbnail_height = thumbnail_height
+        self.counters = {"added": 0, "written": 0, "commits": 0, "purged": 0}
+
+        if persistent:
+            path = Path(path) if path else DEFAULT_HISTORY_FILE
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.uri, uri = str(path), False
+        else:
+            # Shared between this store's connections, gone on exit
+            self.uri, uri = f"file:snaplytics-history-{id(self)}?mode=memory&cache=shared", True
+        # One connection for the writer thread, one for reads on the GUI thread
+        self._writer = sqlite3.connect(self.uri, uri=uri, check_same_thread=False)
+        if persistent:
+            self._writer.execute("PRAGMA journal_mode=WAL")
+            # Durable at checkpoints rather than at every commit
+            self._writer.execute("PRAGMA synchronous=NORMAL")
+        self._writer.execute(
+            """CREATE TABLE IF NOT EXISTS captures (
+                id INTEGER PRIMARY KEY,
+                timestamp REAL NOT NULL,
+                total REAL NOT NULL,
+                count INTEGER NOT NULL,
+                backend TEXT,
+                source TEXT NOT NULL,
+                results TEXT NOT NULL,
+                thumbnail BLOB
+            )"""
+        )
+        self._writer.execute("CREATE INDEX IF NOT EXISTS captures_time ON captures (timestamp)")
+        self._writer.execute("CREATE INDEX IF NOT EXISTS captures_total ON captures (total)")
+        self._writer.commit()
+        self._reader = sqlite3.connect(self.uri, uri=uri, check_same_thread=False)
+        self._read_lock = threading.Lock()
+        # WAL lets reads run alongside a write; a shared memory database doesn't
+        self._write_lock = threading.Lock() if persistent else self._read_lock
+
+        self._pending = []  # (timestamp, source, results, image) not taken by the writer yet
+        self._unwritten = 0  # Added but not committed (or failed) yet
+        self._flushing = False
+        self._lock = threading.Condition()
+        self._closed = False
+        self._latest = None
+        self._last_purge = 0.0
+        self._thread = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_settings(cls, settings=None):
+        """Build the store from the "history" section of settings.json.
+
+        With ``enabled`` false, or when the file can't be opened, history
+        is kept in memory for this session only.
+        """
+        settings = dict(settings or {})
+        if not settings.pop("enabled", True):
+            settings["persistent"] = False
+        try:
+            return cls(**settings)
+        except (OSError, sqlite3.Error) as e:
+            log.warning("History file unavailable, keeping history in memory: %s", e)
+            settings["persistent"] = False
+            settings.pop("path", None)
+            return cls(**settings)
+
+    def add(self, results, source="capture", image=None, timestamp=None):
+        """Queue a capture's results for writing; image (RGB array or QImage)
+        becomes the thumbnail"""
+        entry = (timestamp or time.time(), source, results, image if self.thumbnails else None)
+        with self._lock:
+            self._pending.append(entry)
+            self._latest = entry
+            self._unwritten += 1
+            self.counters["added"] += 1
+            self._lock.notify()
+
+    def flush(self):
+        """Wait until everything added so far is on disk"""
+        with self._lock:
+            self._flushing = True
+            self._lock.notify_all()
+            while self._unwritten and not self._closed:
+                self._lock.wait()
+            self._flushing = False
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._lock.notify_all()
+        self._thread.join()
+        self._reader.close()
+
+    def count(self):
+        with self._read_lock:
+            return self._reader.execute("SELECT COUNT(*) FROM captures").fetchone()[0]
+
+    def page(self, offset=0, limit=200, order="time", descending=True):
+        """Entries offset..offset+limit in the given order ("time" or
+        "total"), as dicts with id, timestamp (ISO), source, results and
+        thumbnail (PNG bytes or None)"""
+        column = ORDERS[order]
+        direction = "DESC" if descending else "ASC"
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT id, timestamp, source, results, thumbnail FROM captures "
+                f"ORDER BY {column} {direction}, id {direction} LIMIT ? OFFSET ?",
+                (limit, offset)
+            ).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def latest(self):
+        """The newest entry, written or not, or None"""
+        if self._latest:
+            timestamp, source, results, _ = self._latest
+            return {"id": None, "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+                    "source": source, "results": results, "thumbnail": None}
+        entries = self.page(limit=1)
+        return entries[0] if entries else None
+
+    @staticmethod
+    def _entry(row):
+        entry_id, timestamp, source, results, thumbnail = row
+        return {"id": entry_id, "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+                "source": source, "results": json.loads(results), "thumbnail": thumbnail}
+
+    def _write_loop(self):
+        self._purge()
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._lock.wait(PURGE_SECONDS)
+                    if time.monotonic() - self._last_purge > PURGE_SECONDS:
+                        break
+                # Let captures that arrive close together share a commit
+                deadline = time.monotonic() + self.flush_seconds
+                while self._pending and not (self._closed or self._flushing):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._lock.wait(remaining)
+                batch, self._pending = self._pending, []
+                closed = self._closed
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception:
+                    log.exception("Writing %d history entries failed", len(batch))
+            if time.monotonic() - self._last_purge > PURGE_SECONDS:
+                self._purge()
+            with self._lock:
+                self._unwritten -= len(batch)
+                self._lock.notify_all()
+            if closed:
+                self._writer.close()
+                return
+
+    def _write(self, batch):
+        rows = []
+        for timestamp, source, results, image in batch:
+            rows.append((timestamp, results.get("total", 0), results.get("count", 0),
+                         results.get("backend"), source, json.dumps(results, default=str),
+                         self._thumbnail(image)))
+        with self._write_lock, self._writer:
+            self._writer.executemany(
+                "INSERT INTO captures (timestamp, total, count, backend, source, results, thumbnail) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        self.counters["written"] += len(rows)
+        self.counters["commits"] += 1
+
+    def _thumbnail(self, image):
+        if image is None:
+            return None
+        try:
+            import cv2
+            from .conversion import qimage_to_array, to_bgr
+
+            array = image if hasattr(image, "shape") else qimage_to_array(image)
+            if array.size == 0:
+                return None
+            height = min(self.thumbnail_height, array.shape[0])
+            width = max(1, round(array.shape[1] * height / array.shape[0]))
+            small = cv2.resize(to_bgr(array), (width, height), interpolation=cv2.INTER_AREA)
+            return cv2.imencode(".png", small)[1].tobytes()
+        except Exception as e:
+            log.debug("No thumbnail: %s", e)
+            return None
+
+    def _purge(self):
+        self._last_purge = time.monotonic()
+        deleted = 0
+        with self._write_lock, self._writer:
+            if self.retention_days:
+                deleted += self._writer.execute(
+                    "DELETE FROM captures WHERE timestamp < ?",
+                    (time.time() - self.retention_days * 86400,)
+                ).rowcount
+            if self.max_entries:
+                deleted += self._writer.execute(
+                    "DELETE FROM captures WHERE id IN (SELECT id FROM captures "
+                    "ORDER BY timestamp DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                ).rowcount
+        if deleted:
+            self.counters["purged"] += deleted
+            log.info("Deleted %d history entries past retention", deleted)
@@ -1,10 +1,26 @@
-from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem
+from PyQt6.QtWidgets import (
+    QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+    QPushButton, QLabel, QComboBox
+)
+from PyQt6.QtCore import QSize
 from datetime import datetime
-from PyQt6.QtGui import QColor
+import json
+from PyQt6.QtGui import QColor, QIcon, QPixmap
+from .stats import compute_bulk, format_minutes
+
+# (label, order, descending) choices of the sort box
+SORTS = [("Newest first", "time", True), ("Oldest first", "time", False),
+         ("Largest total first", "total", True), ("Smallest total first", "total", False)]
 
 class HistoryWindow(QMainWindow):
-    def __init__(self, history, highlight_results=None):
+    """One page of the history store at a time, however long the history is"""
+    def __init__(self, store, highlight_results=None, page_size=200):
         super().__init__()
+        self.store = store
+        self.page_size = page_size
+        self.offset = 0
+        # Stored results went through JSON, compare like with like
+        self.highlight = json.loads(json.dumps(highlight_results, default=str)) if highlight_results else None
         self.setWindowTitle("Snap History")
         self.setMinimumSize(600, 400)
         
@@ -30,37 +46,90 @@ class HistoryWindow(QMainWindow):
         self.setCentralWidget(main_widget)
         layout = QVBoxLayout(main_widget)
         
+        # Sorting and paging
+        controls = QHBoxLayout()
+        self.sort_box = QComboBox()
+        self.sort_box.addItems([label for label, _, _ in SORTS])
+        self.sort_box.currentIndexChanged.connect(lambda: self.show_page(0))
+        self.previous_button = QPushButton("< Previous")
+        self.previous_button.clicked.connect(lambda: self.show_page(self.offset - self.page_size))
+        self.next_button = QPushButton("Next >")
+        self.next_button.clicked.connect(lambda: self.show_page(self.offset + self.page_size))
+        self.page_label = QLabel()
+        controls.addWidget(self.sort_box)
+        controls.addStretch()
+        controls.addWidget(self.page_label)
+        controls.addWidget(self.previous_button)
+        controls.addWidget(self.next_button)
+        layout.addLayout(controls)
+        
         # Create table
         self.table = QTableWidget()
-        self.table.setColumnCount(5)
+        self.table.setColumnCount(9)
         self.table.setHorizontalHeaderLabels([
-            "Time", "Duration", "Total Minutes", "Count", "Details"
+            "Time", "Duration", "Total Minutes", "Count",
+            "Median", "Min - Max", "Std Dev", "Backend", "Details"
         ])
         
-        # Populate table
-        self.populate_history(history, highlight_results)
+        self.table.setIconSize(QSize(96, 24))
         
         layout.addWidget(self.table)
         
+        # Captures still queued for writing show up too
+        self.store.flush()
+        self.show_page(0)
+        
+    def show_page(self, offset):
+        _, order, descending = SORTS[self.sort_box.currentIndex()]
+        total = self.store.count()
+        self.offset = max(0, min(offset, (total - 1) // self.page_size * self.page_size))
+        entries = self.store.page(self.offset, self.page_size, order, descending)
+        self.populate_history(entries, self.highlight)
+        last = self.offset + len(entries)
+        self.page_label.setText(f"{self.offset + 1 if entries else 0}-{last} of {total}")
+        self.previous_button.setEnabled(self.offset > 0)
+        self.next_button.setEnabled(last < total)
+        
     def populate_history(self, history, highlight_results=None):
+        self.table.clearContents()
         self.table.setRowCount(len(history))
         highlight_row = -1
         
-        for i, entry in enumerate(history):
+        # Statistics for every row in one vectorized pass
+        all_stats = compute_bulk([entry["results"].get("times", []) for entry in history])
+        
+        for i, (entry, stats) in enumerate(zip(history, all_stats)):
             results = entry["results"]
-            time = datetime.fromisoformat(entry["timestamp"]).strftime("%H:%M:%S")
+            # Months of history: the date matters now
+            time = datetime.fromisoformat(entry["timestamp"]).strftime("%Y-%m-%d %H:%M:%S")
             
             # Check if this is the entry to highlight
             if highlight_results and results == highlight_results:
                 highlight_row = i
             
-            self.table.setItem(i, 0, QTableWidgetItem(time))
-            self.table.setItem(i, 1, QTableWidgetItem(results["total_formatted"]))
-            self.table.setItem(i, 2, QTableWidgetItem(str(results["total"])))
-            self.table.setItem(i, 3, QTableWidgetItem(str(results["count"])))
+            self.table.setItem(i, 0, self.time_item(time, entry.get("thumbnail")))
+            # Failed captures are kept too, with their error and no values
+            self.table.setItem(i, 1, QTableWidgetItem(results.get("total_formatted", "0:00")))
+            self.table.setItem(i, 2, QTableWidgetItem(str(results.get("total", 0))))
+            self.table.setItem(i, 3, QTableWidgetItem(str(results.get("count", 0))))
+            
+            if stats["count"]:
+                self.table.setItem(i, 4, QTableWidgetItem(format_minutes(stats["median"])))
+                self.table.setItem(i, 5, QTableWidgetItem(
+                    f"{format_minutes(stats['min'])} - {format_minutes(stats['max'])}"
+                ))
+                self.table.setItem(i, 6, QTableWidgetItem(f"{stats['std']:.1f}"))
             
-            times = ", ".join(results["times_formatted"])
-            self.table.setItem(i, 4, QTableWidgetItem(times))
+            # Outliers are marked with an asterisk
+            outliers = set(stats["outliers"])
+            times = ", ".join(
+                f"{t}*" if j in outliers else t
+                for j, t in enumerate(results.get("times_formatted", []))
+            )
+            if results.get("error"):
+                times = f"Failed: {results['error']}"
+            self.table.setItem(i, 7, self.route_item(results))
+            self.table.setItem(i, 8, QTableWidgetItem(times))
             
         # Highlight the specified row
         if highlight_row >= 0:
@@ -71,4 +140,34 @@ class HistoryWindow(QMainWindow):
                     item.setForeground(QColor("#000000"))  # Black text
             
             # Scroll to the highlighted row
-            self.table.scrollToItem(self.table.item(highlight_row, 0)) 
\ No newline at end of file
+            self.table.scrollToItem(self.table.item(highlight_row, 0)) 
+
+    @staticmethod
+    def time_item(text, thumbnail):
+        item = QTableWidgetItem(text)
+        if thumbnail:
+            pixmap = QPixmap()
+            if pixmap.loadFromData(thumbnail):
+                item.setIcon(QIcon(pixmap))
+        return item
+        
+    @staticmethod
+    def route_item(results):
+        """Backend that answered; with routing, the tiers tried on the way"""
+        route = results.get("route")
+        if not route:
+            return QTableWidgetItem(results.get("backend", ""))
+        tried = [a["backend"] for a in route["attempts"] if "ms" in a]
+        item = QTableWidgetItem(" → ".join(tried) if len(tried) > 1 else route["backend"])
+        lines = []
+        for attempt in route["attempts"]:
+            line = f"{attempt['backend']}: {attempt['outcome']}"
+            if "parts" in attempt:
+                line += f" x{attempt['parts']}"
+            if "confidence" in attempt:
+                line += f", confidence {attempt['confidence']:.2f}"
+            if "ms" in attempt:
+                line += f", {attempt['ms']} ms"
+            lines.append(line)
+        item.setToolTip("\n".join(lines))
+        return item
@@ -0,0 +1,97 @@
+CTRL, SHIFT, ALT, CMD = 1, 2, 4, 8
+
+# Names accepted in hotkey strings
+MODIFIER_NAMES = {
+    "CTRL": CTRL, "CONTROL": CTRL,
+    "SHIFT": SHIFT,
+    "ALT": ALT, "OPTION": ALT, "ALT_GR": ALT,
+    "CMD": CMD, "WIN": CMD, "SUPER": CMD, "META": CMD,
+}
+
+# Left and right keys are tracked apart, so releasing one while the other
+# is still held keeps the modifier down. Left (and sideless) keys use the
+# low nibble, right keys the high one.
+_SIDE_BITS = {}
+for _name, _bit in [("CTRL", CTRL), ("SHIFT", SHIFT), ("ALT", ALT), ("CMD", CMD)]:
+    _SIDE_BITS[_name] = _SIDE_BITS[f"{_name}_L"] = _bit
+    _SIDE_BITS[f"{_name}_R"] = _bit << 4
+_SIDE_BITS["ALT_GR"] = ALT << 4
+
+
+def parse(hotkey):
+    """("ALT+SHIFT+T") -> (modifier mask, key name).
+
+    A hotkey is any number of modifiers and exactly one other key, in any
+    order and case.
+    """
+    mask, keys = 0, []
+    for part in hotkey.split("+"):
+        name = part.strip().upper()
+        if not name:
+            raise ValueError(f"Empty key in hotkey {hotkey!r}")
+        if name in MODIFIER_NAMES:
+            mask |= MODIFIER_NAMES[name]
+        else:
+            keys.append(name)
+    if len(keys) != 1:
+        raise ValueError(f"Hotkey {hotkey!r} needs exactly one non-modifier key")
+    return mask, keys[0]
+
+
+def format_hotkey(mask, key):
+    """Canonical spelling of a parsed hotkey, like CTRL+ALT+T"""
+    names = [name for name, bit in [("CTRL", CTRL), ("SHIFT", SHIFT), ("ALT", ALT), ("CMD", CMD)]
+             if mask & bit]
+    return "+".join(names + [key])
+
+
+class HotkeyMatcher:
+    """Matches key events against any number of bound hotkeys.
+
+    Bindings are compiled into a dict keyed by (modifier mask, key), and
+    the held modifiers are kept as a bitmask, so each event is a couple of
+    integer operations and one dict lookup however many hotkeys are bound.
+    Keys are passed by name (``"T"``, ``"F5"``, ``"CTRL_L"``); a held key's
+    auto-repeat doesn't trigger its hotkey again.
+    """
+
+    def __init__(self):
+        self.bindings = {}  # (mask, key) -> action
+        self.modifiers = 0  # Held modifier keys, left/right apart
+        self.held = set()  # Held other keys, to ignore auto-repeat
+
+    def bind(self, hotkey, action):
+        """Bind hotkey to action, replacing any earlier binding of the same combo"""
+        combo = parse(hotkey)
+        self.bindings[combo] = action
+        return format_hotkey(*combo)
+
+    def unbind(self, action):
+        self.bindings = {combo: bound for combo, bound in self.bindings.items()
+                         if bound != action}
+
+    def clear(self):
+        self.bindings.clear()
+
+    def press(self, key):
+        """Record a key press; returns the bound action it completes, or None"""
+        bit = _SIDE_BITS.get(key)
+        if bit is not None:
+            self.modifiers |= bit
+            return None
+        if key in self.held:
+            return None
+        self.held.add(key)
+        return self.bindings.get(((self.modifiers | self.modifiers >> 4) & 0xF, key))
+
+    def release(self, key):
+        bit = _SIDE_BITS.get(key)
+        if bit is not None:
+            self.modifiers &= ~bit
+        else:
+            self.held.discard(key)
+
+    def reset(self):
+        """Forget held keys, for when releases may have been missed"""
+        self.modifiers = 0
+        self.held.clear()
@@ -0,0 +1,120 @@
+from queue import Empty, SimpleQueue
+import logging
+import threading
+
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+from pynput import keyboard
+
+from .log import get_logger
+
+log = get_logger(__name__)
+
+_special_names = {}  # Special pynput key -> name
+
+
+def key_name(key):
+    """Name of a pynput key as used in hotkey strings ("T", "F5", "CTRL_L")"""
+    if key is None:
+        return None
+    char = getattr(key, 'char', None)
+    if char:
+        # With Ctrl held the key arrives as a control character (Ctrl+T is \x14)
+        if len(char) == 1 and ord(char) < 32:
+            return chr(ord(char) + 64)
+        return char.upper()
+    vk = getattr(key, 'vk', None)
+    if vk is not None:
+        # Letters and digits without a char, e.g. with Ctrl+Alt on Windows
+        return chr(vk) if 48 <= vk <= 57 or 65 <= vk <= 90 else f"VK_{vk}"
+    # Special keys (Key.ctrl_l, Key.f5)
+    name = _special_names.get(key)
+    if name is None:
+        name = _special_names[key] = str(key).replace('Key.', '').upper()
+    return name
+
+
+class InputService(QObject):
+    """The one global keyboard hook of the process.
+
+    The OS hook thread only puts events on a queue and, when the GUI
+    thread isn't already due to drain it, posts one wake-up. The GUI thread
+    names the keys and calls every subscriber with ``(pressed, name)``.
+    Subscribers come and go freely; the hook is started by the first one
+    and only stopped by ``stop()`` when the app quits.
+    """
+
+    _instance = None
+    _wake = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self.events = SimpleQueue()
+        self.subscribers = []
+        self.listener = None
+        self._scheduled = False
+        self._lock = threading.Lock()
+        self._wake.connect(self._dispatch, Qt.ConnectionType.QueuedConnection)
+
+    @classmethod
+    def instance(cls):
+        """The shared service; create it from the GUI thread, which dispatches"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def subscribe(self, callback):
+        """Call callback(pressed, key_name) on the GUI thread for every key event"""
+        with self._lock:
+            if callback not in self.subscribers:
+                # Copy on write: dispatch iterates without the lock
+                self.subscribers = self.subscribers + [callback]
+            if self.listener is None:
+                self.listener = keyboard.Listener(on_press=self._on_press,
+                                                  on_release=self._on_release)
+                self.listener.start()
+                log.debug("Keyboard hook started")
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self.subscribers = [s for s in self.subscribers if s != callback]
+
+    def stop(self):
+        with self._lock:
+            listener, self.listener = self.listener, None
+            self.subscribers = []
+        if listener:
+            listener.stop()
+            listener.join()
+
+    # The two hook callbacks run in the OS hook thread: no work, no locks
+    def _on_press(self, key):
+        self.events.put((True, key))
+        if not self._scheduled:
+            self._scheduled = True
+            self._wake.emit()
+
+    def _on_release(self, key):
+        self.events.put((False, key))
+        if not self._scheduled:
+            self._scheduled = True
+            self._wake.emit()
+
+    def _dispatch(self):
+        # Cleared first: an event queued from here on posts a new wake-up
+        self._scheduled = False
+        trace = log.isEnabledFor(logging.DEBUG)
+        while True:
+            try:
+                pressed, key = self.events.get_nowait()
+            except Empty:
+                return
+            name = key_name(key)
+            if not name:
+                continue
+            if trace:
+                log.debug("Key %s: %s", "pressed" if pressed else "released", name)
+            for callback in self.subscribers:
+                try:
+                    callback(pressed, name)
+                except Exception:
+                    log.exception("Error in key event subscriber %r", callback)
@@ -0,0 +1,285 @@
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import json
+import os
+import re
+import threading
+import time
+import tracemalloc
+
+from .log import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_METRICS_FILE = Path.home() / ".snaplytics" / "metrics.json"
+
+PERCENTILES = (50, 95, 99)
+
+# Pipeline stages in the order they happen, for display
+SPANS = ["hotkey_to_overlay", "freeze", "overlay_paint", "selection_to_grab", "convert", "encode", "base64",
+         "network", "ocr", "parse", "notification", "capture_total",
+         "watch_check", "startup_imports", "startup_tray", "startup_ready"]
+
+
+class Span:
+    """One timed stretch of the pipeline, ended with end() or by a with block"""
+
+    def __init__(self, metrics, name, trace_memory=True):
+        self.metrics = metrics
+        self.name = name
+        self.start = time.perf_counter()
+        self.start_memory = metrics.memory_start() if trace_memory else None
+        self.ended = False
+
+    def end(self):
+        if self.ended:
+            return
+        self.ended = True
+        seconds = time.perf_counter() - self.start
+        self.metrics.record(self.name, seconds, self.metrics.memory_end(self.start_memory))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.end()
+
+
+class NullSpan:
+    """Stands in for Span when diagnostics are off"""
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class SpanStats:
+    """Rolling window of one span's durations and memory peaks"""
+
+    def __init__(self, window):
+        self.seconds = deque(maxlen=window)
+        self.peak_bytes = deque(maxlen=window)
+        self.count = 0
+        self.total_seconds = 0.0
+
+    def summary(self):
+        import numpy as np  # Not needed until metrics are read, kept off startup
+
+        summary = {"count": self.count, "sum_seconds": self.total_seconds}
+        if self.seconds:
+            for percentile, value in zip(PERCENTILES, np.percentile(self.seconds, PERCENTILES)):
+                summary[f"p{percentile}_ms"] = round(float(value) * 1000, 2)
+        if self.peak_bytes:
+            for percentile, value in zip(PERCENTILES, np.percentile(self.peak_bytes, PERCENTILES)):
+                summary[f"p{percentile}_peak_bytes"] = int(value)
+        return summary
+
+
+class Metrics:
+    """Process-wide timing and memory record of the capture pipeline.
+
+    Code marks the stretches it wants measured with ``span(name)``, either
+    as a ``with`` block or by calling ``end()`` on it when the stretch ends
+    somewhere else (hotkey -> overlay on screen). Each span records its
+    wall time and, with ``trace_memory``, the tracemalloc peak above where
+    it started. When spans overlap (several captures at once) the peak is
+    shared between them, an upper bound for each. Tracing runs only while
+    a span is measuring memory, it slows every allocation.
+
+    The last ``window`` samples of each span are summarized as p50/p95/p99.
+    Nothing leaves the process unless asked for: with ``export_seconds``
+    the summary is written to ``metrics_file``, and with a
+    ``prometheus_port`` it's served as Prometheus text on 127.0.0.1.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, enabled=True, trace_memory=False, window=500, metrics_file=None,
+                 export_seconds=None, prometheus_port=None):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.window = window
+        self.metrics_file = Path(metrics_file) if metrics_file else DEFAULT_METRICS_FILE
+        self.export_seconds = export_seconds
+        self.prometheus_port = prometheus_port
+        self.spans = {}
+        self.sources = {}  # Name -> callable returning extra counters to export
+        self._open = 0  # Spans measuring memory right now
+        self._tracing = False  # Whether tracemalloc was started here
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+        self._server = None
+
+    @classmethod
+    def configure(cls, settings=None):
+        """Create the shared instance from the "diagnostics" section of settings.json.
+
+        Only the first call creates it; later calls return the same instance.
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(**(settings or {}))
+            return cls._instance
+
+    @classmethod
+    def instance(cls):
+        return cls.configure()
+
+    def span(self, name, trace_memory=True):
+        """Start timing name. Spans that wait on the user, or may never
+        end, should pass trace_memory=False"""
+        return Span(self, name, trace_memory) if self.enabled else NullSpan()
+
+    def memory_start(self):
+        if not self.trace_memory:
+            return None
+        with self._lock:
+            # Only a span that starts alone gets a fresh peak; resetting
+            # it would cut short the peak of a span already running
+            if self._open == 0:
+                # Traced only while spans are open: tracing makes every
+                # allocation several times slower
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._tracing = True
+                tracemalloc.reset_peak()
+            self._open += 1
+            return tracemalloc.get_traced_memory()[0]
+
+    def memory_end(self, start_memory):
+        if start_memory is None:
+            return None
+        with self._lock:
+            peak = tracemalloc.get_traced_memory()[1]
+            self._open -= 1
+            # Left running if someone else started it (PYTHONTRACEMALLOC)
+            if self._open == 0 and self._tracing:
+                tracemalloc.stop()
+                self._tracing = False
+        return max(0, peak - start_memory)
+
+    def record(self, name, seconds, peak_bytes=None):
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats(self.window)
+            stats.seconds.append(seconds)
+            stats.count += 1
+            stats.total_seconds += seconds
+            if peak_bytes is not None:
+                stats.peak_bytes.append(peak_bytes)
+        self._changed.set()
+
+    def add_source(self, name, counters):
+        """Export counters() (a flat dict of numbers) alongside the spans"""
+        self.sources[name] = counters
+
+    def summary(self):
+        with self._lock:
+            spans = {name: stats.summary() for name, stats in self.spans.items()}
+        ordered = {name: spans.pop(name) for name in SPANS if name in spans}
+        ordered.update(sorted(spans.items()))
+        counters = {}
+        for name, counters_of in self.sources.items():
+            try:
+                counters[name] = counters_of()
+            except Exception as e:
+                counters[name] = {"error": str(e)}
+        return {"time": time.time(), "spans": ordered, "counters": counters}
+
+    def start_exporters(self):
+        """Start writing the metrics file and serving /metrics, as configured"""
+        if not self.enabled:
+            return
+        if self.export_seconds:
+            threading.Thread(target=self._export_loop, name="metrics-export",
+                             daemon=True).start()
+        if self.prometheus_port and self._server is None:
+            try:
+                self._server = ThreadingHTTPServer(("127.0.0.1", self.prometheus_port),
+                                                   self._handler())
+            except OSError as e:
+                log.warning("Metrics endpoint unavailable on port %s: %s", self.prometheus_port, e)
+                return
+            threading.Thread(target=self._server.serve_forever, name="metrics-http",
+                             daemon=True).start()
+            log.info("Metrics at http://127.0.0.1:%s/metrics", self.prometheus_port)
+
+    def write_file(self):
+        self.metrics_file.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.metrics_file.with_suffix(".tmp")
+        with open(temp, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        # Readers never see a half-written file
+        os.replace(temp, self.metrics_file)
+
+    def _export_loop(self):
+        while True:
+            self._changed.wait()
+            time.sleep(self.export_seconds)
+            self._changed.clear()
+            try:
+                self.write_file()
+            except OSError as e:
+                log.warning("Could not write %s: %s", self.metrics_file, e)
+
+    def prometheus_text(self):
+        summary = self.summary()
+        lines = [
+            "# HELP snaplytics_span_seconds Wall time of a capture pipeline stage",
+            "# TYPE snaplytics_span_seconds summary",
+        ]
+        for name, span in summary["spans"].items():
+            for percentile in PERCENTILES:
+                if f"p{percentile}_ms" in span:
+                    lines.append(f'snaplytics_span_seconds{{span="{name}",quantile="'
+                                 f'{percentile / 100}"}} {round(span[f"p{percentile}_ms"] / 1000, 6)}')
+            lines.append(f'snaplytics_span_seconds_sum{{span="{name}"}} {span["sum_seconds"]}')
+            lines.append(f'snaplytics_span_seconds_count{{span="{name}"}} {span["count"]}')
+        lines += [
+            "# HELP snaplytics_span_peak_bytes Traced memory peak during a stage",
+            "# TYPE snaplytics_span_peak_bytes gauge",
+        ]
+        for name, span in summary["spans"].items():
+            for percentile in PERCENTILES:
+                if f"p{percentile}_peak_bytes" in span:
+                    lines.append(f'snaplytics_span_peak_bytes{{span="{name}",quantile="'
+                                 f'{percentile / 100}"}} {span[f"p{percentile}_peak_bytes"]}')
+        for source, counters in summary["counters"].items():
+            for key, value in counters.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric = re.sub(r"\W", "_", f"snaplytics_{source}_{key}")
+                    lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def _handler(self):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Scrapes every few seconds would flood the console
+
+        return Handler
+
+
+def span(name, trace_memory=True):
+    """Time a stretch of the pipeline, see Metrics"""
+    return Metrics.instance().span(name, trace_memory)
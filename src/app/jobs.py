@@ -0,0 +1,169 @@
+from concurrent.futures import Future
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+from PyQt6.QtGui import QImage, QPixmap
+import itertools
+import threading
+
+
+class JobSignals(QObject):
+    """Signals emitted by a CaptureJob from its worker thread"""
+    progress = pyqtSignal(int, str)
+    partial = pyqtSignal(int, object)
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+    cancelled = pyqtSignal(int)
+
+
+class CaptureJob(QRunnable):
+    """Runs ImageProcessor.process_image (or process_array) for one capture on the thread pool"""
+
+    def __init__(self, job_id, processor, image, device_pixel_ratio=1.0):
+        super().__init__()
+        self.job_id = job_id
+        self.processor = processor
+        self.image = image
+        self.device_pixel_ratio = device_pixel_ratio
+        self.signals = JobSignals()
+        self.stage = "queued"
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _report(self, stage):
+        self.stage = stage
+        self.signals.progress.emit(self.job_id, stage)
+
+    def _partial(self, results):
+        self.signals.partial.emit(self.job_id, results)
+
+    def run(self):
+        try:
+            # Still warming up: wait for the processor here, off the GUI thread
+            processor = self.processor.result() if isinstance(self.processor, Future) else self.processor
+        except Exception as e:
+            self.signals.failed.emit(self.job_id, str(e))
+            return
+        # Loaded with the processor, not before: it imports openai and cv2
+        from .processor import JobCancelled
+        try:
+            if not isinstance(self.image, QImage):
+                # Already pixels (a crop of the frozen frame), nothing to convert
+                results = processor.process_array(
+                    self.image,
+                    self.device_pixel_ratio,
+                    progress=self._report,
+                    is_cancelled=self.is_cancelled,
+                    partial=self._partial
+                )
+            else:
+                results = processor.process_image(
+                    self.image,
+                    progress=self._report,
+                    is_cancelled=self.is_cancelled,
+                    partial=self._partial
+                )
+        except JobCancelled:
+            self.signals.cancelled.emit(self.job_id)
+            return
+        except Exception as e:
+            self.signals.failed.emit(self.job_id, str(e))
+            return
+
+        # The request may have been cancelled while it was in flight
+        if self.is_cancelled():
+            self.signals.cancelled.emit(self.job_id)
+        else:
+            self.signals.finished.emit(self.job_id, results)
+
+
+class JobManager(QObject):
+    """Queues captures for background processing and reports back via signals.
+
+    All public signals are delivered on the thread that owns the manager
+    (the GUI thread), so slots can touch widgets directly.
+    """
+    job_started = pyqtSignal(int)
+    job_progress = pyqtSignal(int, str)
+    job_partial = pyqtSignal(int, object)  # Running totals while streaming
+    job_finished = pyqtSignal(int, object)
+    job_failed = pyqtSignal(int, str)
+    job_cancelled = pyqtSignal(int)
+    active_changed = pyqtSignal(int)  # Number of jobs still running
+
+    def __init__(self, processor, parent=None, max_threads=None):
+        """processor is an ImageProcessor, or a Future of one still being built"""
+        super().__init__(parent)
+        self.processor = processor
+        self.pool = QThreadPool(self)
+        if max_threads:
+            self.pool.setMaxThreadCount(max_threads)
+        self._ids = itertools.count(1)
+        self._jobs = {}
+
+    def submit(self, pixmap, device_pixel_ratio=1.0):
+        """Queue a capture (QPixmap, QImage or RGB array) and return its job id.
+
+        ``device_pixel_ratio`` is only used for arrays, images carry their own.
+        """
+        # QPixmap can't leave the GUI thread, hand the worker a QImage
+        image = pixmap.toImage() if isinstance(pixmap, QPixmap) else pixmap
+
+        job = CaptureJob(next(self._ids), self.processor, image, device_pixel_ratio)
+        job.setAutoDelete(False)
+        job.signals.progress.connect(self._on_progress)
+        job.signals.partial.connect(self._on_partial)
+        job.signals.finished.connect(self._on_finished)
+        job.signals.failed.connect(self._on_failed)
+        job.signals.cancelled.connect(self._on_cancelled)
+        self._jobs[job.job_id] = job
+
+        self.pool.start(job)
+        self.job_started.emit(job.job_id)
+        self.active_changed.emit(len(self._jobs))
+        return job.job_id
+
+    def cancel(self, job_id):
+        job = self._jobs.get(job_id)
+        if job:
+            job.cancel()
+
+    def cancel_all(self):
+        for job in list(self._jobs.values()):
+            job.cancel()
+
+    def active_jobs(self):
+        """Return (job_id, stage) for every job that hasn't finished yet"""
+        return [(job.job_id, job.stage) for job in self._jobs.values()]
+
+    def _release(self, job_id):
+        self._jobs.pop(job_id, None)
+        self.active_changed.emit(len(self._jobs))
+
+    @pyqtSlot(int, str)
+    def _on_progress(self, job_id, stage):
+        if job_id in self._jobs:
+            self.job_progress.emit(job_id, stage)
+
+    @pyqtSlot(int, object)
+    def _on_partial(self, job_id, results):
+        if job_id in self._jobs:
+            self.job_partial.emit(job_id, results)
+
+    @pyqtSlot(int, object)
+    def _on_finished(self, job_id, results):
+        self._release(job_id)
+        self.job_finished.emit(job_id, results)
+
+    @pyqtSlot(int, str)
+    def _on_failed(self, job_id, error):
+        self._release(job_id)
+        self.job_failed.emit(job_id, error)
+
+    @pyqtSlot(int)
+    def _on_cancelled(self, job_id):
+        self._release(job_id)
+        self.job_cancelled.emit(job_id)
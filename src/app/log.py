@@ -0,0 +1,167 @@
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+import atexit
+import json
+import logging
+import sys
+import threading
+
+DEFAULT_LOG_FILE = Path.home() / ".snaplytics" / "snaplytics.log"
+
+ROOT = "snaplytics"
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def _level(name, default):
+    level = logging.getLevelName(str(name).upper())
+    return level if isinstance(level, int) else default
+
+
+def get_logger(name):
+    """Logger for a module, under the app's root logger.
+
+    Pass values as arguments (``log.debug("Key %s", key)``), they are only
+    formatted when the level is enabled. Callbacks that run on every key
+    press should check ``log.isEnabledFor(logging.DEBUG)`` once up front
+    and skip the calls entirely.
+    """
+    return logging.getLogger(f"{ROOT}.{name.rsplit('.', 1)[-1]}")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any extra={...} fields"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps records in memory and hands them to the real handlers from a
+    background thread, so logging never waits on the console or the disk.
+
+    At most ``capacity`` records wait for the flush; if a burst outruns the
+    writer the oldest are dropped (and counted) rather than blocking.
+    """
+
+    def __init__(self, handlers, capacity=10000, flush_seconds=1.0):
+        super().__init__()
+        self.handlers = handlers
+        self.capacity = capacity
+        self.flush_seconds = flush_seconds
+        self.records = deque(maxlen=capacity)
+        self.dropped = 0
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._flush_loop, name="log-flush", daemon=True)
+        self._thread.start()
+
+    def emit(self, record):
+        # Format now: the arguments may be mutated (or gone) by flush time
+        record.msg = record.getMessage()
+        record.args = None
+        if len(self.records) == self.capacity:
+            self.dropped += 1
+        self.records.append(record)
+        if record.levelno >= logging.WARNING or len(self.records) > self.capacity // 2:
+            self._wake.set()
+
+    def flush(self):
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            self.write(logging.LogRecord(ROOT, logging.WARNING, __file__, 0,
+                                         f"{dropped} log messages dropped, the log couldn't keep up",
+                                         None, None))
+        while True:
+            try:
+                record = self.records.popleft()
+            except IndexError:
+                break
+            self.write(record)
+        for handler in self.handlers:
+            handler.flush()
+
+    def write(self, record):
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _flush_loop(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        self._stopped = True
+        self._wake.set()
+        self._thread.join(timeout=2.0)
+        self.flush()
+        for handler in self.handlers:
+            handler.close()
+        super().close()
+
+
+def setup_logging(settings=None):
+    """Configure the app's loggers from the "logging" section of settings.json.
+
+    Messages at ``level`` and above are written as JSON lines to ``file``
+    (rotated at ``max_bytes``, ``backups`` kept) and those at
+    ``console_level`` and above to stderr, both from a background thread.
+    With ``"enabled": false`` only warnings reach the console, directly.
+    """
+    settings = dict(settings or {})
+    root = logging.getLogger(ROOT)
+    root.propagate = False
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+    console = logging.StreamHandler(sys.stderr)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    if not settings.pop("enabled", True):
+        console.setLevel(logging.WARNING)
+        root.setLevel(logging.WARNING)
+        root.addHandler(console)
+        return root
+
+    level = _level(settings.get("level", "INFO"), logging.INFO)
+    console.setLevel(_level(settings.get("console_level", "INFO"), logging.INFO))
+    handlers = [console]
+
+    path = settings.get("file")
+    if path is None:
+        path = DEFAULT_LOG_FILE
+    if path:  # false turns the file off
+        try:
+            path = Path(path).expanduser()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            file_handler = RotatingFileHandler(path, maxBytes=settings.get("max_bytes", 1_000_000),
+                                               backupCount=settings.get("backups", 3),
+                                               encoding="utf-8", delay=True)
+            file_handler.setFormatter(JsonFormatter())
+            file_handler.setLevel(level)
+            handlers.append(file_handler)
+        except OSError as e:
+            print(f"Log file unavailable ({e}), logging to the console only", file=sys.stderr)
+
+    buffer = RingBufferHandler(handlers, capacity=settings.get("capacity", 10000),
+                               flush_seconds=settings.get("flush_seconds", 1.0))
+    root.setLevel(min(level, console.level))
+    root.addHandler(buffer)
+    atexit.register(buffer.close)
+    return root
@@ -9,6 +9,8 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt
 from .screen_capture import ScreenCaptureWidget
 from .processor import ImageProcessor
+from .jobs import JobManager
+from .stats import format_minutes
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -40,6 +42,12 @@ class MainWindow(QMainWindow):
         # Initialize components
         self.screen_capture = ScreenCaptureWidget(self)
         self.processor = ImageProcessor()
+        self.jobs = JobManager(self.processor, self)
+        self.jobs.job_progress.connect(self.on_job_progress)
+        self.jobs.job_partial.connect(self.on_job_partial)
+        self.jobs.job_finished.connect(self.on_job_finished)
+        self.jobs.job_failed.connect(self.on_job_failed)
+        self.jobs.job_cancelled.connect(self.on_job_cancelled)
         
     def start_capture(self):
         self.status_label.setText("Starting capture...")
@@ -51,11 +59,31 @@ class MainWindow(QMainWindow):
         self.show()
         if pixmap and not pixmap.isNull():
             self.status_label.setText("Analyzing image...")
-            results = self.processor.process_image(pixmap)
-            self.display_results(results)
+            self.jobs.submit(pixmap)
         else:
             self.status_label.setText("Capture failed or cancelled")
             
+    def on_job_progress(self, job_id, stage):
+        self.status_label.setText(f"Capture #{job_id}: {stage}...")
+        
+    def on_job_partial(self, job_id, results):
+        self.status_label.setText(
+            f"Capture #{job_id}: {results['count']} found so far, "
+            f"total {results['total_formatted']}"
+        )
+        self.results_text.setText(
+            "Times found so far:\n" + "\n".join(results["times_formatted"])
+        )
+        
+    def on_job_finished(self, job_id, results):
+        self.display_results(results)
+        
+    def on_job_failed(self, job_id, error):
+        self.display_results({"error": error})
+        
+    def on_job_cancelled(self, job_id):
+        self.status_label.setText(f"Capture #{job_id} cancelled")
+            
     def display_results(self, results):
         self.status_label.setText("Results ready")
         if "error" in results and results["error"]:
@@ -67,11 +95,59 @@ class MainWindow(QMainWindow):
             
             if results.get("times"):
                 output += "Times found:\n"
-                for time_fmt, mins in zip(results["times_formatted"], results["times"]):
-                    output += f"{time_fmt} ({mins} minutes)\n"
+                # Positions are only known when regions are extracted one by one
+                sources = results.get("sources") or []
+                boxes = [s["box"] for s in sources] if len(sources) == len(results["times"]) else []
+                for i, (time_fmt, mins) in enumerate(zip(results["times_formatted"], results["times"])):
+                    output += f"{time_fmt} ({mins} minutes)"
+                    if boxes:
+                        output += f" at {boxes[i][0]}, {boxes[i][1]}"
+                    output += "\n"
                 output += f"\nTotal time: {results['total_formatted']}"
                 output += f"\nTotal minutes: {results['total']}"
                 output += f"\nAverage minutes: {results['average']:.1f}"
                 output += f"\nCount: {results['count']}"
+                
+                stats = results.get("stats")
+                if stats:
+                    output += self.format_stats(results, stats)
             
-            self.results_text.setText(output) 
\ No newline at end of file
+            output += self.format_other_values(results)
+            
+            self.results_text.setText(output)
+            
+    def format_other_values(self, results):
+        lines = []
+        if results.get("percentages"):
+            lines.append("Percentages: " + ", ".join(f"{p:g}%" for p in results["percentages"]))
+        if results.get("amounts"):
+            lines.append("Amounts: " + ", ".join(
+                f"{a['amount']:,.2f} {a['currency']}" for a in results["amounts"]
+            ))
+        if results.get("dates"):
+            lines.append("Dates: " + ", ".join(results["dates"]))
+        return "\n\n" + "\n".join(lines) if lines else ""
+        
+    def format_stats(self, results, stats):
+        output = "\n\nStatistics:\n"
+        output += f"Median: {format_minutes(stats['median'])}\n"
+        output += f"Min / Max: {format_minutes(stats['min'])} / {format_minutes(stats['max'])}\n"
+        output += f"Std deviation: {stats['std']:.1f} minutes\n"
+        output += "Percentiles: " + ", ".join(
+            f"{name} {format_minutes(value)}" for name, value in stats["percentiles"].items()
+        ) + "\n"
+        
+        if stats["outliers"]:
+            flagged = [results["times_formatted"][i] for i in stats["outliers"]]
+            output += f"Outliers: {', '.join(flagged)}\n"
+        
+        # Text histogram, bars scaled to the largest bucket
+        counts = stats["histogram"]["counts"]
+        edges = stats["histogram"]["edges"]
+        if counts:
+            output += "\nDistribution:\n"
+            widest = max(counts)
+            for count, low, high in zip(counts, edges, edges[1:]):
+                bar = "#" * round(20 * count / widest) if widest else ""
+                output += f"{format_minutes(low):>6} - {format_minutes(high):<6} {bar} {count}\n"
+        return output 
\ No newline at end of file
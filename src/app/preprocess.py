@@ -0,0 +1,171 @@
+from collections import namedtuple
+import io
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .conversion import encode_png, to_bgr
+
+# data: encoded image bytes, mime: its content type, size: (width, height)
+# after preprocessing, original_bytes / encoded_bytes: payload before and after
+EncodedImage = namedtuple(
+    "EncodedImage", ["data", "mime", "size", "original_bytes", "encoded_bytes"]
+)
+
+# Typical UI text height in logical pixels, used when it can't be measured
+DEFAULT_TEXT_HEIGHT = 12
+
+# Gray levels a pixel has to differ from the background by to count as ink
+INK_THRESHOLD = 24
+
+# Horizontal and vertical rules (table borders, separators) longer than this
+# are dropped by find_ink(ignore_rules=True)
+RULE_LENGTH = 40
+
+
+def find_ink(image, ignore_rules=False):
+    """Return (ink mask, background gray level) for an RGB capture"""
+    # Straight from RGB, the reversed BGR view would make OpenCV copy
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    background = Preprocessor.background_level(gray)
+    _, ink = cv2.threshold(cv2.absdiff(gray, np.full_like(gray, background)),
+                           INK_THRESHOLD, 1, cv2.THRESH_BINARY)
+    if ignore_rules:
+        for kernel in ((1, RULE_LENGTH), (RULE_LENGTH, 1)):
+            rules = cv2.morphologyEx(ink, cv2.MORPH_OPEN, np.ones(kernel, np.uint8))
+            ink[rules > 0] = 0
+    return ink.astype(bool), background
+
+
+class Preprocessor:
+    """Shrinks a capture before it is uploaded to a vision model.
+
+    Every step is optional: grayscale conversion, cropping of blank margins,
+    downscaling so text ends up around ``target_text_height`` pixels tall,
+    adaptive binarization and picking the smallest of the candidate
+    encodings. Binarization and JPEG can lose thin strokes (a colon, a
+    decimal point), so they're off unless asked for.
+    """
+
+    def __init__(self, enabled=True, grayscale=True, autocrop=True,
+                 binarize=False, target_text_height=20, min_scale=0.25,
+                 crop_margin=4, allow_jpeg=False, jpeg_quality=85):
+        self.enabled = enabled
+        self.grayscale = grayscale
+        self.autocrop = autocrop
+        self.binarize = binarize
+        self.target_text_height = target_text_height
+        self.min_scale = min_scale
+        self.crop_margin = crop_margin
+        self.allow_jpeg = allow_jpeg
+        self.jpeg_quality = jpeg_quality
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(**(settings or {}))
+
+    def process(self, image, device_pixel_ratio=1.0):
+        """Return the preprocessed array (RGB, grayscale or binary)"""
+        if not self.enabled:
+            return image
+
+        gray = cv2.cvtColor(to_bgr(image), cv2.COLOR_BGR2GRAY)
+        background = self.background_level(gray)
+        ink = cv2.absdiff(gray, np.full_like(gray, background)) > INK_THRESHOLD
+
+        if self.autocrop:
+            y0, y1, x0, x1 = self.content_bounds(ink)
+            image = image[y0:y1, x0:x1]
+            gray = gray[y0:y1, x0:x1]
+            ink = ink[y0:y1, x0:x1]
+
+        out = gray if self.grayscale or self.binarize else image
+
+        scale = self.scale_for(ink, device_pixel_ratio)
+        if scale < 1:
+            out = cv2.resize(out, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        if self.binarize:
+            # Dark-themed captures: threshold dark text on a light background
+            if background < 128:
+                out = cv2.bitwise_not(out)
+            # Block size has to be odd and should span a couple of glyphs
+            block = max(15, int(self.target_text_height * 1.5) | 1)
+            out = cv2.adaptiveThreshold(
+                out, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block, 10
+            )
+        return out
+
+    def encode(self, image, device_pixel_ratio=1.0):
+        """Preprocess and encode a capture, returning an EncodedImage"""
+        original_bytes = image.shape[0] * image.shape[1] * 3
+        out = self.process(image, device_pixel_ratio)
+
+        candidates = [("image/png", self._encode_png(out))]
+        if self.enabled and self.allow_jpeg and not self.binarize:
+            candidates.append(("image/jpeg", self._encode_jpeg(out)))
+        mime, data = min(candidates, key=lambda candidate: len(candidate[1]))
+
+        return EncodedImage(
+            data, mime, (out.shape[1], out.shape[0]), original_bytes, len(data)
+        )
+
+    @staticmethod
+    def background_level(gray):
+        """Most common gray level along the border of the capture"""
+        border = np.concatenate([gray[0], gray[-1], gray[:, 0], gray[:, -1]])
+        return int(np.bincount(border, minlength=256).argmax())
+
+    def content_bounds(self, ink):
+        """(y0, y1, x0, x1) of the region that contains anything but background"""
+        rows = np.flatnonzero(ink.any(axis=1))
+        cols = np.flatnonzero(ink.any(axis=0))
+        if rows.size == 0:
+            return 0, ink.shape[0], 0, ink.shape[1]
+        m = self.crop_margin
+        return (
+            max(0, rows[0] - m), min(ink.shape[0], rows[-1] + 1 + m),
+            max(0, cols[0] - m), min(ink.shape[1], cols[-1] + 1 + m),
+        )
+
+    def scale_for(self, ink, device_pixel_ratio=1.0):
+        """Downscale factor that brings text to target_text_height (never > 1)"""
+        text_height = self.estimate_text_height(ink)
+        if text_height is None:
+            text_height = DEFAULT_TEXT_HEIGHT * max(device_pixel_ratio, 1.0)
+        scale = self.target_text_height / text_height
+        return float(min(1.0, max(self.min_scale, scale)))
+
+    @staticmethod
+    def estimate_text_height(ink):
+        """Median glyph height in pixels, or None if there is no text"""
+        count, _, stats, _ = cv2.connectedComponentsWithStats(ink.astype(np.uint8), connectivity=8)
+        if count <= 1:
+            return None
+        heights = stats[1:, cv2.CC_STAT_HEIGHT]
+        areas = stats[1:, cv2.CC_STAT_AREA]
+        # Ignore specks (dots, colons) and long lines (borders, underlines)
+        widths = stats[1:, cv2.CC_STAT_WIDTH]
+        glyphs = heights[(areas >= 6) & (heights >= 4) & (widths < heights * 4)]
+        if glyphs.size == 0:
+            return None
+        return float(np.median(glyphs))
+
+    @staticmethod
+    def _encode_png(image):
+        if image.ndim == 2 and np.isin(image, (0, 255)).all():
+            # 1-bit PNG for binarized captures
+            buffer = io.BytesIO()
+            Image.fromarray(image).convert("1").save(buffer, format="PNG", optimize=True)
+            return buffer.getvalue()
+        if image.ndim == 3:
+            return encode_png(image)
+        return cv2.imencode(".png", image, [cv2.IMWRITE_PNG_COMPRESSION, 9])[1].tobytes()
+
+    def _encode_jpeg(self, image):
+        if image.ndim == 3:
+            image = to_bgr(image)
+        return cv2.imencode(
+            ".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        )[1].tobytes()
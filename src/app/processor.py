@@ -1,130 +1,359 @@
-import numpy as np
-import cv2
-from PIL import Image
-import io
-import base64
-from openai import OpenAI
 from dotenv import load_dotenv
-import os
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QImage, QPainter
-import re
-from datetime import datetime, timedelta
+from PyQt6.QtGui import QPixmap
+import numpy as np
+from .cache import ExtractionCache
+from .instrumentation import Metrics, span
+from .singleflight import SingleFlight
+from .client_manager import ClientManager
+from .backends import create_backend
+from .router import BackendRouter, Tier
+from .batching import BatchExtractor
+from .tiling import TiledExtractor
+from .regions import RegionExtractor
+from .conversion import qimage_to_array
+from .streaming import IncrementalScanner
+from .stats import compute_stats, empty_stats
+from .log import get_logger
+from .tokenizer import durations_by_line, scan
+import json
+import threading
+
+log = get_logger(__name__)
+
+class JobCancelled(Exception):
+    """Raised inside the pipeline when the owning job has been cancelled"""
+
 
 class ImageProcessor:
-    def __init__(self):
+    def __init__(self, settings=None):
+        self.settings = settings or {}
         load_dotenv()
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        # Time pattern: matches "HH:MM" or "H:MM" format
-        self.time_pattern = re.compile(r'\b([0-9]{1,2}):([0-5][0-9])\b')
+        # Shared by every processor in the process (tray app, main window)
+        ClientManager.configure(self.settings.get("api"))
+        metrics = Metrics.configure(self.settings.get("diagnostics"))
+        self.backend = self.create_backend(self.settings.get("backend", "openai"))
+        
+        # With several backends configured, each capture goes to the
+        # cheapest one that keeps up and moves up the tiers when it doesn't
+        routing = dict(self.settings.get("routing", {}))
+        if routing.pop("enabled", True) and routing.get("tiers"):
+            router = self.create_router(**routing)
+            if router:
+                self.backend = router
+        
+        # Captures that arrive together share one request when the backend allows it
+        batching = self.settings.get("batching", {})
+        self.extractor = self.backend
+        if batching.get("enabled", True) and BatchExtractor.supports(self.backend):
+            self.extractor = BatchExtractor(
+                self.backend,
+                window_ms=batching.get("window_ms", 75),
+                max_size=batching.get("max_size", 4),
+                cancelled=JobCancelled
+            )
+        self.streaming = self.settings.get("streaming", {}).get("enabled", True)
+        
+        # Very large captures are split into tiles extracted side by side
+        tiling = dict(self.settings.get("tiling", {}))
+        self.tiler = None
+        if tiling.pop("enabled", True):
+            self.tiler = TiledExtractor(self.backend, self.extract_times,
+                                        parse_lines=durations_by_line, **tiling)
+        
+        # Only the text regions of a capture are sent, not the whitespace around
+        # them. Off unless enabled, it changes what the backend sees
+        regions = dict(self.settings.get("regions", {}))
+        self.regions = None
+        if regions.pop("enabled", False):
+            self.regions = RegionExtractor(self.backend, **regions)
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        
+        # The same capture twice at once (double hotkey press, a duplicate
+        # file in batch mode) is extracted once; a cancelled job's waiting
+        # duplicates take over instead of being cancelled with it
+        self.flights = None
+        if self.settings.get("coalescing", {}).get("enabled", True):
+            self.flights = SingleFlight(retry_on=JobCancelled)
+        try:
+            self.cache = ExtractionCache.from_settings(self.settings.get("cache"),
+                                                       scope=self.cache_scope())
+        except Exception as e:
+            log.warning("Extraction cache disabled: %s", e)
+            self.cache = None
+        
+        # Counters shown next to the stage timings (Diagnostics, /metrics)
+        metrics.add_source("api", lambda: ClientManager.instance().stats())
+        if self.cache:
+            metrics.add_source("cache", self.cache.stats)
+        if self.flights:
+            metrics.add_source("coalescing", self.flights.stats)
+        if isinstance(self.backend, BackendRouter):
+            metrics.add_source("routing", lambda: {
+                f"{label}_{key}": value
+                for label, stats in self.backend.stats().items()
+                for key, value in stats.items()
+            })
+        
+    def cache_scope(self):
+        """Everything besides the pixels that decides a capture's results:
+        the backends as actually created (a fallback, default models and
+        preprocessing included) and what is sent to them"""
+        if isinstance(self.backend, BackendRouter):
+            backends = [tier.backend for tier in self.backend.tiers]
+        else:
+            backends = [self.backend]
+        described = []
+        for backend in backends:
+            options = {name: value for name, value in vars(backend).items()
+                       if isinstance(value, (str, int, float, bool, type(None)))}
+            if hasattr(backend, "preprocessor"):
+                options["preprocess"] = vars(backend.preprocessor)
+            described.append({"name": backend.name, **options})
+        return json.dumps({
+            "backends": described,
+            **{section: self.settings.get(section) for section in ("routing", "regions", "tiling")}
+        }, sort_keys=True, default=str)
+
+    def create_backend(self, name):
+        backend_settings = self.settings.get("backends", {})
+        try:
+            return create_backend(name, backend_settings.get(name))
+        except ImportError as e:
+            # e.g. pytesseract isn't installed, the remote model still works
+            if name == "openai":
+                raise
+            log.warning("Backend '%s' unavailable (%s), falling back to OpenAI", name, e)
+            return create_backend("openai", backend_settings.get("openai"))
         
-    def parse_time(self, time_str):
-        """Convert time string to minutes where format is H:MM"""
-        if ':' in time_str:
+    def create_router(self, tiers, **options):
+        """BackendRouter over the "routing" tiers that can be created here"""
+        backend_settings = self.settings.get("backends", {})
+        available = []
+        for tier in tiers:
+            tier = dict(tier)
+            name = tier.pop("backend")
+            overrides = tier.pop("options", {})
+            label = tier.pop("label", None) or ":".join([name] + (
+                [overrides["model"]] if "model" in overrides else []))
             try:
-                hours, minutes = map(int, time_str.split(':'))
-                total_minutes = (hours * 60) + minutes
-                return total_minutes
-            except ValueError:
-                return None
-        return None
-        
-    def process_image(self, pixmap):
-        # Convert QPixmap to bytes
-        image = pixmap.toImage()
-        
-        # Convert QImage to bytes (keep existing conversion code)
-        buffer = io.BytesIO()
-        qsize = image.size()
-        
-        # Create QImage in RGB888 format
-        temp_image = QImage(
-            qsize.width(), 
-            qsize.height(),
-            QImage.Format.Format_RGB888
-        )
-        temp_image.fill(Qt.GlobalColor.white)
-        
-        # Draw the original image onto the RGB888 image
-        painter = QPainter(temp_image)
-        painter.drawImage(0, 0, image)
-        painter.end()
-        
-        # Convert to PIL Image and get base64
-        width = temp_image.width()
-        height = temp_image.height()
-        ptr = temp_image.bits()
-        ptr.setsize(height * width * 3)
-        arr = np.frombuffer(ptr, np.uint8).reshape((height, width, 3))
-        pil_image = Image.fromarray(arr)
-        
-        # Save to buffer
-        buffer = io.BytesIO()
-        pil_image.save(buffer, format='PNG')
-        image_bytes = buffer.getvalue()
-        base64_image = base64.b64encode(image_bytes).decode('utf-8')
+                backend = create_backend(name, {**backend_settings.get(name, {}), **overrides})
+            except ImportError as e:
+                log.warning("Routing tier '%s' unavailable (%s), skipping it", label, e)
+                continue
+            available.append(Tier(label, backend, **tier))
+        if not available:
+            return None
+        log.info("Routing captures through %s", " -> ".join(t.label for t in available))
+        return BackendRouter(available, reraise=(JobCancelled,), **options)
+        
+    def prewarm(self):
+        """Get the backend ready for a capture that is about to happen"""
+        if hasattr(self.backend, "prewarm"):
+            self.backend.prewarm()
+        
+    def process_image(self, pixmap, progress=None, is_cancelled=None, partial=None):
+        """Extract times from a captured image.
+
+        Safe to call from a worker thread as long as a QImage (not a
+        QPixmap) is passed in. ``progress`` is called with the name of each
+        stage as it starts and ``is_cancelled`` is polled between stages;
+        when it returns True the pipeline stops with JobCancelled.
+        ``partial`` receives running count/total dicts while the response
+        is still streaming in.
+        """
+        self.stage_reporter(progress, is_cancelled)("converting")
+        with span("convert"):
+            # QPixmap is GUI-thread only, callers off the main thread pass a QImage
+            image = pixmap.toImage() if isinstance(pixmap, QPixmap) else pixmap
+            
+            # View the pixels as an RGB array, without copying when possible
+            arr = qimage_to_array(image)
+        return self.process_array(arr, image.devicePixelRatio(), progress,
+                                  is_cancelled, partial)
+    
+    @staticmethod
+    def stage_reporter(progress=None, is_cancelled=None):
+        """Build the stage() callback passed down the pipeline"""
+        def stage(name):
+            if is_cancelled and is_cancelled():
+                raise JobCancelled()
+            if progress:
+                progress(name)
+        return stage
+        
+    def process_array(self, arr, device_pixel_ratio=1.0, progress=None,
+                      is_cancelled=None, partial=None, cache_key=None, packed=False):
+        """Extract times from an (H, W, 3) RGB array, see process_image.
+
+        Callers that already computed the cache key or ran the region
+        packing (RegionExtractor.pack) elsewhere, such as the batch mode's
+        worker processes, pass ``cache_key`` and ``packed=True``.
+        """
+        stage = self.stage_reporter(progress, is_cancelled)
+        
+        # Identical (or nearly identical) captures are answered from the cache
+        if self.cache:
+            cache_key = cache_key or self.cache.make_key(arr)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                cached["cached"] = True
+                return cached
         
+        if not self.flights:
+            return self.extract_and_parse(arr, device_pixel_ratio, stage, is_cancelled,
+                                          partial, cache_key, packed)
+        flight_key = cache_key.digest if cache_key else ExtractionCache.content_key(arr)
+        results, shared = self.flights.do(
+            flight_key,
+            lambda: self.extract_and_parse(arr, device_pixel_ratio, stage, is_cancelled,
+                                           partial, cache_key, packed),
+            is_cancelled, JobCancelled
+        )
+        if shared:
+            results["shared"] = True
+        return results
+    
+    def extract_and_parse(self, arr, device_pixel_ratio, stage, is_cancelled=None,
+                          partial=None, cache_key=None, packed=False):
+        """The uncached part of process_array: extraction, parsing, cache store"""
+        with self._in_flight_lock:
+            self._in_flight += 1
+            alone = self._in_flight == 1
         try:
-            # Process with OpenAI Vision API
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini-2024-07-18",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "Extract all time durations, dates, or numeric patterns from this image. Return them exactly as they appear, one per line. Focus on time values in H:MM format, but also note any other relevant numeric patterns."
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{base64_image}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=300
-            )
+            extractor = self.extractor
+            on_text = None
+            if partial and self.streaming:
+                on_text = self.running_totals(partial, is_cancelled)
+                # A lone capture streams; bursts still share batched requests
+                if alone:
+                    extractor = self.backend
             
-            # Extract text from response
-            text = response.choices[0].message.content
+            if self.regions and self.regions.mode == "regions":
+                # One request per few regions, values keep their position
+                extractor = self.regions
+            elif self.regions and not packed:
+                stage("finding text")
+                mosaic = self.regions.pack(arr)
+                if mosaic is not None:
+                    arr = mosaic
+            if self.tiler and extractor is not self.regions and self.tiler.needs_tiling(arr):
+                extractor = self.tiler
             
-            # Extract times using regex
-            times_str = self.extract_times(text)
-            times_minutes = [self.time_to_minutes(t) for t in times_str]
+            # Backends report their own stages (encoding, uploading, ...)
+            options = {}
+            if isinstance(extractor, BatchExtractor):
+                # Waits on other threads' requests, polls for cancellation meanwhile
+                options["is_cancelled"] = is_cancelled
+            extraction = extractor.extract(
+                arr, progress=stage, device_pixel_ratio=device_pixel_ratio,
+                on_text=on_text, **options
+            )
             
-            # Calculate totals
-            total_minutes = sum(times_minutes)
+            stage("parsing")
+            text = extraction.text
             
-            return {
+            with span("parse"):
+                # One scan finds every value, already converted to numbers
+                tokens = scan(text)
+                minutes = self.to_minutes(tokens.durations)
+                
+                # Calculate totals and the rest of the summary in one pass
+                stats = compute_stats(minutes)
+            total_minutes = int(round(stats["total"]))
+            
+            results = {
                 "total": total_minutes,
-                "average": total_minutes / len(times_minutes) if times_minutes else 0,
-                "count": len(times_minutes),
-                "times": times_minutes,
-                "times_formatted": times_str,
-                "total_formatted": self.minutes_to_time_str(total_minutes)
+                "average": stats["mean"],
+                "count": stats["count"],
+                "times": minutes.tolist(),
+                "times_formatted": tokens.duration_text,
+                "total_formatted": self.minutes_to_time_str(total_minutes),
+                "stats": stats,
+                "backend": self.backend.name
             }
+            if extraction.route:
+                # Which backend answered, and which were tried before it
+                results["backend"] = extraction.route["backend"]
+                results["route"] = extraction.route
+            # Other values the model was asked for, when there are any
+            if tokens.percentages.size:
+                results["percentages"] = tokens.percentages.tolist()
+            if tokens.amounts.size:
+                results["amounts"] = [
+                    {"amount": amount, "currency": currency}
+                    for amount, currency in zip(tokens.amounts.tolist(), tokens.currencies.tolist())
+                ]
+            if tokens.dates.size:
+                results["dates"] = tokens.dates.astype(str).tolist()
+            if extraction.payload:
+                results["payload"] = extraction.payload
+            if extraction.sources:
+                # Where each value was found, as (x, y, w, h) in capture pixels
+                results["sources"] = [
+                    {"value": value, "box": list(box)}
+                    for region_text, box in extraction.sources
+                    for value in self.extract_times(region_text)
+                ]
+            if self.cache and cache_key:
+                self.cache.put(cache_key, results)
+            return results
             
+        except JobCancelled:
+            raise
         except Exception as e:
-            print(f"Error processing image: {str(e)}")
+            log.exception("Error processing image: %s", e)
             return {
                 "total": 0,
                 "average": 0,
                 "count": 0,
                 "times": [],
                 "times_formatted": [],
+                "total_formatted": "0:00",
+                "stats": empty_stats(),
+                "backend": self.backend.name,
                 "error": str(e)
             }
+        finally:
+            with self._in_flight_lock:
+                self._in_flight -= 1
     
+    def running_totals(self, partial, is_cancelled=None):
+        """Build an on_text callback that reports running totals to partial"""
+        scanner = IncrementalScanner(scan)
+        times_str = []
+        seconds = [0]
+        
+        def on_text(piece):
+            if is_cancelled and is_cancelled():
+                raise JobCancelled()
+            tokens = scanner.feed(piece)
+            if not tokens or not tokens.duration_text:
+                return
+            times_str.extend(tokens.duration_text)
+            seconds[0] += int(tokens.durations.sum())
+            total = int(round(seconds[0] / 60))
+            partial({
+                "count": len(times_str),
+                "total": total,
+                "total_formatted": self.minutes_to_time_str(total),
+                "times_formatted": list(times_str)
+            })
+        
+        return on_text
+            
     def time_to_minutes(self, time_str):
-        """Convert time string (HH:MM) to total minutes"""
-        try:
-            hours, minutes = map(int, time_str.split(':'))
-            return hours * 60 + minutes
-        except (ValueError, AttributeError):
+        """Convert a duration string (H:MM, H:MM:SS, 1h 30m, ...) to total minutes"""
+        if not isinstance(time_str, str):
             return 0
+        return int(round(scan(time_str).durations.sum() / 60))
+    
+    @staticmethod
+    def to_minutes(seconds):
+        """Duration seconds as minutes, integers unless there are leftover seconds"""
+        if (seconds % 60 == 0).all():
+            return seconds // 60
+        return np.round(seconds / 60, 2)
             
     def minutes_to_time_str(self, total_minutes):
         """Convert total minutes to formatted time string (HH:MM)"""
@@ -136,20 +365,5 @@ class ImageProcessor:
         return f"{hours}:{minutes:02d}"
     
     def extract_times(self, text):
-        """Extract time values from text using regex"""
-        if not text:
-            return []
-            
-        matches = self.time_pattern.findall(text)
-        times = []
-        
-        for hours, minutes in matches:
-            # Validate hours and minutes
-            try:
-                h, m = int(hours), int(minutes)
-                if 0 <= h <= 23 and 0 <= m <= 59:
-                    times.append(f"{h}:{m:02d}")
-            except ValueError:
-                continue
-                
-        return times 
\ No newline at end of file
+        """Extract durations from text, normalized to H:MM (see tokenizer.scan)"""
+        return scan(text).duration_text 
\ No newline at end of file
@@ -0,0 +1,244 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from .backends import ExtractionResult
+from .preprocess import DEFAULT_TEXT_HEIGHT, Preprocessor, find_ink
+from .router import merge_routes
+from .log import get_logger
+
+log = get_logger(__name__)
+
+# Regions that cover more than this share of the capture aren't worth
+# cutting out, the whole capture is sent instead
+MAX_COVERAGE = 0.6
+
+# Solid blocks (icons, avatars, color swatches) are mostly ink, text isn't
+MAX_FILL = 0.75
+
+
+class TextRegionDetector:
+    """Finds the words and numbers in a capture with morphology.
+
+    Ink is separated from the background, table rules are dropped, and
+    glyphs are joined into words with a closing as wide as a word space,
+    so "7:25", "45 min" and "$ 1,250.00" each stay one component.
+    Components that are far taller than the text, tiny specks and solid
+    blocks are discarded. Boxes on the same line closer than ``merge``
+    are merged as well, in case a wide space still split a value from its
+    unit. What is left is returned as padded (x, y, w, h) boxes in reading
+    order.
+    """
+
+    def __init__(self, padding=0.3, join=1.0, max_height=2.5, merge=1.5):
+        self.padding = padding  # All four are fractions of the text height
+        self.join = join
+        self.max_height = max_height
+        self.merge = merge
+
+    def detect(self, image):
+        """Return (boxes in reading order, measured text height)"""
+        ink, _ = find_ink(image, ignore_rules=True)
+        text_height = Preprocessor.estimate_text_height(ink) or DEFAULT_TEXT_HEIGHT
+
+        # Join letters into words, colon dots into their digits and values
+        # into their units
+        joined = cv2.morphologyEx(
+            ink.astype(np.uint8), cv2.MORPH_CLOSE,
+            np.ones((max(1, int(text_height * 0.3)), max(2, int(text_height * self.join))),
+                    np.uint8)
+        )
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(joined, connectivity=8)
+        if count <= 1:
+            return [], text_height
+
+        x, y, w, h = (stats[1:, i] for i in range(4))
+        # Share of every component's box that is actual ink
+        filled = np.bincount(labels[ink], minlength=count)[1:] / (w * h)
+        keep = (
+            (h >= text_height * 0.4) & (h <= text_height * self.max_height)
+            & (w >= text_height * 0.3) & (filled <= MAX_FILL)
+        )
+
+        pad = max(1, int(round(text_height * self.padding)))
+        height, width = ink.shape
+        boxes = []
+        for i in np.flatnonzero(keep):
+            x0, y0 = max(0, x[i] - pad), max(0, y[i] - pad)
+            x1, y1 = min(width, x[i] + w[i] + pad), min(height, y[i] + h[i] + pad)
+            boxes.append((int(x0), int(y0), int(x1 - x0), int(y1 - y0)))
+        max_gap = text_height * self.merge - 2 * pad  # Between the padded boxes
+        lines = [self.merge_close(line, max_gap) for line in self.lines(boxes)]
+        return [box for line in lines for box in line], text_height
+
+    @staticmethod
+    def lines(boxes):
+        """Group boxes into lines (by vertical overlap), top to bottom, each
+        left to right"""
+        lines = []
+        for box in sorted(boxes, key=lambda b: b[1] + b[3] / 2):
+            center = box[1] + box[3] / 2
+            if lines and lines[-1][0] <= center <= lines[-1][1]:
+                lines[-1][2].append(box)
+            else:
+                lines.append([box[1], box[1] + box[3], [box]])
+        return [sorted(line) for _, _, line in lines]
+
+    @classmethod
+    def reading_order(cls, boxes):
+        """Sort boxes into lines, left to right within a line"""
+        return [box for line in cls.lines(boxes) for box in line]
+
+    @staticmethod
+    def merge_close(line, max_gap):
+        """Merge the boxes of one line that are less than max_gap apart"""
+        merged = []
+        for x, y, w, h in line:
+            if merged and x - (merged[-1][0] + merged[-1][2]) < max_gap:
+                mx, my, mw, mh = merged[-1]
+                x0, y0 = min(mx, x), min(my, y)
+                x1, y1 = max(mx + mw, x + w), max(my + mh, y + h)
+                merged[-1] = (x0, y0, x1 - x0, y1 - y0)
+            else:
+                merged.append((x, y, w, h))
+        return merged
+
+
+class RegionExtractor:
+    """Sends only the text regions of a capture to the backend.
+
+    ``mode`` is "mosaic" (default) or "regions":
+
+    - mosaic: the regions are packed, in reading order, into one compact
+      image on the capture's background and extracted with one request.
+      Every text line stays on a line of its own, so a label stays next to
+      its value.
+    - regions: every region is extracted on its own (several per request
+      for backends that batch), so each value is reported together with
+      the box it came from.
+
+    Captures where the regions cover most of the area anyway are sent
+    whole.
+    """
+
+    def __init__(self, backend, mode="mosaic", per_request=8, max_workers=8,
+                 detector=None):
+        if mode not in ("mosaic", "regions"):
+            raise ValueError(f"Unknown region mode: {mode}")
+        self.backend = backend
+        self.mode = mode
+        self.per_request = max(1, per_request)
+        self.detector = TextRegionDetector(**(detector or {}))
+        self.pool = ThreadPoolExecutor(max_workers=max_workers,
+                                       thread_name_prefix="region-extract")
+
+    @property
+    def name(self):
+        return self.backend.name
+
+    def find(self, image):
+        """Return (boxes, text height), or ([], text height) when sending
+        the whole capture is just as good"""
+        boxes, text_height = self.detector.detect(image)
+        covered = sum(w * h for _, _, w, h in boxes)
+        if covered > MAX_COVERAGE * image.shape[0] * image.shape[1]:
+            return [], text_height
+        if boxes:
+            log.debug("Found %d text regions covering %.0f%% of the capture",
+                      len(boxes), 100 * covered / (image.shape[0] * image.shape[1]))
+        return boxes, text_height
+
+    def pack(self, image):
+        """The mosaic of the capture's text regions, or None to send it whole"""
+        boxes, text_height = self.find(image)
+        if not boxes:
+            return None
+        return self.mosaic(image, boxes, gap=max(4, int(text_height)))
+
+    def extract(self, image, progress=None, device_pixel_ratio=1.0, on_text=None):
+        if progress:
+            progress("finding text")
+        boxes, text_height = self.find(image)
+        if not boxes:
+            return self.backend.extract(image, progress=progress,
+                                        device_pixel_ratio=device_pixel_ratio,
+                                        on_text=on_text)
+
+        if self.mode == "mosaic":
+            mosaic = self.mosaic(image, boxes, gap=max(4, int(text_height)))
+            return self.backend.extract(mosaic, progress=progress,
+                                        device_pixel_ratio=device_pixel_ratio,
+                                        on_text=on_text)
+
+        if progress:
+            progress("uploading")
+        results = self.extract_regions(image, boxes, device_pixel_ratio)
+        texts = [r.text for r in results]
+        payloads = [r.payload for r in results if r.payload]
+        text = "\n".join(t for t in texts if t)
+        if on_text:
+            on_text(text)
+        payload = None
+        if payloads:
+            payload = {
+                "original_bytes": image.shape[0] * image.shape[1] * 3,
+                "encoded_bytes": sum(p["encoded_bytes"] for p in payloads),
+                "base64_bytes": sum(p["base64_bytes"] for p in payloads),
+                "mime": payloads[0]["mime"],
+                "size": [image.shape[1], image.shape[0]],
+                "regions": len(boxes),
+            }
+        return ExtractionResult(text, None, payload, sources=list(zip(texts, boxes)),
+                                route=merge_routes(results))
+
+    def extract_regions(self, image, boxes, device_pixel_ratio):
+        """Return the ExtractionResult of every region, in order"""
+        crops = [image[y:y + h, x:x + w] for x, y, w, h in boxes]
+        if hasattr(self.backend, "extract_batch") and hasattr(self.backend, "encode"):
+            def send(group):
+                return self.backend.extract_batch(
+                    [self.backend.encode(crop, device_pixel_ratio) for crop in group]
+                )
+            groups = [crops[i:i + self.per_request]
+                      for i in range(0, len(crops), self.per_request)]
+            results = [r for batch in self.pool.map(send, groups) for r in batch]
+        else:
+            results = list(self.pool.map(
+                lambda crop: self.backend.extract(crop, device_pixel_ratio=device_pixel_ratio),
+                crops
+            ))
+        return results
+
+    @staticmethod
+    def layout(boxes, gap):
+        """(x, y) in the mosaic of every box, and the mosaic's (width, height).
+
+        Each text line of the capture becomes one shelf, its boxes left to
+        right ``gap`` apart; a line is never split over two shelves, or a
+        value would land on another line than its label.
+        """
+        placements = {}
+        width = y = 0
+        for line in TextRegionDetector.lines(boxes):
+            x = shelf_height = 0
+            for box in line:
+                placements[box] = (x, y)
+                x += box[2] + gap
+                shelf_height = max(shelf_height, box[3])
+            width = max(width, x - gap)
+            y += shelf_height + gap
+        return [placements[box] for box in boxes], (width, y - gap)
+
+    @classmethod
+    def mosaic(cls, image, boxes, gap):
+        """Pack the boxes into one image, a shelf per text line"""
+        placements, (width, height) = cls.layout(boxes, gap)
+
+        # Same background as the capture, so the pasted edges don't show
+        border = np.concatenate([image[0], image[-1], image[:, 0], image[:, -1]])
+        canvas = np.empty((height, width, 3), np.uint8)
+        canvas[:] = np.median(border, axis=0)
+        for (bx, by, w, h), (px, py) in zip(boxes, placements):
+            canvas[py:py + h, px:px + w] = image[by:by + h, bx:bx + w]
+        return canvas
@@ -0,0 +1,227 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+import time
+
+import numpy as np
+
+from .backends import ExtractionResult
+from .log import get_logger
+
+log = get_logger(__name__)
+
+
+class BackendStats:
+    """Rolling latency and failure record of one routing tier"""
+
+    def __init__(self, window=50):
+        self.latencies = deque(maxlen=window)  # Seconds, answered requests only
+        self.outcomes = deque(maxlen=window)  # True when the tier failed or timed out
+        self.counters = {"requests": 0, "accepted": 0, "low_confidence": 0,
+                         "timeouts": 0, "errors": 0, "skipped": 0}
+        self.skipped_since_try = 0
+        self._lock = threading.Lock()
+
+    def record(self, outcome, seconds=None):
+        with self._lock:
+            self.counters["requests"] += 1
+            self.skipped_since_try = 0
+            failed = outcome in ("timeout", "error")
+            self.outcomes.append(failed)
+            if not failed:
+                self.latencies.append(seconds)
+            key = {"ok": "accepted", "low confidence": "low_confidence",
+                   "timeout": "timeouts", "error": "errors"}[outcome]
+            self.counters[key] += 1
+
+    def skip(self):
+        with self._lock:
+            self.counters["skipped"] += 1
+            self.skipped_since_try += 1
+
+    def latency_percentile(self, percentile):
+        with self._lock:
+            if not self.latencies:
+                return None
+            return float(np.percentile(self.latencies, percentile))
+
+    def failure_rate(self):
+        with self._lock:
+            return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.counters)
+            samples = len(self.outcomes)
+        stats["failure_rate"] = self.failure_rate()
+        for percentile in (50, 95):
+            value = self.latency_percentile(percentile)
+            stats[f"p{percentile}_ms"] = None if value is None else round(value * 1000)
+        stats["samples"] = samples
+        return stats
+
+
+class Tier:
+    """One way of extracting a capture, with the limits it's trusted with"""
+
+    def __init__(self, label, backend, max_pixels=None, min_confidence=None, timeout=None):
+        self.label = label
+        self.backend = backend
+        self.max_pixels = max_pixels  # Larger captures go straight to the next tier
+        self.min_confidence = min_confidence  # Below this the next tier is asked too
+        self.timeout = timeout  # Seconds before giving up on this tier
+        self.stats = BackendStats()
+
+
+class BackendRouter:
+    """Picks the cheapest backend that keeps up, and escalates when it doesn't.
+
+    ``tiers`` are ordered cheapest first (say local Tesseract, a small
+    vision model, a large one). A capture goes to the first tier that
+    accepts its size and is currently healthy: its recent p95 latency is
+    within ``latency_target`` seconds and it fails less than
+    ``max_failure_rate`` of the time. An unhealthy tier is still tried
+    every ``probe_every`` captures so it can recover. When a tier times
+    out, fails or reports a confidence below its ``min_confidence`` the
+    capture moves on to the next tier; the last tier's answer is always
+    kept (a low-confidence one over none at all).
+
+    Every result carries a ``route`` describing the tiers tried and why.
+    """
+
+    def __init__(self, tiers, latency_target=None, max_failure_rate=0.5,
+                 min_samples=5, probe_every=20, reraise=()):
+        if not tiers:
+            raise ValueError("The router needs at least one tier")
+        self.tiers = tiers
+        self.latency_target = latency_target
+        self.max_failure_rate = max_failure_rate
+        self.min_samples = min_samples
+        self.probe_every = probe_every
+        self.reraise = reraise  # Exceptions that aren't a tier's fault (cancellation)
+        # Timed-out requests keep running here, their answers are ignored
+        self.pool = ThreadPoolExecutor(max_workers=4 * len(tiers),
+                                       thread_name_prefix="route-extract")
+
+    @property
+    def name(self):
+        return "router"
+
+    def prewarm(self):
+        for tier in self.tiers:
+            if hasattr(tier.backend, "prewarm"):
+                tier.backend.prewarm()
+
+    def extract(self, image, progress=None, device_pixel_ratio=1.0, on_text=None):
+        pixels = image.shape[0] * image.shape[1]
+        attempts = []
+        result = used = None
+        for index, tier in enumerate(self.tiers):
+            last = index == len(self.tiers) - 1
+            reason = self.skip_reason(tier, pixels)
+            if reason and not (last and result is None):
+                tier.stats.skip()
+                attempts.append({"backend": tier.label, "outcome": f"skipped ({reason})"})
+                continue
+
+            # Text is streamed from the last resort only, earlier tiers
+            # may still be overruled
+            start = time.perf_counter()
+            try:
+                answer = self.run(tier, image, progress, device_pixel_ratio,
+                                  on_text if last else None)
+            except self.reraise:
+                raise
+            except TimeoutError:
+                outcome, answer = "timeout", None
+            except Exception as e:
+                if last and result is None:
+                    tier.stats.record("error")
+                    raise
+                log.warning("Backend %s failed (%s), trying the next one", tier.label, e)
+                outcome, answer = "error", None
+            else:
+                low = (tier.min_confidence is not None and answer.confidence is not None
+                       and answer.confidence < tier.min_confidence)
+                outcome = "low confidence" if low else "ok"
+            seconds = time.perf_counter() - start
+            tier.stats.record(outcome, seconds)
+
+            attempt = {"backend": tier.label, "outcome": outcome, "ms": round(seconds * 1000)}
+            if answer is not None and answer.confidence is not None:
+                attempt["confidence"] = round(answer.confidence, 3)
+            attempts.append(attempt)
+            if answer is not None:
+                result, used = answer, tier
+                if outcome == "ok":
+                    break
+
+        if result is None:
+            raise TimeoutError(f"No backend answered in time ({len(attempts)} tried)")
+        if on_text and used is not self.tiers[-1]:
+            on_text(result.text)
+        route = {"backend": used.label, "attempts": attempts}
+        return ExtractionResult(result.text, result.confidence, result.payload,
+                                result.sources, route)
+
+    def skip_reason(self, tier, pixels):
+        """Why tier shouldn't get this capture, or None"""
+        if tier.max_pixels and pixels > tier.max_pixels:
+            return "too large"
+        if tier.stats.skipped_since_try + 1 >= self.probe_every:
+            return None  # Time to find out if it has recovered
+        if len(tier.stats.outcomes) >= self.min_samples:
+            if tier.stats.failure_rate() > self.max_failure_rate:
+                return "failing"
+            p95 = tier.stats.latency_percentile(95)
+            if self.latency_target and p95 and p95 > self.latency_target:
+                return "slow"
+        return None
+
+    def run(self, tier, image, progress, device_pixel_ratio, on_text):
+        if tier.timeout is None:
+            return tier.backend.extract(image, progress=progress,
+                                        device_pixel_ratio=device_pixel_ratio,
+                                        on_text=on_text)
+        abandoned = threading.Event()
+
+        def report(stage):
+            # An abandoned request keeps running, but stays quiet
+            if progress and not abandoned.is_set():
+                progress(stage)
+
+        future = self.pool.submit(tier.backend.extract, image, progress=report,
+                                  device_pixel_ratio=device_pixel_ratio, on_text=on_text)
+        done, _ = wait([future], timeout=tier.timeout)
+        if not done:
+            abandoned.set()
+            log.warning("Backend %s took longer than %ss, trying the next one",
+                        tier.label, tier.timeout)
+            raise TimeoutError()
+        return future.result()
+
+    def stats(self):
+        return {tier.label: tier.stats.snapshot() for tier in self.tiers}
+
+
+def merge_routes(results):
+    """One route for a capture extracted in parts (tiles, regions).
+
+    Attempts are summed up per backend and outcome, with the number of
+    parts and the slowest one.
+    """
+    routes = [r.route for r in results if r.route]
+    if not routes:
+        return None
+    merged = {}
+    for route in routes:
+        for attempt in route["attempts"]:
+            key = (attempt["backend"], attempt["outcome"])
+            entry = merged.setdefault(key, {"backend": key[0], "outcome": key[1], "parts": 0})
+            entry["parts"] += 1
+            if "ms" in attempt:
+                entry["ms"] = max(entry.get("ms", 0), attempt["ms"])
+    return {
+        "backend": " + ".join(sorted({route["backend"] for route in routes})),
+        "attempts": list(merged.values()),
+    }
@@ -1,9 +1,21 @@
-from PyQt6.QtWidgets import QWidget, QRubberBand, QApplication
-from PyQt6.QtCore import Qt, QRect, QPoint
-from PyQt6.QtGui import QScreen, QGuiApplication, QColor, QPainter, QBrush, QCursor
+from PyQt6.QtWidgets import QWidget, QApplication
+from PyQt6.QtCore import Qt, QRect, QRectF, QPoint
+from PyQt6.QtGui import QScreen, QGuiApplication, QColor, QPainter, QBrush, QCursor, QPixmap, QRegion, QPen
+import time
+import numpy as np
+from .frozen_frame import FrozenFrame, grab_rect
+from .instrumentation import Metrics, span
+from .log import get_logger
+
+log = get_logger(__name__)
+
+DIM_COLOR = QColor(0, 0, 0, 100)  # 40% opacity black
+
+# Selection border width, repainted with the selection
+BORDER = 2
 
 class ScreenCaptureWidget(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, frame_stats=False):
         super().__init__(parent)
         self.parent = parent
         self.setWindowFlags(
@@ -14,18 +26,34 @@ class ScreenCaptureWidget(QWidget):
         )
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
         self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose, False)  # Prevent auto-deletion
-        self.rubberband = None
         self.origin = QPoint()
         self.setCursor(Qt.CursorShape.CrossCursor)
+        # Drawn by paintEvent itself: a rubber band child widget would make
+        # every move repaint the overlay under its whole old and new area
         self.selection = QRect()
+        self.shown_span = None  # Ended once the overlay is first painted
+        self.last_region = None  # Desktop rect of the last selection, to repeat it
+        self.frame = None  # FrozenFrame shown behind the overlay while selecting
+        self.pin_mode = False  # Pin the selection for watching instead of capturing it
+        self.dim_layer = None  # Pre-rendered overlay, rebuilt when the size changes
+        # Frame-time mode: time every repaint of a drag and report it on release
+        self.frame_stats = frame_stats
+        self.frames = []  # (paint seconds, seconds since the previous paint)
+        self.last_paint = None
         
     def start_capture(self):
-        print("ScreenCaptureWidget.start_capture called")  # Debug print
         try:
-            # Get all screens
-            geometry = QRect()
-            for screen in QGuiApplication.screens():
-                geometry = geometry.united(screen.geometry())
+            # Freeze every screen as it is now; the selection is cut from this
+            with span("freeze", trace_memory=False):
+                self.frame = FrozenFrame.grab()
+            if self.frame:
+                geometry = self.frame.geometry
+            else:
+                # Nothing grabbed (some Wayland sessions): select over the live desktop
+                geometry = QRect()
+                for screen in QGuiApplication.screens():
+                    geometry = geometry.united(screen.geometry())
+            self.dim_layer = None
             
             # Show the widget covering all screens
             self.setGeometry(geometry)
@@ -36,100 +64,173 @@ class ScreenCaptureWidget(QWidget):
             # Force the window to be active and on top
             self.setWindowState(self.windowState() & ~Qt.WindowState.WindowMinimized | Qt.WindowState.WindowActive)
             
-            print(f"Screen capture widget shown at geometry: {geometry}")  # Debug print
-            print(f"Widget is visible: {self.isVisible()}")  # Debug print
-            print(f"Widget is active: {self.isActiveWindow()}")  # Debug print
+            log.debug("Capture overlay shown at %s, visible %s, active %s",
+                      geometry, self.isVisible(), self.isActiveWindow())
             
-        except Exception as e:
-            print(f"Error in start_capture: {e}")  # Debug print
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            log.exception("Error in start_capture")
             
     def hideEvent(self, event):
-        print("ScreenCaptureWidget hidden")  # Debug print
-        if self.rubberband:
-            self.rubberband.hide()
+        self.selection = QRect()
+        # Desktop-sized images, not worth keeping between captures. Captures
+        # still being processed keep their frame alive through their crop
+        self.dim_layer = None
+        self.frame = None
         super().hideEvent(event)
         
+    def resizeEvent(self, event):
+        self.dim_layer = None
+        super().resizeEvent(event)
+        
     def showEvent(self, event):
-        print("ScreenCaptureWidget shown")  # Debug print
         super().showEvent(event)
         
+    def render_dim_layer(self):
+        """The darkened screen, at device resolution, drawn piecewise by paintEvent"""
+        if self.frame:
+            layer = QPixmap.fromImage(self.frame.image)
+            painter = QPainter(layer)
+            painter.fillRect(layer.rect(), DIM_COLOR)
+            painter.end()
+            layer.setDevicePixelRatio(self.frame.ratio)
+            return layer
+        ratio = self.devicePixelRatioF()
+        layer = QPixmap(round(self.width() * ratio), round(self.height() * ratio))
+        layer.setDevicePixelRatio(ratio)
+        layer.fill(DIM_COLOR)
+        return layer
+        
+    @staticmethod
+    def source_rect(rect, ratio):
+        return QRectF(rect.x() * ratio, rect.y() * ratio, rect.width() * ratio, rect.height() * ratio)
+        
     def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        start = time.perf_counter() if self.frame_stats else None
+        if self.dim_layer is None:
+            self.dim_layer = self.render_dim_layer()
         
-        # Draw semi-transparent overlay
-        painter.setBrush(QBrush(QColor(0, 0, 0, 100)))  # 40% opacity black
-        painter.setPen(Qt.PenStyle.NoPen)
+        painter = QPainter(self)
+        # Only the invalidated part is drawn, and the selection is left
+        # clear (or shows the frozen frame undimmed)
+        selection = self.selection
+        region = event.region()
+        if not selection.isEmpty():
+            region = region.subtracted(QRegion(selection))
+        painter.setClipRegion(region)
+        dirty = event.rect()
+        painter.drawPixmap(QRectF(dirty), self.dim_layer,
+                           self.source_rect(dirty, self.dim_layer.devicePixelRatio()))
         
-        # Draw the darkened area
-        if self.rubberband and self.rubberband.isVisible():
-            selection = self.rubberband.geometry()
-            # Draw the outside areas
-            painter.drawRect(0, 0, self.width(), selection.top())  # Top
-            painter.drawRect(0, selection.bottom(), self.width(), self.height() - selection.bottom())  # Bottom
-            painter.drawRect(0, selection.top(), selection.left(), selection.height())  # Left
-            painter.drawRect(selection.right(), selection.top(), self.width() - selection.right(), selection.height())  # Right
-            
-            # Draw selection border
-            painter.setPen(Qt.GlobalColor.green)
+        if not selection.isEmpty():
+            painter.setClipRegion(event.region())
+            if self.frame:
+                inside = selection.intersected(dirty)
+                painter.drawImage(QRectF(inside), self.frame.image,
+                                  self.source_rect(inside, self.frame.ratio))
+            painter.setPen(QPen(Qt.GlobalColor.green, 1))
             painter.setBrush(Qt.BrushStyle.NoBrush)
             painter.drawRect(selection)
-        else:
-            painter.drawRect(0, 0, self.width(), self.height())
+        painter.end()
+        
+        if self.shown_span:
+            self.shown_span.end()
+            self.shown_span = None
+        if start is not None:
+            self.record_frame(start)
+            
+    def record_frame(self, start):
+        now = time.perf_counter()
+        interval = now - self.last_paint if self.last_paint else None
+        self.last_paint = now
+        self.frames.append((now - start, interval))
+        
+    def report_frames(self):
+        """Log the paint times and frame rate of the drag that just ended"""
+        frames, self.frames, self.last_paint = self.frames, [], None
+        if len(frames) < 2:
+            return
+        paint = np.array([seconds for seconds, _ in frames]) * 1000
+        # Gaps longer than this are the mouse resting, not slow frames
+        intervals = np.array([i for _, i in frames[1:] if i is not None and i < 0.25]) * 1000
+        metrics = Metrics.instance()
+        for seconds, _ in frames:
+            metrics.record("overlay_paint", seconds)
+        refresh = QGuiApplication.primaryScreen().refreshRate()
+        message = (f"Overlay drag at {self.width()}x{self.height()}: {len(frames)} frames, "
+                   f"paint p50 {np.percentile(paint, 50):.2f} ms, p95 {np.percentile(paint, 95):.2f} ms")
+        if intervals.size:
+            message += (f", frame interval p50 {np.percentile(intervals, 50):.1f} ms, "
+                        f"p95 {np.percentile(intervals, 95):.1f} ms "
+                        f"(display {1000 / refresh:.1f} ms at {refresh:.0f} Hz)")
+        log.info(message)
         
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
             self.origin = event.pos()
-            if not self.rubberband:
-                self.rubberband = QRubberBand(QRubberBand.Shape.Rectangle, self)
-            self.rubberband.setGeometry(QRect(self.origin, QPoint()))
-            self.rubberband.show()
+            self.set_selection(QRect(self.origin, self.origin))
+            self.frames, self.last_paint = [], None
         
     def mouseMoveEvent(self, event):
-        if self.rubberband and event.buttons() & Qt.MouseButton.LeftButton:
-            self.rubberband.setGeometry(
-                QRect(self.origin, event.pos()).normalized()
-            )
-            self.update()  # Force a repaint
+        if event.buttons() & Qt.MouseButton.LeftButton:
+            self.set_selection(QRect(self.origin, event.pos()).normalized())
+            
+    def set_selection(self, new):
+        old, self.selection = self.selection, new
+        # Only what changed: the area between the two selections and both
+        # borders. Repainting the whole desktop-sized overlay lags the
+        # drag on large multi-monitor setups
+        dirty = QRegion(old).xored(QRegion(new))
+        for rect in (old, new):
+            if not rect.isEmpty():
+                outer = rect.adjusted(-BORDER, -BORDER, BORDER, BORDER)
+                dirty = dirty.united(QRegion(outer).subtracted(
+                    QRegion(rect.adjusted(BORDER, BORDER, -BORDER, -BORDER))))
+        self.update(dirty)
             
     def mouseReleaseEvent(self, event):
-        if self.rubberband and event.button() == Qt.MouseButton.LeftButton:
-            geometry = self.rubberband.geometry()
+        if event.button() == Qt.MouseButton.LeftButton and not self.selection.isNull():
+            geometry = self.selection
+            if self.frame_stats:
+                self.report_frames()
             if geometry.width() > 10 and geometry.height() > 10:
-                self.rubberband.hide()
+                # A live grab is allocated by Qt, tracemalloc wouldn't see it
+                grab_span = span("selection_to_grab", trace_memory=False)
+                self.set_selection(QRect())
+                self.last_region = geometry.translated(self.pos())
+                if self.frame:
+                    # A view into the frozen frame, across monitors if need be
+                    image = self.frame.crop(geometry)
+                    ratio = self.frame.ratio
+                else:
+                    image = self.grab_live(geometry.translated(self.pos()))
+                    ratio = image.devicePixelRatio() if image else 1.0
+                grab_span.end()
                 
-                # Find the screen that contains the selection
-                screen = None
-                for s in QGuiApplication.screens():
-                    if s.geometry().contains(geometry.center() + self.pos()):
-                        screen = s
-                        break
-                        
-                if screen:
-                    screen_geometry = screen.geometry()
-                    adjusted_geometry = QRect(
-                        geometry.x() + self.pos().x() - screen_geometry.x(),
-                        geometry.y() + self.pos().y() - screen_geometry.y(),
-                        geometry.width(),
-                        geometry.height()
-                    )
-                    
-                    pixmap = screen.grabWindow(
-                        0,
-                        adjusted_geometry.x(),
-                        adjusted_geometry.y(),
-                        adjusted_geometry.width(),
-                        adjusted_geometry.height()
-                    )
-                    
-                    self.hide()
-                    # Get the current mouse position using globalPosition()
-                    mouse_pos = event.globalPosition().toPoint()
-                    # Pass to parent's tray_app if available
-                    if hasattr(self.parent, 'tray_app'):
-                        self.parent.tray_app.process_capture(pixmap, mouse_pos)
+                self.hide()
+                if image is None or not hasattr(self.parent, 'tray_app'):
+                    return
+                # Shift on release pins the selection too
+                if self.pin_mode or event.modifiers() & Qt.KeyboardModifier.ShiftModifier:
+                    self.parent.tray_app.pin_region(self.last_region, image, ratio)
+                    return
+                # Get the current mouse position using globalPosition()
+                mouse_pos = event.globalPosition().toPoint()
+                self.parent.tray_app.process_capture(image, mouse_pos, ratio)
+            
+    @staticmethod
+    def grab_live(rect):
+        """Grab a desktop rect from the screen containing its center, or None"""
+        for screen in QGuiApplication.screens():
+            if screen.geometry().contains(rect.center()):
+                return screen.grabWindow(0, *rect.translated(-screen.geometry().topLeft()).getRect())
+        return None
+        
+    def grab_last_region(self):
+        """Grab the area selected last time again as (array, device pixel
+        ratio), or None if there isn't one"""
+        if not self.last_region:
+            return None
+        return grab_rect(self.last_region)
             
     def keyPressEvent(self, event):
         if event.key() == Qt.Key.Key_Escape:
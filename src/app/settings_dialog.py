@@ -3,14 +3,12 @@ from PyQt6.QtWidgets import (
     QLabel, QPushButton, QLineEdit
 )
 from PyQt6.QtCore import Qt
-from pynput import keyboard
+from .input_service import InputService
 
 class HotkeyLineEdit(QLineEdit):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.pressed_keys = set()
         self.current_hotkey = set()
-        self.listener = None
         self.setReadOnly(True)
         
         # Initialize with current hotkey - extract just the letter
@@ -25,23 +23,13 @@ class HotkeyLineEdit(QLineEdit):
         self.start_listener()
         
     def start_listener(self):
-        def on_press(key):
-            try:
-                # Only interested in character keys
-                if hasattr(key, 'char') and key.char:
-                    key_str = key.char.upper()
-                    # Only accept letters
-                    if key_str.isalpha():
-                        self.current_hotkey = {'ALT', 'SHIFT', key_str}
-                        self.update_text()
-            except:
-                pass
-                
-        def on_release(key):
-            pass  # No need to handle key release
+        InputService.instance().subscribe(self.on_key)
         
-        self.listener = keyboard.Listener(on_press=on_press, on_release=on_release)
-        self.listener.start()
+    def on_key(self, pressed, key):
+        # Only letters, combined with Alt+Shift
+        if pressed and len(key) == 1 and key.isalpha():
+            self.current_hotkey = {'ALT', 'SHIFT', key}
+            self.update_text()
         
     def update_text(self):
         # Always show the current hotkey
@@ -51,9 +39,8 @@ class HotkeyLineEdit(QLineEdit):
             self.clear()
         
     def stop_listener(self):
-        if self.listener:
-            self.listener.stop()
-            self.listener.join()
+        # The shared hook keeps running for the hotkeys
+        InputService.instance().unsubscribe(self.on_key)
 
 class SettingsDialog(QDialog):
     def __init__(self, parent=None, current_hotkey="Alt+Shift+S"):
@@ -94,6 +81,7 @@ class SettingsDialog(QDialog):
     def get_hotkey(self):
         return self.hotkey_input.text()
         
-    def closeEvent(self, event):
+    def done(self, result):
+        # Save, Cancel and Escape all end here, closeEvent only sees the X button
         self.hotkey_input.stop_listener()
-        super().closeEvent(event)
\ No newline at end of file
+        super().done(result)
\ No newline at end of file
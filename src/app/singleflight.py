@@ -0,0 +1,74 @@
+from concurrent.futures import Future, wait
+import copy
+import threading
+
+
+class SingleFlight:
+    """Lets concurrent callers with the same key share one call.
+
+    The first caller for a key runs the function; callers that arrive while
+    it is still running wait for it and get (a copy of) the same result or
+    exception. Nothing is kept once the call returns, that's the cache's
+    job. Exceptions in ``retry_on`` (a cancelled leader) aren't shared, the
+    waiting callers start over and one of them runs the call itself.
+    """
+
+    def __init__(self, retry_on=()):
+        self.retry_on = retry_on
+        self.counters = {"calls": 0, "shared": 0}
+        self._flights = {}  # key -> Future of the call in flight
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, is_cancelled=None, cancelled=RuntimeError):
+        """Return (fn() or the result of the same call in flight, shared).
+
+        While waiting, ``is_cancelled`` is polled and ``cancelled`` (an
+        exception type, RuntimeError by default) is raised when it returns
+        True.
+        """
+        while True:
+            with self._lock:
+                future = self._flights.get(key)
+                leader = future is None
+                if leader:
+                    future = self._flights[key] = Future()
+                    self.counters["calls"] += 1
+
+            if leader:
+                try:
+                    result = fn()
+                except BaseException as e:
+                    self._land(key)
+                    future.set_exception(e)
+                    raise
+                self._land(key)
+                # Waiters copy from their own snapshot, not from the result
+                # the leader's caller may be modifying
+                future.set_result(copy.deepcopy(result))
+                return result, False
+
+            while not future.done():
+                if is_cancelled and is_cancelled():
+                    raise cancelled()
+                wait([future], timeout=0.1)
+            try:
+                result = future.result()
+            except self.retry_on:
+                continue
+            with self._lock:
+                self.counters["shared"] += 1
+            # Callers are free to modify what they get back
+            return copy.deepcopy(result), True
+
+    def _land(self, key):
+        # Callers arriving from now on start a new call (or hit the cache)
+        with self._lock:
+            del self._flights[key]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["in_flight"] = len(self._flights)
+        requested = stats["calls"] + stats["shared"]
+        stats["saved_rate"] = stats["shared"] / requested if requested else 0.0
+        return stats
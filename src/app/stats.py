@@ -0,0 +1,135 @@
+import numpy as np
+
+PERCENTILES = (10, 25, 75, 90, 95)
+HISTOGRAM_BINS = 10
+# Tukey fences: values further than this many IQRs outside the quartiles
+OUTLIER_IQR = 1.5
+
+
+def format_minutes(minutes):
+    """Minutes (int or float) as H:MM"""
+    minutes = int(round(minutes))
+    sign = "-" if minutes < 0 else ""
+    hours, minutes = divmod(abs(minutes), 60)
+    return f"{sign}{hours}:{minutes:02d}"
+
+
+def empty_stats():
+    return {
+        "count": 0,
+        "total": 0,
+        "mean": 0.0,
+        "median": 0.0,
+        "min": 0,
+        "max": 0,
+        "std": 0.0,
+        "percentiles": {f"p{p}": 0.0 for p in PERCENTILES},
+        "histogram": {"edges": [], "counts": []},
+        "outliers": [],
+    }
+
+
+def compute_stats(values, bins=HISTOGRAM_BINS):
+    """Summary statistics for one capture's values (minutes).
+
+    ``outliers`` holds the indices of values outside the Tukey fences.
+    """
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.size == 0:
+        return empty_stats()
+
+    # One partition gives the quartiles, median and tails together
+    qs = np.percentile(arr, (0, 25, 50, 75, 100) + PERCENTILES)
+    minimum, q1, median, q3, maximum = qs[:5]
+    iqr = q3 - q1
+    outliers = np.flatnonzero(
+        (arr < q1 - OUTLIER_IQR * iqr) | (arr > q3 + OUTLIER_IQR * iqr)
+    )
+    counts, edges = np.histogram(arr, bins=min(bins, max(1, np.unique(arr).size)))
+
+    total = arr.sum()
+    return {
+        "count": int(arr.size),
+        "total": float(total),
+        "mean": float(total / arr.size),
+        "median": float(median),
+        "min": float(minimum),
+        "max": float(maximum),
+        "std": float(arr.std()),
+        "percentiles": {f"p{p}": float(q) for p, q in zip(PERCENTILES, qs[5:])},
+        "histogram": {"edges": edges.tolist(), "counts": counts.tolist()},
+        "outliers": outliers.tolist(),
+    }
+
+
+def compute_bulk(groups):
+    """compute_stats for many captures at once, without a Python loop per value.
+
+    ``groups`` is a sequence of value lists (one per capture). Returns one
+    stats dict per group; histograms are left out here since every capture
+    would need its own bins.
+    """
+    lengths = np.fromiter((len(g) for g in groups), dtype=np.int64, count=len(groups))
+    n_groups = lengths.size
+    if n_groups == 0:
+        return []
+    if lengths.sum() == 0:
+        return [empty_stats() for _ in range(n_groups)]
+
+    values = np.concatenate([np.asarray(g, dtype=np.float64) for g in groups if len(g)])
+    group_ids = np.repeat(np.arange(n_groups), lengths)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    # Sort values within each group, groups stay in order
+    order = np.lexsort((values, group_ids))
+    ordered = values[order]
+
+    counts = lengths.astype(np.float64)
+    safe_counts = np.maximum(counts, 1)
+    totals = np.bincount(group_ids, weights=values, minlength=n_groups)
+    means = totals / safe_counts
+    squares = np.bincount(group_ids, weights=values * values, minlength=n_groups)
+    stds = np.sqrt(np.maximum(squares / safe_counts - means * means, 0))
+
+    def percentile(p):
+        # Linear interpolation between closest ranks, as np.percentile does
+        rank = (lengths - 1).clip(min=0) * (p / 100)
+        low = np.floor(rank).astype(np.int64)
+        high = np.minimum(low + 1, (lengths - 1).clip(min=0))
+        frac = rank - low
+        idx_low = np.minimum(starts + low, ordered.size - 1)
+        idx_high = np.minimum(starts + high, ordered.size - 1)
+        return ordered[idx_low] * (1 - frac) + ordered[idx_high] * frac
+
+    q1, median, q3 = percentile(25), percentile(50), percentile(75)
+    tails = {p: percentile(p) for p in PERCENTILES}
+    minimum, maximum = percentile(0), percentile(100)
+
+    # Outlier flags for every value at once, mapped back to per-group indices
+    iqr = q3 - q1
+    low_fence = (q1 - OUTLIER_IQR * iqr)[group_ids]
+    high_fence = (q3 + OUTLIER_IQR * iqr)[group_ids]
+    flagged = np.flatnonzero((values < low_fence) | (values > high_fence))
+    outliers = [[] for _ in range(n_groups)]
+    for index in flagged:
+        group = group_ids[index]
+        outliers[group].append(int(index - starts[group]))
+
+    results = []
+    for i in range(n_groups):
+        if lengths[i] == 0:
+            results.append(empty_stats())
+            continue
+        stats = {
+            "count": int(lengths[i]),
+            "total": float(totals[i]),
+            "mean": float(means[i]),
+            "median": float(median[i]),
+            "min": float(minimum[i]),
+            "max": float(maximum[i]),
+            "std": float(stds[i]),
+            "percentiles": {f"p{p}": float(tails[p][i]) for p in PERCENTILES},
+            "outliers": outliers[i],
+        }
+        results.append(stats)
+    return results
@@ -0,0 +1,42 @@
+import re
+
+# Values never span a line (or a ';'), so once one of these has arrived
+# the text before it can't change meaning
+SEPARATOR = re.compile(r'[\r\n;]')
+
+
+class IncrementalScanner:
+    """Runs a text parser over a stream of chunks as they arrive.
+
+    Text is only parsed up to the last separator seen so far, so a value
+    split across chunks ("1:" + "30", "1h " + "30m") is held back until it
+    is complete and is never reported twice. ``parse`` is the same function
+    used on the full text (tokenizer.scan), so the streamed values always
+    agree with the final result.
+    """
+
+    def __init__(self, parse):
+        self.parse = parse
+        self.text = ""
+        self._done = 0  # Offset up to which text has been parsed
+
+    def feed(self, chunk):
+        """Add a chunk and return parse() of the text it completed, or None"""
+        if not chunk:
+            return None
+        self.text += chunk
+        last = None
+        for last in SEPARATOR.finditer(self.text, self._done):
+            pass
+        if last is None:
+            return None
+        end = last.end()
+        values = self.parse(self.text[self._done:end])
+        self._done = end
+        return values
+
+    def finish(self):
+        """Parse whatever is left once the stream has ended"""
+        values = self.parse(self.text[self._done:])
+        self._done = len(self.text)
+        return values
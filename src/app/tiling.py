@@ -0,0 +1,259 @@
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from .backends import ExtractionResult
+from .preprocess import Preprocessor, find_ink
+from .router import merge_routes
+from .log import get_logger
+
+log = get_logger(__name__)
+
+# Pixel box of a tile: rows y0:y1, columns x0:x1
+Tile = namedtuple("Tile", ["y0", "y1", "x0", "x1"])
+
+# A cut that had to go through ink: the strip around it and the two tiles
+# on either side, which both contain whatever the strip contains
+Seam = namedtuple("Seam", ["strip", "before", "after"])
+
+# Narrowest blank run (pixels) accepted as a gap between values
+MIN_GAP = 4
+
+# Side of the central square the text height is measured on
+SAMPLE_SIZE = 1024
+
+
+class TiledExtractor:
+    """Splits very large captures into tiles and extracts them concurrently.
+
+    A selection spanning several screens is far larger than what a vision
+    model reads at full resolution, and a single response only has room for
+    ``max_tokens`` of values. Captures larger than ``max_tile_width`` x
+    ``max_tile_height`` are cut into tiles along blank rows (between text
+    lines) and then blank columns, each tile is sent as its own request and
+    the texts are joined back in reading order.
+
+    Where no blank row or column exists within reach, the cut goes through
+    the emptiest one instead and both tiles extend ``overlap`` pixels past
+    it, so a value on the cut is whole in at least one tile. The strip
+    around such a cut is extracted on its own as well; values found in the
+    strip and in both tiles are counted once.
+
+    ``parse`` turns a text into its values; ``parse_lines``, when given,
+    does the same for every line of a text at once (much cheaper than
+    calling ``parse`` on each line of every tile).
+    """
+
+    def __init__(self, backend, parse, max_tile_width=2048, max_tile_height=1024,
+                 overlap=64, max_workers=16, parse_lines=None):
+        self.backend = backend
+        self.parse = parse
+        self.parse_lines = parse_lines
+        self.max_tile_width = max_tile_width
+        self.max_tile_height = max_tile_height
+        self.overlap = overlap
+        self.pool = ThreadPoolExecutor(max_workers=max_workers,
+                                       thread_name_prefix="tile-extract")
+
+    @property
+    def name(self):
+        return self.backend.name
+
+    def needs_tiling(self, image):
+        height, width = image.shape[:2]
+        return width > self.max_tile_width or height > self.max_tile_height
+
+    def extract(self, image, progress=None, device_pixel_ratio=1.0, on_text=None):
+        ink = self.ink_mask(image)
+        tiles, seams = self.plan(ink)
+        log.debug("Split %dx%d capture into %d tiles (%d cut through text)",
+                  image.shape[1], image.shape[0], len(tiles), len(seams))
+
+        if progress:
+            progress("uploading")
+        # Tiles first, seam strips after; blank tiles aren't worth a request
+        boxes = list(tiles) + [seam.strip for seam in seams]
+        jobs = {}
+        for index, box in enumerate(boxes):
+            if not ink[box.y0:box.y1, box.x0:box.x1].any():
+                continue
+            crop = image[box.y0:box.y1, box.x0:box.x1]
+            future = self.pool.submit(self.backend.extract, crop,
+                                      device_pixel_ratio=device_pixel_ratio)
+            jobs[future] = index
+
+        results = [None] * len(boxes)
+        pending = set(jobs)
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[jobs[future]] = future.result()
+                if progress:
+                    # Also where a cancelled job stops waiting
+                    progress(f"tiles {len(jobs) - len(pending)}/{len(jobs)}")
+        finally:
+            for future in pending:
+                future.cancel()
+
+        texts = [result.text if result else "" for result in results]
+        text = self.merge(texts[:len(tiles)], texts[len(tiles):], seams)
+        if on_text:
+            on_text(text)
+
+        extracted = [result for result in results if result]
+        confidences = [r.confidence for r in extracted if r.confidence is not None]
+        confidence = sum(confidences) / len(confidences) if confidences else None
+        return ExtractionResult(text, confidence, self.payload(image, extracted),
+                                route=merge_routes(extracted))
+
+    @staticmethod
+    def ink_mask(image):
+        """Pixels that differ from the background, without long rules.
+
+        Table rules run straight through every gap between values.
+        """
+        return find_ink(image, ignore_rules=True)[0]
+
+    def plan(self, ink):
+        """Return (tiles in reading order, seams that cut through ink)"""
+        tiles, seams = [], []
+        height, width = ink.shape
+        # Gaps between letters and around colons are not gaps between values
+        text_height = Preprocessor.estimate_text_height(self.sample(ink))
+        min_gap = max(MIN_GAP, int(text_height * 0.75)) if text_height else 2 * MIN_GAP
+        bands, band_seams = self.cuts(ink.sum(axis=1), self.max_tile_height, min_gap)
+
+        band_first = []  # Index of the first tile in every band
+        for y0, y1 in bands:
+            band_first.append(len(tiles))
+            band = ink[y0:y1]
+            columns, column_seams = self.cuts(band.sum(axis=0), self.max_tile_width, min_gap)
+            for x0, x1 in columns:
+                tiles.append(Tile(y0, y1, x0, x1))
+            for position, before in column_seams:
+                x0, x1 = max(0, position - self.overlap), min(width, position + self.overlap)
+                index = band_first[-1] + before
+                seams.append(Seam(Tile(y0, y1, x0, x1), [index], [index + 1]))
+
+        # A band cut spans every tile of the band above and below it
+        band_first.append(len(tiles))
+        for position, before in band_seams:
+            y0, y1 = max(0, position - self.overlap), min(height, position + self.overlap)
+            seams.append(Seam(
+                Tile(y0, y1, 0, width),
+                list(range(band_first[before], band_first[before + 1])),
+                list(range(band_first[before + 1], band_first[before + 2]))
+            ))
+        return tiles, seams
+
+    @staticmethod
+    def sample(ink, size=SAMPLE_SIZE):
+        """Central crop of the mask, enough to measure the text height on"""
+        height, width = ink.shape
+        y0, x0 = max(0, (height - size) // 2), max(0, (width - size) // 2)
+        return ink[y0:y0 + size, x0:x0 + size]
+
+    def cuts(self, profile, limit, min_gap=1):
+        """Split one axis into spans of at most ``limit`` (plus overlap).
+
+        ``profile`` is the ink pixel count of every row/column. Returns the
+        (start, end) spans and (position, span index) for every cut that had
+        to go through ink. Only blank runs of ``min_gap`` or more count as gaps.
+        """
+        length = profile.size
+        spans, hard = [], []
+        start = 0
+        while length - start > limit:
+            # Look for a gap in the far half of the reach, to keep tiles big
+            low = start + limit // 2
+            window = profile[low:start + limit]
+            # Blank runs as [run_starts, run_ends) pairs
+            edges = np.diff(np.concatenate(([0], (window == 0).astype(np.int8), [0])))
+            run_starts, run_ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+            wide = np.flatnonzero(run_ends - run_starts >= min_gap)
+            if wide.size:
+                # Middle of the last wide enough gap
+                run = wide[-1]
+                cut = low + (run_starts[run] + run_ends[run]) // 2
+                spans.append((start, cut))
+            else:
+                # Emptiest line that leaves room for the overlap
+                reach = max(1, window.size - self.overlap)
+                cut = low + int(np.argmin(window[:reach]))
+                hard.append((cut, len(spans)))
+                spans.append((start, cut))
+            start = cut
+        spans.append((start, length))
+
+        # Tiles on either side of a hard cut both cover the strip around it
+        for cut, index in hard:
+            spans[index] = (spans[index][0], min(length, cut + self.overlap))
+            spans[index + 1] = (max(0, cut - self.overlap), spans[index + 1][1])
+        return spans, hard
+
+    def merge(self, tile_texts, strip_texts, seams):
+        """Join tile texts, dropping values counted twice around hard cuts"""
+        found = [Counter(self.parse(text)) for text in tile_texts]
+        drop = [Counter() for _ in tile_texts]
+        for seam, strip_text in zip(seams, strip_texts):
+            in_strip = Counter(self.parse(strip_text))
+            if not in_strip:
+                continue
+            before = Counter()
+            for i in seam.before:
+                before.update(found[i])
+            after = Counter()
+            for i in seam.after:
+                after.update(found[i] - drop[i])
+            for value, count in in_strip.items():
+                duplicates = min(count, before[value], after[value])
+                # Drop them from the tiles after the cut, first tile that has them
+                for i in seam.after:
+                    if duplicates <= 0:
+                        break
+                    taken = min(found[i][value] - drop[i][value], duplicates)
+                    drop[i][value] += taken
+                    duplicates -= taken
+
+        kept = []
+        for text, dropping in zip(tile_texts, drop):
+            if +dropping:
+                text = self.drop_values(text, dropping)
+            if text:
+                kept.append(text.strip())
+        return "\n".join(kept)
+
+    def drop_values(self, text, dropping):
+        """Remove lines whose values are all scheduled for dropping"""
+        dropping = Counter(dropping)
+        lines = text.splitlines()
+        if self.parse_lines:
+            parsed = self.parse_lines(text)
+        else:
+            parsed = [self.parse(line) for line in lines]
+        kept = []
+        for line, values in zip(lines, parsed):
+            # Mostly one value per line, not worth a Counter
+            values = Counter(values) if len(values) > 1 else dict.fromkeys(values, 1)
+            if values and all(dropping[v] >= n for v, n in values.items()):
+                for value, n in values.items():
+                    dropping[value] -= n
+                continue
+            kept.append(line)
+        return "\n".join(kept)
+
+    @staticmethod
+    def payload(image, results):
+        payloads = [r.payload for r in results if r.payload]
+        if not payloads:
+            return None
+        return {
+            "original_bytes": image.shape[0] * image.shape[1] * 3,
+            "encoded_bytes": sum(p["encoded_bytes"] for p in payloads),
+            "base64_bytes": sum(p["base64_bytes"] for p in payloads),
+            "mime": payloads[0]["mime"],
+            "size": [image.shape[1], image.shape[0]],
+            "tiles": len(payloads),
+        }
@@ -0,0 +1,168 @@
+from collections import namedtuple
+import re
+
+import numpy as np
+
+# Every value kind is one alternative of a single pattern, so the whole
+# text is scanned once (by findall, in C) and each match comes back as a
+# row of group strings. Which group is non-empty tells the kind, and the
+# numbers are converted column by column with NumPy afterwards instead of
+# splitting every token again in Python.
+#
+# Values never span a line break ([ \t] instead of \s), so text can be
+# scanned line by line (see streaming.IncrementalScanner) with the same
+# result as all at once.
+_ = r'[ \t]?'
+AMOUNT = r'\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?'
+PATTERN = re.compile(
+    # Every value starts with a digit, a currency symbol or a minus sign,
+    # checking that first lets the scan skip words quickly. Nor does it start
+    # in the middle of a number, "1,5 h" is not 5 hours
+    r'(?=[\d$€£-])(?<![\w.:/])(?<!\d,)(?:'
+    r'(\d{4})-(\d{1,2})-(\d{1,2})'                       # 0-2   2024-03-15
+    r'|(\d{1,2})\.(\d{1,2})\.(\d{4})'                    # 3-5   15.03.2024 (day first)
+    r'|(\d{1,2})/(\d{1,2})/(\d{4}|\d{2})'                # 6-8   03/15/2024 (month first)
+    r'|(\d{1,3}):([0-5]\d)(?::([0-5]\d))?'                # 9-11  25:30, 1:02:03
+    r'|(\d+(?:\.\d+|,\d{1,2})?)' + _ + r'h(?:ours?|rs?)?'  # 12  7.5h, 1,5 h, 2 hours
+    r'(?:' + _ + r'(\d{1,2})' + _ + r'm(?:in(?:ute)?s?)?)?'  # 13    ... 30m
+    r'|(\d+)' + _ + r'm(?:in(?:ute)?s?)?'                # 14    45 min
+    r'|(-?\d+(?:[.,]\d+)?)' + _ + r'%'                   # 15    12.5%
+    r'|([$€£])' + _ + r'(' + AMOUNT + r')'               # 16-17 $1,250.00
+    r'|(' + AMOUNT + r')' + _ + r'(USD|EUR|GBP|[$€£])'   # 18-19 30 EUR
+    r')(?![\w:/]|[.,]\d)'
+)
+
+CURRENCY_CODES = {"$": "USD", "€": "EUR", "£": "GBP"}
+
+# durations: int64 seconds, in the order they appear
+# duration_text: the same durations normalized to H:MM (H:MM:SS with seconds)
+# percentages: float64, amounts: float64 with currencies: ISO codes
+# dates: datetime64[D]
+Tokens = namedtuple(
+    "Tokens",
+    ["durations", "duration_text", "percentages", "amounts", "currencies", "dates"]
+)
+
+
+def empty_tokens():
+    return Tokens(
+        np.zeros(0, np.int64), [], np.zeros(0), np.zeros(0),
+        np.zeros(0, "<U3"), np.zeros(0, "datetime64[D]")
+    )
+
+
+def scan(text):
+    """Find every duration, percentage, amount and date in text"""
+    rows = PATTERN.findall(text) if text else []
+    if not rows:
+        return empty_tokens()
+    # Object arrays keep the group strings as they are, a fixed-width
+    # unicode table costs more to build than the scan itself
+    table = np.array(rows, dtype=object)
+    present = table != ""
+
+    seconds, is_duration = durations_from(table, present)
+    durations = seconds[is_duration]
+
+    # Each kind is only converted when there is some of it: short texts
+    # (a line, a tile) mostly hold durations and nothing else
+    percentages = np.zeros(0)
+    if present[:, 15].any():
+        percentages = to_float(table[present[:, 15], 15], ",", ".")
+
+    prefix, suffix = present[:, 16], present[:, 18]
+    amounts, currencies = np.zeros(0), np.zeros(0, "<U3")
+    if prefix.any() or suffix.any():
+        order = np.argsort(np.concatenate([np.flatnonzero(prefix), np.flatnonzero(suffix)]),
+                           kind="stable")
+        amounts = np.concatenate([table[prefix, 17], table[suffix, 18]])[order]
+        amounts = to_float(amounts, ",", "")
+        symbols = np.concatenate([table[prefix, 16], table[suffix, 19]])[order]
+        symbols = symbols.astype("<U3")
+        currencies = symbols.copy()
+        for symbol, code in CURRENCY_CODES.items():
+            currencies[symbols == symbol] = code
+
+    dates = np.zeros(0, "datetime64[D]")
+    if present[:, [0, 5, 8]].any():
+        dates = dates_from(table, present)
+
+    return Tokens(durations, format_durations(durations), percentages, amounts,
+                  currencies, dates)
+
+
+def durations_by_line(text):
+    """duration_text of every line of text (str.splitlines), as scan() of
+    each line would give, from a single scan of the whole text"""
+    lines = text.splitlines(keepends=True)
+    found = [[] for _ in lines]
+    matches = list(PATTERN.finditer(text)) if text else []
+    if not matches:
+        return found
+    table = np.array([match.groups("") for match in matches], dtype=object)
+    seconds, is_duration = durations_from(table, table != "")
+    # Values never span a line break, where one starts tells its line
+    line_starts = np.cumsum([0] + [len(line) for line in lines[:-1]])
+    starts = np.array([match.start() for match in matches])[is_duration]
+    line_of = np.searchsorted(line_starts, starts, side="right") - 1
+    for line, value in zip(line_of.tolist(), format_durations(seconds[is_duration])):
+        found[line].append(value)
+    return found
+
+
+def durations_from(table, present):
+    """(int64 seconds of every row, which rows are durations); all four
+    spellings, kept in text order"""
+    seconds = np.zeros(len(table), np.int64)
+    clock = present[:, 9]
+    seconds[clock] = table[clock, 9].astype(np.int64) * 3600 + table[clock, 10].astype(np.int64) * 60
+    with_seconds = present[:, 11]
+    seconds[with_seconds] += table[with_seconds, 11].astype(np.int64)
+    hours = present[:, 12]
+    if hours.any():
+        part = table[hours]
+        extra = np.where(part[:, 13] == "", "0", part[:, 13]).astype(np.int64)
+        seconds[hours] = np.rint(to_float(part[:, 12], ",", ".") * 3600).astype(np.int64) + extra * 60
+    minutes = present[:, 14]
+    seconds[minutes] = table[minutes, 14].astype(np.int64) * 60
+    return seconds, clock | hours | minutes
+
+
+def to_float(strings, old, new):
+    """float64 of number strings after replacing old with new in all of them"""
+    if strings.size == 0:
+        return np.zeros(0)
+    return np.char.replace(strings.astype(str), old, new).astype(np.float64)
+
+
+def dates_from(table, present):
+    """datetime64[D] of the three date spellings, invalid dates dropped"""
+    years, months, days, positions = [], [], [], []
+    for y, m, d in ((0, 1, 2), (5, 4, 3), (8, 6, 7)):
+        rows_of = present[:, y]
+        part = table[rows_of]
+        years.append(part[:, y].astype(np.int64))
+        months.append(part[:, m].astype(np.int64))
+        days.append(part[:, d].astype(np.int64))
+        positions.append(np.flatnonzero(rows_of))
+    order = np.argsort(np.concatenate(positions), kind="stable")
+    years, months, days = (np.concatenate(v)[order] for v in (years, months, days))
+    years = np.where(years < 100, years + 2000, years)
+
+    valid = (months >= 1) & (months <= 12) & (days >= 1)
+    month_start = ((years - 1970) * 12 + months - 1).astype("datetime64[M]")
+    dates = month_start.astype("datetime64[D]") + (days - 1)
+    # Day 31 of a 30 day month would roll over into the next one
+    valid &= dates < (month_start + 1).astype("datetime64[D]")
+    return dates[valid]
+
+
+def format_durations(seconds):
+    """Seconds as H:MM strings, H:MM:SS when there are leftover seconds"""
+    if seconds.size == 0:
+        return []
+    hours, rest = np.divmod(seconds, 3600)
+    minutes, secs = np.divmod(rest, 60)
+    # Plain string formatting: np.char loops in Python anyway, with more overhead
+    return [f"{h}:{m:02d}:{s:02d}" if s else f"{h}:{m:02d}"
+            for h, m, s in zip(hours.tolist(), minutes.tolist(), secs.tolist())]
@@ -6,19 +6,28 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtGui import QIcon, QAction, QPixmap, QPainter, QCursor, QColor
 from PyQt6.QtCore import Qt, QPoint, QTimer
 from PyQt6.QtGui import QGuiApplication
-from .screen_capture import ScreenCaptureWidget
-from .processor import ImageProcessor
+# Kept light: the capture pipeline (numpy, OpenCV, OpenAI) is loaded by Warmup
+# after the tray icon is up, see startup in settings.json
+from .jobs import JobManager
 from .hotkey_manager import HotkeyManager
+from .history_store import HistoryStore
+from .input_service import InputService
+from .instrumentation import Metrics, span
+from .log import get_logger, setup_logging
 from .settings_dialog import SettingsDialog
+from .warmup import Warmup
 from datetime import datetime
 import json
 import os
-from plyer import notification
 import sys
+import time
 from pathlib import Path
-from win10toast import ToastNotifier
 import threading
-from winotify import Notification, audio
+
+log = get_logger(__name__)
+
+# What a hotkey can do, see "hotkeys" in settings.json
+HOTKEY_ACTIONS = ("capture", "repeat_region", "pin_region", "history")
 
 class TrayAppWidget(QWidget):
     """Main widget to serve as parent for other widgets"""
@@ -140,32 +149,40 @@ class ResultsPopup(QDialog):
             # Store results for details view
             self.current_results = results
             
-            # Get primary screen
-            primary = QGuiApplication.primaryScreen()
-            available = primary.availableGeometry()
-            
-            # Get window size
-            size = self.sizeHint()
-            
-            # Position like Windows 11 notifications (bottom-right)
-            x = available.right() - size.width() - 12  # 12px from right edge
-            y = available.bottom() - size.height() - 48  # 48px from bottom to account for taskbar
-            
-            # Ensure window stays on top
-            self.setWindowFlags(
-                Qt.WindowType.ToolTip | 
-                Qt.WindowType.FramelessWindowHint |
-                Qt.WindowType.WindowStaysOnTopHint
-            )
-            
             # Move and show
-            self.move(x, y)
+            self.move_to_corner()
             self.show()
             self.raise_()
             
             # Start auto-hide timer (5 seconds)
             self.hide_timer.start(5000)
             
+    def show_partial(self, results):
+        """Show running totals while a capture is still being read"""
+        self.hide_timer.stop()
+        self.label.setText(
+            f"Total so far: {results['total_formatted']}\nCount: {results['count']}..."
+        )
+        if not self.isVisible():
+            self.move_to_corner()
+            self.show()
+            self.raise_()
+            
+    def move_to_corner(self):
+        # Position like Windows 11 notifications (bottom-right)
+        available = QGuiApplication.primaryScreen().availableGeometry()
+        size = self.sizeHint()
+        x = available.right() - size.width() - 12  # 12px from right edge
+        y = available.bottom() - size.height() - 48  # 48px from bottom to account for taskbar
+        
+        # Ensure window stays on top
+        self.setWindowFlags(
+            Qt.WindowType.ToolTip | 
+            Qt.WindowType.FramelessWindowHint |
+            Qt.WindowType.WindowStaysOnTopHint
+        )
+        self.move(x, y)
+        
     def show_details(self):
         # Stop auto-hide timer when showing details
         self.hide_timer.stop()
@@ -184,31 +201,56 @@ class ResultsPopup(QDialog):
         self.hide_timer.start(5000)
 
 class TrayApp(QSystemTrayIcon):
-    def __init__(self):
+    def __init__(self, started=None):
         super().__init__()
+        # Startup timings are measured from started (perf_counter at launch)
+        init_time = time.perf_counter()
+        self.started = started or init_time
         
         # Create main widget with reference to self
         self.widget = TrayAppWidget(self)
         
-        # Initialize components first
-        self.screen_capture = None
-        self.processor = ImageProcessor()
-        self.results_popup = ResultsPopup()
-        self.results_popup.set_tray_app(self)
-        self.history = []
-        
         # Load settings
         self.settings = self.load_settings()
+        setup_logging(self.settings.get("logging"))
+        metrics = Metrics.configure(self.settings.get("diagnostics"))
+        self.import_time = init_time - self.started
+        metrics.record("startup_imports", self.import_time)
         
-        # Setup hotkey
+        # Initialize components first. The processor and the overlay are
+        # built by the warm-up, captures taken before that wait for it
+        self.screen_capture = None
+        self.warmup = Warmup(self.settings, self)
+        self.warmup.ready.connect(self.on_warmed_up)
+        self.warmup.failed.connect(self.on_warmup_failed)
+        self.jobs = JobManager(self.warmup.processor, self.widget)
+        self.jobs.job_progress.connect(self.on_job_progress)
+        self.jobs.job_partial.connect(self.on_job_partial)
+        self.jobs.job_finished.connect(self.on_job_finished)
+        self.jobs.job_failed.connect(self.on_job_failed)
+        self.jobs.job_cancelled.connect(self.on_job_cancelled)
+        self.jobs.active_changed.connect(self.on_active_jobs_changed)
+        self.job_positions = {}  # job_id -> cursor position at capture time
+        self.job_spans = {}  # job_id -> capture_total span, grab to notification
+        self.streaming_jobs = set()  # jobs showing running totals in the popup
+        self._results_popup = None  # Built after the icon is up, see results_popup
+        self.job_images = {}  # job_id -> capture, for its history thumbnail
+        self.history = HistoryStore.from_settings(self.settings.get("history"))
+        
+        # Watch mode: a pinned region re-extracted whenever it changes,
+        # created with the first pin
+        self.watcher = None
+        self.watch_job = None  # Job extracting the pinned region right now
+        self.watch_summary = None  # Latest totals of the pinned region
+        self.watch_image = None  # What watch_job is extracting
+        
+        # Stage timings to a metrics file and a localhost /metrics endpoint
+        metrics.start_exporters()
+        
+        # Setup hotkeys
         self.hotkey_manager = HotkeyManager()
-        initial_hotkey = self.settings.get("hotkey", "Alt+Shift+S")
-        print(f"Setting up initial hotkey: {initial_hotkey}")
-        
-        # Connect signal and register hotkey
         self.hotkey_manager.hotkey_triggered.connect(self.handle_hotkey)
-        print("Signal connected")
-        self.hotkey_manager.register(initial_hotkey)
+        self.register_hotkeys()
         
         # Set icon - create a basic icon if resource not found
         icon_path = "resources/icon.png"
@@ -246,17 +288,70 @@ class TrayApp(QSystemTrayIcon):
         # Register app for notifications
         self.app_id = "Snaplytics.App"
         
-        # Initialize Windows toast notifier
-        self.toaster = ToastNotifier()
+        self.tray_time = time.perf_counter() - self.started
+        metrics.record("startup_tray", self.tray_time)
+        # Warm up once the event loop has put the icon on screen
+        if self.settings.get("startup", {}).get("warmup", True):
+            QTimer.singleShot(0, self.warmup.start)
+        
+    def on_warmed_up(self):
+        if self.settings.get("startup", {}).get("warmup", True):
+            # The first hotkey press only has to show it
+            self.create_overlay()
+            self.results_popup
+        ready = time.perf_counter() - self.started
+        Metrics.instance().record("startup_ready", ready)
+        log.info("Startup: imports %.0f ms, tray icon at %.0f ms, ready at %.0f ms (warm-up: %s)",
+                 self.import_time * 1000, self.tray_time * 1000, ready * 1000, self.warmup.report())
+        
+    def on_warmup_failed(self, error):
+        self.showMessage("Snaplytics", f"Captures are unavailable: {error}", QIcon(), 5000)
+        
+    @property
+    def results_popup(self):
+        if self._results_popup is None:
+            self._results_popup = ResultsPopup()
+            self._results_popup.set_tray_app(self)
+        return self._results_popup
+        
+    def create_overlay(self):
+        if not self.screen_capture:
+            from .screen_capture import ScreenCaptureWidget
+            self.screen_capture = ScreenCaptureWidget(
+                self.widget, frame_stats=self.settings.get("overlay", {}).get("frame_stats", False))
+        return self.screen_capture
+        
+    def prewarm(self):
+        """Open the API connection ahead of a capture, once the processor is
+        there (and start loading it if startup warm-up is off)"""
+        self.warmup.start()
+        if self.warmup.done():
+            self.warmup.processor.result().prewarm()
         
     def setup_menu(self):
         menu = QMenu()
         
         # Capture action
         capture_action = QAction("Capture Area", self)
-        capture_action.triggered.connect(self.start_capture)
+        capture_action.triggered.connect(lambda: self.start_capture())
         menu.addAction(capture_action)
         
+        # Watch a region, re-extracting it when it changes
+        pin_action = QAction("Pin Region...", self)
+        pin_action.triggered.connect(lambda: self.start_capture(pin=True))
+        menu.addAction(pin_action)
+        
+        self.stop_watch_action = QAction("Stop Watching", self)
+        self.stop_watch_action.triggered.connect(self.stop_watching)
+        self.stop_watch_action.setEnabled(False)
+        menu.addAction(self.stop_watch_action)
+        
+        # Cancel running captures
+        self.cancel_action = QAction("Cancel Processing", self)
+        self.cancel_action.triggered.connect(self.jobs.cancel_all)
+        self.cancel_action.setEnabled(False)
+        menu.addAction(self.cancel_action)
+        
         menu.addSeparator()
         
         # Show history action
@@ -264,6 +359,11 @@ class TrayApp(QSystemTrayIcon):
         history_action.triggered.connect(self.show_history)
         menu.addAction(history_action)
         
+        # Where the time goes, stage by stage
+        diagnostics_action = QAction("Diagnostics", self)
+        diagnostics_action.triggered.connect(self.show_diagnostics)
+        menu.addAction(diagnostics_action)
+        
         # Settings action
         settings_action = QAction("Settings", self)
         settings_action.triggered.connect(self.show_settings)
@@ -289,84 +389,234 @@ class TrayApp(QSystemTrayIcon):
         with open("settings.json", "w") as f:
             json.dump(self.settings, f)
             
-    def handle_hotkey(self, combo):
+    def register_hotkeys(self):
+        """Bind "hotkey" to capturing and the "hotkeys" section to other actions"""
+        self.hotkey_manager.unregister_all()
+        self.hotkey_manager.register(self.settings.get("hotkey", "Alt+Shift+S"), "capture")
+        for action, hotkey in self.settings.get("hotkeys", {}).items():
+            if action not in HOTKEY_ACTIONS:
+                log.warning("Unknown hotkey action %r, expected one of %s",
+                            action, ", ".join(HOTKEY_ACTIONS))
+            elif hotkey:
+                self.hotkey_manager.register(hotkey, action)
+            
+    def handle_hotkey(self, action):
         """Handle hotkey in the main thread"""
-        print(f"TrayApp received hotkey signal: {combo}")
+        if action == "repeat_region":
+            self.repeat_capture()
+        elif action == "pin_region":
+            self.start_capture(pin=True)
+        elif action == "history":
+            self.show_history()
+        else:
+            self.capture_from_hotkey()
+            
+    def capture_from_hotkey(self):
+        overlay_span = span("hotkey_to_overlay", trace_memory=False)
+        # Open the API connection while the user drags out the selection
+        self.prewarm()
         self.start_capture()
+        if self.screen_capture:
+            self.screen_capture.shown_span = overlay_span
         
-    def start_capture(self):
-        print("start_capture called")
+    def start_capture(self, pin=False):
+        self.warmup.start()  # Only does anything with startup warm-up off
         try:
             # Create screen capture widget if needed
-            if not self.screen_capture:
-                self.screen_capture = ScreenCaptureWidget(self.widget)
-            else:
+            if self.screen_capture:
                 self.screen_capture.hide()
+            self.create_overlay()
             
+            self.screen_capture.pin_mode = pin
             self.screen_capture.start_capture()
-            print("Screen capture started")
             
-        except Exception as e:
-            print(f"Error starting capture: {e}")
-            import traceback
-            traceback.print_exc()
-        
-    def process_capture(self, pixmap, pos=None):
-        if pixmap and not pixmap.isNull():
-            results = self.processor.process_image(pixmap)
+        except Exception:
+            log.exception("Error starting capture")
+        
+    def repeat_capture(self):
+        """Capture the area selected last time again, without the overlay"""
+        grabbed = self.screen_capture.grab_last_region() if self.screen_capture else None
+        if grabbed is None:
+            # Nothing to repeat yet
+            self.capture_from_hotkey()
+            return
+        self.prewarm()
+        image, ratio = grabbed
+        self.process_capture(image, QCursor.pos(), ratio)
+        
+    def process_capture(self, image, pos=None, device_pixel_ratio=1.0):
+        """Queue the capture (a pixmap, or an RGB array cut from the frozen
+        frame) for processing, results arrive in on_job_finished"""
+        empty = image.isNull() if hasattr(image, "isNull") else image.size == 0
+        if not empty:
+            total_span = span("capture_total", trace_memory=False)
+            job_id = self.jobs.submit(image, device_pixel_ratio)
+            self.job_positions[job_id] = pos
+            self.job_images[job_id] = image.toImage() if isinstance(image, QPixmap) else image
+            self.job_spans[job_id] = total_span
             
-            # Save to history
-            self.history.append({
-                "timestamp": datetime.now().isoformat(),
-                "results": results
-            })
+    def pin_region(self, rect, image=None, device_pixel_ratio=1.0):
+        """Watch rect (desktop coordinates) from now on, see RegionWatcher"""
+        if self.watcher is None:
+            from .watch import RegionWatcher
+            self.watcher = RegionWatcher(self, **self.settings.get("watch", {}))
+            self.watcher.changed.connect(self.on_watch_changed)
+            self.watcher.stopped.connect(self.on_watch_stopped)
+        self.watcher.pin(rect, image, device_pixel_ratio)
+        self.watch_summary = None
+        self.stop_watch_action.setEnabled(True)
+        self.setToolTip(self.idle_tooltip())
+        
+    def stop_watching(self):
+        if self.watcher:
+            self.watcher.stop()
+        self.watch_summary = None
+        self.stop_watch_action.setEnabled(False)
+        self.setToolTip(self.idle_tooltip())
+        
+    def on_watch_stopped(self, reason):
+        self.stop_watching()
+        self.showMessage("Snaplytics", reason, QIcon(), 3000)
+        
+    def on_watch_changed(self, image, device_pixel_ratio):
+        self.watch_job = self.jobs.submit(image, device_pixel_ratio)
+        self.watch_image = image
+        
+    def idle_tooltip(self):
+        if not (self.watcher and self.watcher.active):
+            return "Snaplytics"
+        return f"Snaplytics - watching: {self.watch_summary or 'extracting...'}"
+        
+    def on_job_progress(self, job_id, stage):
+        if job_id == self.watch_job:
+            return  # Keep showing the pinned region's totals
+        self.setToolTip(f"Snaplytics - capture #{job_id}: {stage}...")
+        
+    def on_job_partial(self, job_id, results):
+        if job_id == self.watch_job:
+            return
+        self.streaming_jobs.add(job_id)
+        self.results_popup.show_partial(results)
+        
+    def on_active_jobs_changed(self, count):
+        self.cancel_action.setEnabled(count > 0)
+        self.cancel_action.setText(
+            f"Cancel Processing ({count})" if count > 1 else "Cancel Processing"
+        )
+        if count == 0:
+            self.setToolTip(self.idle_tooltip())
             
-            try:
-                # Format message with better spacing and alignment
-                if results['count'] > 0:
-                    message = (
-                        f"✓ Found {results['count']} time{'s' if results['count'] > 1 else ''}\n"
-                        f"Total duration: {results['total_formatted']}"
-                    )
-                else:
-                    message = "No times found in the captured area"
-                
-                # Create Windows notification
-                toast = Notification(
-                    app_id=self.app_id,
-                    title="Time Summary",
-                    msg=message,
-                    duration="long",
-                    icon=self.icon_path if os.path.exists(self.icon_path) else None
-                )
-                
-                # Add action button with protocol handler
-                toast.add_actions(
-                    label="Show Details",
-                    launch="snaplytics://show_details"  # Custom protocol
-                )
-                
-                # Set notification sound
-                toast.set_audio(audio.Default, loop=False)
-                
-                # Show notification
-                toast.show()
-                
-            except Exception as e:
-                print(f"Error showing notification: {e}")
-                # Fall back to custom popup if notification fails
-                if pos is None:
-                    pos = QCursor.pos()
+    def on_job_failed(self, job_id, error):
+        if job_id == self.watch_job:
+            self.watch_job = self.watch_image = None
+            self.watcher.done(succeeded=False)
+            log.warning("Pinned region extraction failed: %s", error)
+            return
+        self.job_positions.pop(job_id, None)
+        self.job_images.pop(job_id, None)
+        self.job_spans.pop(job_id, None)
+        self.streaming_jobs.discard(job_id)
+        log.warning("Capture #%d failed: %s", job_id, error, extra={"job": job_id})
+        self.showMessage("Snaplytics", f"Processing failed: {error}", QIcon(), 3000)
+        
+    def on_job_cancelled(self, job_id):
+        if job_id == self.watch_job:
+            self.watch_job = self.watch_image = None
+            self.watcher.done(succeeded=False)
+            return
+        self.job_positions.pop(job_id, None)
+        self.job_images.pop(job_id, None)
+        self.job_spans.pop(job_id, None)
+        self.streaming_jobs.discard(job_id)
+        log.info("Capture #%d cancelled", job_id, extra={"job": job_id})
+        
+    def on_job_finished(self, job_id, results):
+        if job_id == self.watch_job:
+            self.on_watch_finished(results)
+            return
+        pos = self.job_positions.pop(job_id, None)
+        if job_id in self.streaming_jobs:
+            # Replace the running totals with the final numbers
+            self.streaming_jobs.discard(job_id)
+            if results.get("times"):
                 self.results_popup.show_results(results, pos)
+            else:
+                self.results_popup.hide()
+        # Save to history
+        self.history.add(results, image=self.job_images.pop(job_id, None))
+        
+        notification_span = span("notification")
+        try:
+            # Format message with better spacing and alignment
+            if results['count'] > 0:
+                message = (
+                    f"✓ Found {results['count']} time{'s' if results['count'] > 1 else ''}\n"
+                    f"Total duration: {results['total_formatted']}"
+                )
+            else:
+                message = "No times found in the captured area"
+            
+            # Create Windows notification
+            from winotify import Notification, audio
+            toast = Notification(
+                app_id=self.app_id,
+                title="Time Summary",
+                msg=message,
+                duration="long",
+                icon=self.icon_path if os.path.exists(self.icon_path) else None
+            )
+            
+            # Add action button with protocol handler
+            toast.add_actions(
+                label="Show Details",
+                launch="snaplytics://show_details"  # Custom protocol
+            )
+            
+            # Set notification sound
+            toast.set_audio(audio.Default, loop=False)
+            
+            # Show notification
+            toast.show()
+            
+        except Exception as e:
+            log.warning("Error showing notification: %s", e)
+            # Fall back to custom popup if notification fails
+            if pos is None:
+                pos = QCursor.pos()
+            self.results_popup.show_results(results, pos)
+        notification_span.end()
+        total_span = self.job_spans.pop(job_id, None)
+        if total_span:
+            total_span.end()
+
+    def on_watch_finished(self, results):
+        """Totals of the pinned region changed: history and tooltip, no popups"""
+        self.watch_job = None
+        image, self.watch_image = self.watch_image, None
+        self.watcher.done()
+        if not self.watcher.active:
+            return  # Stopped while this was in flight
+        self.history.add(results, source="watch", image=image)
+        self.watch_summary = (f"{results['count']} times, total {results['total_formatted']} "
+                              f"(at {datetime.now():%H:%M})")
+        self.setToolTip(self.idle_tooltip())
         
     def show_history(self, highlight_results=None):
         from .history_window import HistoryWindow
         self.history_window = HistoryWindow(self.history, highlight_results)
         self.history_window.show()
         
+    def show_diagnostics(self):
+        from .diagnostics_window import DiagnosticsWindow
+        self.diagnostics_window = DiagnosticsWindow(Metrics.instance())
+        self.diagnostics_window.show()
+        
     def quit_app(self):
         # Clean up
-        self.hotkey_manager.unregister_all()
+        self.jobs.cancel_all()
+        self.hotkey_manager.stop()
+        InputService.instance().stop()
+        self.history.close()
         self.save_settings()
         # Hide tray icon
         self.hide()
@@ -383,8 +633,7 @@ class TrayApp(QSystemTrayIcon):
                 self.save_settings()
                 
                 # Update hotkey binding
-                self.hotkey_manager.unregister_all()
-                self.hotkey_manager.register(new_hotkey)
+                self.register_hotkeys()
                 
                 # Show confirmation
                 self.showMessage(
@@ -396,10 +645,11 @@ class TrayApp(QSystemTrayIcon):
         
     def show_details(self):
         """Called when user clicks 'Show Details' in notification"""
-        if self.history:
-            self.show_history(highlight_results=self.history[-1]["results"])
+        latest = self.history.latest()
+        if latest:
+            self.show_history(highlight_results=latest["results"])
         
     def handle_notification_action(self, action):
         """Handle notification action clicks"""
-        if action == "show_details" and self.history:
-            self.show_history(highlight_results=self.history[-1]["results"])
\ No newline at end of file
+        if action == "show_details":
+            self.show_details()
\ No newline at end of file
@@ -0,0 +1,68 @@
+from concurrent.futures import Future
+import importlib
+import threading
+import time
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .log import get_logger
+
+log = get_logger(__name__)
+
+# Imported ahead of the first capture, slowest first. Relative names are app modules
+MODULES = ("numpy", "cv2", "openai", ".processor", ".screen_capture", ".watch")
+
+
+class Warmup(QObject):
+    """Imports and builds the slow parts of the app on a background thread.
+
+    The tray icon doesn't wait for numpy, OpenCV, the OpenAI client and
+    the rest of the capture pipeline; they load here once it is up.
+    ``processor`` is a Future of the ImageProcessor that capture jobs wait
+    on from their worker threads, so a capture taken while this still runs
+    just queues. ``ready`` is emitted on the GUI thread when everything is
+    loaded, with ``timings`` holding (step, seconds) for each import and
+    the processor.
+    """
+
+    ready = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, settings, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        self.processor = Future()
+        self.timings = []
+        self.thread = None
+
+    def start(self):
+        """Start warming up, once; later calls do nothing"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self.thread.start()
+
+    def done(self):
+        return self.processor.done() and self.processor.exception() is None
+
+    def _timed(self, step, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        self.timings.append((step, time.perf_counter() - start))
+        return result
+
+    def _run(self):
+        try:
+            for module in MODULES:
+                self._timed(module.lstrip("."), importlib.import_module, module, __package__)
+            from .processor import ImageProcessor
+            processor = self._timed("ImageProcessor", ImageProcessor, self.settings)
+        except Exception as e:
+            log.exception("Warm-up failed")
+            self.processor.set_exception(e)
+            self.failed.emit(str(e))
+            return
+        self.processor.set_result(processor)
+        self.ready.emit()
+
+    def report(self):
+        return ", ".join(f"{step} {seconds * 1000:.0f} ms" for step, seconds in self.timings)
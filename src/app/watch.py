@@ -0,0 +1,140 @@
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+import numpy as np
+
+from .frozen_frame import grab_rect
+from .instrumentation import span
+from .log import get_logger
+
+log = get_logger(__name__)
+
+
+def fingerprint(image, grid=128):
+    """Brightness of image in blocks, at most ``grid`` blocks on the long side.
+
+    Blocks are averaged rather than sampled, so a digit changing inside a
+    block still moves its value. Only the green channel is read, which is
+    close enough to luminance for spotting a change.
+    """
+    height, width = image.shape[:2]
+    block = max(1, -(-max(height, width) // grid))
+    rows, columns = height // block, width // block
+    if rows == 0 or columns == 0:
+        return image[..., 1].astype(np.float32)
+    green = image[:rows * block, :columns * block, 1]
+    sums = green.reshape(rows, block, columns, block).sum(axis=(1, 3), dtype=np.uint32)
+    return sums.astype(np.float32) / (block * block)
+
+
+def changed_share(previous, current, pixel_delta=4):
+    """Share of blocks whose brightness moved by more than pixel_delta levels"""
+    if previous is None or previous.shape != current.shape:
+        return 1.0
+    return float(np.count_nonzero(np.abs(current - previous) > pixel_delta)) / current.size
+
+
+class RegionWatcher(QObject):
+    """Keeps an eye on a pinned desktop rect and reports it when it changes.
+
+    Every ``interval_seconds`` the rect is grabbed and reduced to a small
+    block-brightness fingerprint; only when more than ``threshold`` of the
+    blocks changed by over ``pixel_delta`` levels is the grab emitted for
+    extraction. The default threshold ignores a handful of blocks (a
+    caret, the tip of a cursor) but not a digit of a total in a
+    dashboard-sized region. A change also has to hold still for
+    ``stable_intervals`` ticks first, so a cursor passing over or a
+    blinking caret doesn't cost an API call. An unchanged dashboard costs
+    one small grab per tick and no API calls. Ticks are skipped while the
+    last emitted grab is still being processed (until ``done()``).
+    """
+
+    changed = pyqtSignal(object, float)  # RGB array, device pixel ratio
+    stopped = pyqtSignal(str)  # Why watching stopped on its own
+
+    def __init__(self, parent=None, interval_seconds=10.0, threshold=0.0005, pixel_delta=4,
+                 grid=128, stable_intervals=1):
+        super().__init__(parent)
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.grid = grid
+        self.stable_intervals = stable_intervals
+        self.rect = None
+        self.baseline = None  # Fingerprint of the last grab sent for extraction
+        self.pending = None  # Fingerprint of a change that hasn't held still yet
+        self.stable = 0  # Ticks pending has held for
+        self.busy = False
+        self.counters = {"checks": 0, "changes": 0, "unsettled": 0}
+        self.timer = QTimer(self)
+        self.timer.setInterval(round(interval_seconds * 1000))
+        self.timer.timeout.connect(self.check)
+
+    @property
+    def active(self):
+        return self.rect is not None
+
+    def pin(self, rect, image=None, device_pixel_ratio=1.0):
+        """Start watching rect (desktop coordinates) and extract it right away,
+        from image when the caller already has its pixels"""
+        self.rect = rect
+        self.baseline = None
+        self.pending = None
+        self.busy = False
+        self.counters = {"checks": 0, "changes": 0, "unsettled": 0}
+        log.info("Watching %dx%d at (%d, %d)", rect.width(), rect.height(), rect.x(), rect.y())
+        self.timer.start()
+        if image is None:
+            self.check()
+            return
+        self.baseline = fingerprint(image, self.grid)
+        self.counters["changes"] += 1
+        self.busy = True
+        self.changed.emit(image, device_pixel_ratio)
+
+    def stop(self):
+        self.timer.stop()
+        self.rect = None
+        self.baseline = None
+        self.pending = None
+
+    def done(self, succeeded=True):
+        """The last emitted grab has been processed, checking may go on.
+        After a failure the next check extracts again even if nothing changed"""
+        self.busy = False
+        if not succeeded:
+            self.baseline = None
+
+    def check(self):
+        if not self.active or self.busy:
+            return
+        with span("watch_check", trace_memory=False):
+            grabbed = grab_rect(self.rect)
+            if grabbed is None:
+                self.stop()
+                self.stopped.emit("The pinned region is no longer on screen")
+                return
+            image, ratio = grabbed
+            current = fingerprint(image, self.grid)
+            share = changed_share(self.baseline, current, self.pixel_delta)
+        self.counters["checks"] += 1
+        if share <= self.threshold:
+            # Back to what was extracted, e.g. the caret blinked off again
+            self.pending = None
+            return
+        # Nothing extracted yet (or the last extraction failed): no need to wait
+        if self.baseline is not None and not self._settled(current):
+            self.counters["unsettled"] += 1
+            return
+        log.debug("Pinned region changed (%.1f%% of blocks), extracting", share * 100)
+        self.baseline = current
+        self.pending = None
+        self.counters["changes"] += 1
+        self.busy = True
+        self.changed.emit(image, ratio)
+
+    def _settled(self, current):
+        """Whether current has looked the same for stable_intervals ticks"""
+        if self.pending is not None and \
+                changed_share(self.pending, current, self.pixel_delta) <= self.threshold:
+            self.stable += 1
+        else:
+            self.pending, self.stable = current, 0
+        return self.stable >= self.stable_intervals
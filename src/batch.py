@@ -0,0 +1,279 @@
+"""Headless batch mode: run the extraction pipeline over image files.
+
+    python batch.py screenshots/ -o results.jsonl
+    python batch.py "archive/**/*.png" -o results.csv --concurrency 16
+
+Files are decoded (and their text regions packed) in a process pool, then
+sent to the backend by a bounded number of concurrent requests. Results
+are appended to the output as they complete, one JSON line (or CSV row)
+per file, so an interrupted run picks up where it stopped when started
+again with the same output. Files that failed are retried on the next
+run; readers should keep the last line per path.
+"""
+import argparse
+import asyncio
+import csv
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from app.cache import ExtractionCache
+from app.log import setup_logging
+from app.processor import ImageProcessor
+from app.regions import RegionExtractor
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp", ".tif", ".tiff"}
+CSV_FIELDS = ["path", "count", "total", "total_formatted", "average", "times_formatted",
+              "backend", "cached", "error"]
+
+# Set up in every worker process by init_worker
+_worker = {}
+
+
+def load_settings(path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def find_images(patterns, recursive=False):
+    """Expand directories and globs into a sorted list of image paths"""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**" if recursive else "", "*")
+        for path in glob.glob(pattern, recursive=True):
+            if os.path.isfile(path) and Path(path).suffix.lower() in IMAGE_EXTENSIONS:
+                paths.add(os.path.normpath(path))
+    return sorted(paths)
+
+
+def init_worker(settings):
+    regions = dict(settings.get("regions", {}))
+    # Only the mosaic can be built ahead of time, per-region mode needs the capture
+    if regions.pop("enabled", False) and regions.get("mode", "mosaic") == "mosaic":
+        _worker["regions"] = RegionExtractor(None, **regions)
+    _worker["cache"] = settings.get("cache", {}).get("enabled", True)
+
+
+def prepare(path):
+    """Decode one file and do the CPU-heavy, network-free work on it.
+
+    Runs in a worker process. Returns (path, array to extract, cache key);
+    the key is a few digests, so only the array is worth pickling back.
+    """
+    with Image.open(path) as image:
+        arr = np.asarray(image.convert("RGB"))
+    cache_key = ExtractionCache.make_key(arr) if _worker["cache"] else None
+    if "regions" in _worker:
+        mosaic = _worker["regions"].pack(arr)
+        if mosaic is not None:
+            arr = mosaic
+    return path, arr, cache_key
+
+
+class ResultWriter:
+    """Appends results to a JSONL or CSV file and knows what is already done"""
+
+    def __init__(self, path):
+        self.path = path
+        self.csv = path.lower().endswith(".csv")
+        self.done = self.completed()
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a", newline="", encoding="utf-8")
+        if self.csv:
+            self.writer = csv.DictWriter(self.file, fieldnames=CSV_FIELDS)
+            if new_file:
+                self.writer.writeheader()
+
+    def completed(self):
+        """Paths with a successful result in an existing output file"""
+        done = set()
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, "r", newline="", encoding="utf-8") as f:
+            if self.csv:
+                for row in csv.DictReader(f):
+                    if not row.get("path"):
+                        continue  # Cut short, or not a results file of ours
+                    if row.get("error"):
+                        done.discard(row["path"])
+                    else:
+                        done.add(row["path"])
+            else:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # A line cut short by an interrupted run
+                    if not (isinstance(entry, dict) and isinstance(entry.get("results"), dict)
+                            and entry.get("path")):
+                        continue  # Valid JSON, but not a result line
+                    if entry["results"].get("error"):
+                        done.discard(entry["path"])
+                    else:
+                        done.add(entry["path"])
+        return done
+
+    def write(self, path, results):
+        if self.csv:
+            row = {field: results.get(field, "") for field in CSV_FIELDS}
+            row["path"] = path
+            row["times_formatted"] = " ".join(results.get("times_formatted", []))
+            self.writer.writerow(row)
+        else:
+            self.file.write(json.dumps({"path": path, "results": results}) + "\n")
+        # Every finished file survives an interrupted run
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class Throughput:
+    """Counts finished files and prints images/sec now and then"""
+
+    def __init__(self, total, every=5.0):
+        self.total = total
+        self.every = every
+        self.done = self.failed = 0
+        self.start = self.last_report = time.perf_counter()
+
+    def add(self, results):
+        self.done += 1
+        self.failed += bool(results.get("error"))
+        now = time.perf_counter()
+        if now - self.last_report >= self.every or self.done == self.total:
+            self.last_report = now
+            self.report(now)
+
+    def rate(self, now=None):
+        elapsed = (now or time.perf_counter()) - self.start
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def report(self, now=None):
+        rate = self.rate(now)
+        remaining = (self.total - self.done) / rate if rate else 0
+        print(f"{self.done}/{self.total} images, {rate:.2f} images/sec, "
+              f"{self.failed} failed, ~{remaining / 60:.0f} min left", flush=True)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.start
+        print(f"Finished {self.done} images in {elapsed:.1f}s "
+              f"({self.rate():.2f} images/sec, {self.failed} failed)")
+
+
+async def run(paths, processor, writer, settings, workers, concurrency):
+    loop = asyncio.get_running_loop()
+    # Backend calls are blocking, each request in flight holds a thread
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency,
+                                                 thread_name_prefix="batch-request"))
+    stopping = threading.Event()
+    throughput = Throughput(len(paths))
+    # Decoded files waiting for a request slot; bounded so the pool can't
+    # run far ahead and fill memory with decoded screenshots
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    path_of = {}  # Decode future -> path, for files that fail to decode
+
+    async def produce(pool):
+        pending = set()
+        for path in paths:
+            future = loop.run_in_executor(pool, prepare, path)
+            path_of[future] = path
+            pending.add(future)
+            if len(pending) >= workers * 2:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    await queue.put(future)
+        for future in pending:
+            await queue.put(future)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def consume():
+        while True:
+            future = await queue.get()
+            if future is None:
+                return
+            path = path_of.pop(future)
+            try:
+                _, arr, cache_key = await future
+            except Exception as e:
+                results = {"error": f"Could not read image: {e}"}
+            else:
+                results = await asyncio.to_thread(
+                    processor.process_array, arr, 1.0,
+                    is_cancelled=stopping.is_set, cache_key=cache_key, packed=True
+                )
+            writer.write(path, results)
+            throughput.add(results)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(settings,)) as pool:
+        consumers = [asyncio.create_task(consume()) for _ in range(concurrency)]
+        try:
+            await asyncio.gather(produce(pool), *consumers)
+        finally:
+            # Let requests in flight notice and stop between stages
+            stopping.set()
+    return throughput
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract values from a folder of screenshots")
+    parser.add_argument("inputs", nargs="+", help="image files, directories or glob patterns")
+    parser.add_argument("-o", "--output", default="results.jsonl",
+                        help="results file, .jsonl or .csv (appended to, and used to resume)")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="also look in subdirectories of directory inputs")
+    parser.add_argument("--settings", default="settings.json")
+    parser.add_argument("--backend", help="override the backend from settings")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2,
+                        help="processes decoding and preparing images")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="backend requests in flight at once")
+    args = parser.parse_args()
+
+    settings = load_settings(args.settings)
+    if args.backend:
+        settings["backend"] = args.backend
+    setup_logging(settings.get("logging"))
+
+    paths = find_images(args.inputs, args.recursive)
+    writer = ResultWriter(args.output)
+    todo = [path for path in paths if path not in writer.done]
+    print(f"{len(paths)} images found, {len(paths) - len(todo)} already done, "
+          f"{len(todo)} to process")
+    if not todo:
+        writer.close()
+        return
+
+    processor = ImageProcessor(settings)
+    try:
+        throughput = asyncio.run(
+            run(todo, processor, writer, settings, args.workers, args.concurrency)
+        )
+    except KeyboardInterrupt:
+        print("Interrupted, run again with the same output to resume")
+        sys.exit(130)
+    finally:
+        writer.close()
+    throughput.summary()
+    if processor.flights and processor.flights.counters["shared"]:
+        print(f"{processor.flights.counters['shared']} duplicate images shared "
+              f"another image's request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import json
+
+from batch import ResultWriter
+
+
+def test_resume_skips_failed_and_malformed_lines(tmp_path):
+    output = tmp_path / "results.jsonl"
+    lines = [
+        json.dumps({"path": "a.png", "results": {"total": 90}}),
+        json.dumps({"path": "b.png", "results": {"error": "timeout"}}),
+        json.dumps({"path": "c.png"}),
+        json.dumps({"results": {"total": 5}}),
+        json.dumps([1, 2]),
+        '{"path": "d.png", "resu',
+    ]
+    output.write_text("\n".join(lines) + "\n")
+    writer = ResultWriter(str(output))
+    writer.close()
+    assert writer.done == {"a.png"}
+
+
+def test_resume_from_csv(tmp_path):
+    output = tmp_path / "results.csv"
+    writer = ResultWriter(str(output))
+    writer.write("a.png", {"total": 90, "count": 1, "times_formatted": ["1:30"]})
+    writer.write("b.png", {"error": "timeout"})
+    writer.close()
+    assert ResultWriter(str(output)).done == {"a.png"}
+
+
+def test_retried_file_counts_as_done(tmp_path):
+    output = tmp_path / "results.jsonl"
+    writer = ResultWriter(str(output))
+    writer.write("a.png", {"error": "timeout"})
+    writer.write("a.png", {"total": 5})
+    writer.write("b.png", {"total": 5})
+    writer.write("b.png", {"error": "timeout"})
+    writer.close()
+    assert ResultWriter(str(output)).done == {"a.png"}
@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+
+from app.batching import BatchExtractor
+
+
+class Result:
+    def __init__(self, text):
+        self.text = text
+
+
+class SlowBackend:
+    name = "slow"
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+        self.release = threading.Event()
+
+    def encode(self, image, device_pixel_ratio=1.0):
+        return image, None
+
+    def extract_batch(self, items):
+        self.batches.append([image for image, _ in items])
+        self.release.wait(self.delay)
+        return [Result(image) for image, _ in items]
+
+
+class Cancelled(Exception):
+    pass
+
+
+def test_lone_capture_skips_the_window():
+    backend = SlowBackend()
+    batcher = BatchExtractor(backend, window_ms=2000)
+    start = time.monotonic()
+    assert batcher.extract("a").text == "a"
+    assert time.monotonic() - start < 1
+
+
+def test_waiting_caller_can_cancel():
+    backend = SlowBackend(delay=10)
+    batcher = BatchExtractor(backend, cancelled=Cancelled)
+    cancel = threading.Event()
+    threading.Timer(0.2, cancel.set).start()
+    start = time.monotonic()
+    with pytest.raises(Cancelled):
+        batcher.extract("a", is_cancelled=cancel.is_set)
+    assert time.monotonic() - start < 1
+    assert batcher.stats()["cancelled"] == 1
+    backend.release.set()
@@ -0,0 +1,72 @@
+import numpy as np
+
+from app.cache import ExtractionCache
+
+
+def sheet(top=20, left=30, value=0):
+    """A white capture with a dark block of 'text' at (top, left)"""
+    image = np.full((200, 300, 3), 255, np.uint8)
+    image[top:top + 40, left:left + 120] = 20
+    image[top + 10:top + 30, left + 20 + value:left + 30 + value] = 255
+    return image
+
+
+def test_exact_hit(tmp_path):
+    cache = ExtractionCache(directory=tmp_path)
+    key = cache.make_key(sheet())
+    assert cache.get(key) is None
+    cache.put(key, {"total": 90})
+    assert cache.get(cache.make_key(sheet())) == {"total": 90}
+    assert cache.stats()["hits"] == 1
+
+
+def test_near_hit_for_a_shifted_selection(tmp_path):
+    cache = ExtractionCache(directory=tmp_path)
+    cache.put(cache.make_key(sheet()), {"total": 90})
+    assert cache.get(cache.make_key(sheet(top=22, left=27))) == {"total": 90}
+    assert cache.stats()["near_hits"] == 1
+
+
+def test_changed_content_misses(tmp_path):
+    cache = ExtractionCache(directory=tmp_path)
+    cache.put(cache.make_key(sheet()), {"total": 90})
+    assert cache.get(cache.make_key(sheet(value=1))) is None
+    off = ExtractionCache(directory=tmp_path / "off", near_matches=False)
+    off.put(off.make_key(sheet()), {"total": 90})
+    assert off.get(off.make_key(sheet(top=22))) is None
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    cache = ExtractionCache(directory=tmp_path)
+    cache.put(cache.make_key(sheet()), {"total": 90})
+    cache.close()
+    reopened = ExtractionCache(directory=tmp_path)
+    assert reopened.get(reopened.make_key(sheet(left=33))) == {"total": 90}
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_memory_tier_bounded_by_bytes():
+    cache = ExtractionCache(persistent=False, max_bytes=1000)
+    for value in range(20):
+        cache.put(cache.make_key(sheet(value=value)), {"times": list(range(20))})
+    stats = cache.stats()
+    assert stats["memory_bytes"] <= 1000
+    assert stats["memory_entries"] < 20
+
+
+def test_results_are_copies():
+    cache = ExtractionCache(persistent=False)
+    key = cache.make_key(sheet())
+    cache.put(key, {"times": [1]})
+    cache.get(key)["times"].append(2)
+    assert cache.get(key) == {"times": [1]}
+
+
+def test_other_scope_misses(tmp_path):
+    tesseract = ExtractionCache(directory=tmp_path, scope='{"backend": "tesseract"}')
+    tesseract.put(tesseract.make_key(sheet()), {"total": 90, "backend": "tesseract"})
+    tesseract.close()
+    openai = ExtractionCache(directory=tmp_path, scope='{"backend": "openai"}')
+    assert openai.get(openai.make_key(sheet())) is None
+    again = ExtractionCache(directory=tmp_path, scope='{"backend": "tesseract"}')
+    assert again.get(again.make_key(sheet()))["backend"] == "tesseract"
@@ -0,0 +1,85 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+from PyQt6.QtGui import QImage
+
+from app.conversion import composite_on_white, encode_png, qimage_to_array, to_pil
+
+Format = QImage.Format
+
+# 37 pixels wide: rows of 3-byte and 2-byte formats get padded to 4 bytes
+WIDTH, HEIGHT = 37, 9
+
+FORMATS = [
+    Format.Format_RGB888, Format.Format_BGR888, Format.Format_RGB32,
+    Format.Format_ARGB32, Format.Format_ARGB32_Premultiplied, Format.Format_RGBA8888,
+    Format.Format_RGBX8888, Format.Format_RGB16, Format.Format_Grayscale8,
+]
+
+
+def rgb_image(pixels):
+    height, width = pixels.shape[:2]
+    data = np.ascontiguousarray(pixels).tobytes()
+    # copy(): the QImage mustn't outlive data
+    return QImage(data, width, height, width * 3, Format.Format_RGB888).copy()
+
+
+def reference(image):
+    """Pixels as the original conversion produced them, read row by row"""
+    canvas = composite_on_white(image)
+    ptr = canvas.constBits()
+    ptr.setsize(canvas.sizeInBytes())
+    rows = np.frombuffer(ptr, np.uint8).reshape(canvas.height(), canvas.bytesPerLine())
+    return rows[:, :canvas.width() * 3].reshape(canvas.height(), canvas.width(), 3).copy()
+
+
+@pytest.fixture(scope="module")
+def source(qapp):
+    rng = np.random.default_rng(0)
+    return rgb_image(rng.integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8))
+
+
+@pytest.mark.parametrize("fmt", FORMATS, ids=lambda fmt: fmt.name)
+def test_matches_composite_on_white(source, fmt):
+    image = source.convertToFormat(fmt)
+    if fmt in (Format.Format_RGB888, Format.Format_RGB16, Format.Format_Grayscale8):
+        assert image.bytesPerLine() > WIDTH * image.depth() // 8  # Padded rows
+    expected = reference(image)
+
+    arr = qimage_to_array(image)
+    assert arr.shape == (HEIGHT, WIDTH, 3)
+    np.testing.assert_array_equal(arr, expected)
+    np.testing.assert_array_equal(np.asarray(to_pil(arr)), expected)
+    with Image.open(io.BytesIO(encode_png(arr))) as decoded:
+        np.testing.assert_array_equal(np.asarray(decoded.convert("RGB")), expected)
+
+
+@pytest.mark.parametrize("fmt", [Format.Format_ARGB32, Format.Format_ARGB32_Premultiplied,
+                                 Format.Format_RGBA8888], ids=lambda fmt: fmt.name)
+def test_translucent_is_composited_on_white(qapp, fmt):
+    rng = np.random.default_rng(1)
+    argb = QImage(WIDTH, HEIGHT, Format.Format_ARGB32)
+    for y in range(HEIGHT):
+        for x in range(WIDTH):
+            r, g, b, a = rng.integers(0, 256, 4).tolist()
+            argb.setPixel(x, y, (a << 24) | (r << 16) | (g << 8) | b)
+    image = argb.convertToFormat(fmt)
+    expected = reference(image)
+
+    arr = qimage_to_array(image)
+    np.testing.assert_array_equal(arr, expected)
+    np.testing.assert_array_equal(np.asarray(to_pil(arr)), expected)
+    # Not the color channels as stored: half-transparent black is gray, not black
+    assert not np.array_equal(arr, reference(argb.convertToFormat(Format.Format_RGB32)))
+
+
+def test_slices_are_converted_too(source):
+    arr = qimage_to_array(source.convertToFormat(Format.Format_RGB32))
+    part = arr[2:7, 5:30]
+    np.testing.assert_array_equal(np.asarray(to_pil(part)), reference(source)[2:7, 5:30])
+
+
+def test_null_image():
+    assert qimage_to_array(QImage()).shape == (0, 0, 3)
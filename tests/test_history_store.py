@@ -0,0 +1,57 @@
+import time
+
+from app.history_store import HistoryStore
+
+
+def results(total):
+    return {"total": total, "count": 1, "total_formatted": f"{total // 60}:{total % 60:02d}"}
+
+
+def test_pages_newest_first(memory_history):
+    now = time.time()
+    for i in range(25):
+        memory_history.add(results(i), timestamp=now - 25 + i)
+    memory_history.flush()
+    assert memory_history.count() == 25
+    first = memory_history.page(0, 10)
+    assert [entry["results"]["total"] for entry in first] == list(range(24, 14, -1))
+    last = memory_history.page(20, 10)
+    assert [entry["results"]["total"] for entry in last] == [4, 3, 2, 1, 0]
+
+
+def test_pages_by_total(memory_history):
+    for total in (30, 90, 10, 60):
+        memory_history.add(results(total))
+    memory_history.flush()
+    page = memory_history.page(0, 2, order="total")
+    assert [entry["results"]["total"] for entry in page] == [90, 60]
+    page = memory_history.page(0, 2, order="total", descending=False)
+    assert [entry["results"]["total"] for entry in page] == [10, 30]
+
+
+def test_latest_before_it_is_written():
+    store = HistoryStore(persistent=False, flush_seconds=60)
+    store.add(results(45))
+    assert store.latest()["results"]["total"] == 45
+    store.close()
+
+
+def test_retention_on_open(tmp_path):
+    path = tmp_path / "history.sqlite3"
+    store = HistoryStore(path, retention_days=None, max_entries=None, flush_seconds=0.01)
+    now = time.time()
+    store.add(results(1), timestamp=now - 40 * 86400)
+    for i in range(5):
+        store.add(results(10 + i), timestamp=now - i)
+    store.flush()
+    store.close()
+
+    store = HistoryStore(path, retention_days=30, max_entries=3, flush_seconds=0.01)
+    store.flush()
+    # The purge runs on the writer thread before anything else
+    deadline = time.monotonic() + 5
+    while store.count() > 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [entry["results"]["total"] for entry in store.page()] == [10, 11, 12]
+    assert store.counters["purged"] == 3
+    store.close()
@@ -0,0 +1,20 @@
+from app.history_window import HistoryWindow
+from app.stats import empty_stats
+
+
+def test_page_with_failed_capture_opens(qapp, memory_history):
+    memory_history.add({"total": 90, "count": 1, "times": [90.0], "times_formatted": ["1:30"],
+                        "total_formatted": "1:30", "backend": "openai"})
+    # The shape ImageProcessor.extract_and_parse returns on errors
+    memory_history.add({"total": 0, "average": 0, "count": 0, "times": [], "times_formatted": [],
+                        "total_formatted": "0:00", "stats": empty_stats(),
+                        "backend": "openai", "error": "timed out"})
+    # And one from before error results carried total_formatted
+    memory_history.add({"total": 0, "count": 0, "times": [], "error": "boom"})
+
+    window = HistoryWindow(memory_history)
+    assert window.table.rowCount() == 3
+    assert window.table.item(0, 1).text() == "0:00"
+    assert window.table.item(0, 8).text() == "Failed: boom"
+    assert window.table.item(2, 1).text() == "1:30"
+    window.close()
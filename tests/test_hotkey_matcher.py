@@ -0,0 +1,62 @@
+import pytest
+
+from app.hotkey_matcher import ALT, CTRL, SHIFT, HotkeyMatcher, format_hotkey, parse
+
+
+def test_parse_any_order_and_case():
+    assert parse("alt+Shift+t") == (SHIFT | ALT, "T")
+    assert parse("T+CTRL") == (CTRL, "T")
+    assert format_hotkey(*parse("shift+ctrl+f5")) == "CTRL+SHIFT+F5"
+
+
+@pytest.mark.parametrize("hotkey", ["CTRL+ALT", "CTRL+A+B", "CTRL++T", ""])
+def test_parse_rejects(hotkey):
+    with pytest.raises(ValueError):
+        parse(hotkey)
+
+
+def test_press_matches_exact_modifiers():
+    matcher = HotkeyMatcher()
+    matcher.bind("ALT+SHIFT+T", "capture")
+    matcher.bind("CTRL+ALT+H", "history")
+    matcher.press("ALT_L")
+    assert matcher.press("T") is None  # Shift isn't held
+    matcher.release("T")
+    matcher.press("SHIFT_R")
+    assert matcher.press("T") == "capture"
+    matcher.release("T")
+    matcher.press("CTRL")
+    assert matcher.press("T") is None  # Ctrl too many
+
+
+def test_auto_repeat_triggers_once():
+    matcher = HotkeyMatcher()
+    matcher.bind("CTRL+T", "capture")
+    matcher.press("CTRL_L")
+    assert matcher.press("T") == "capture"
+    assert matcher.press("T") is None
+    matcher.release("T")
+    assert matcher.press("T") == "capture"
+
+
+def test_other_side_keeps_modifier_down():
+    matcher = HotkeyMatcher()
+    matcher.bind("CTRL+T", "capture")
+    matcher.press("CTRL_L")
+    matcher.press("CTRL_R")
+    matcher.release("CTRL_L")
+    assert matcher.press("T") == "capture"
+    matcher.release("T")
+    matcher.release("CTRL_R")
+    assert matcher.press("T") is None
+
+
+def test_unbind_and_reset():
+    matcher = HotkeyMatcher()
+    matcher.bind("CTRL+T", "capture")
+    matcher.bind("CTRL+H", "history")
+    matcher.unbind("capture")
+    matcher.press("CTRL")
+    assert matcher.press("T") is None
+    matcher.reset()
+    assert matcher.press("H") is None  # Ctrl forgotten
@@ -0,0 +1,24 @@
+import tracemalloc
+
+from app.instrumentation import Metrics
+
+
+def test_memory_tracing_stops_with_the_last_span():
+    metrics = Metrics(trace_memory=True)
+    assert not tracemalloc.is_tracing()
+    outer = metrics.span("convert")
+    with metrics.span("encode"):
+        bytearray(100_000)
+    assert tracemalloc.is_tracing()
+    outer.end()
+    assert not tracemalloc.is_tracing()
+    assert metrics.summary()["spans"]["encode"]["p50_peak_bytes"] >= 100_000
+
+
+def test_nothing_exported_by_default():
+    metrics = Metrics()
+    assert not metrics.trace_memory
+    assert metrics.export_seconds is None and metrics.prometheus_port is None
+    with metrics.span("parse"):
+        pass
+    assert not tracemalloc.is_tracing()
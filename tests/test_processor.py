@@ -0,0 +1,18 @@
+import pytest
+
+pytest.importorskip("openai")
+
+from app.processor import ImageProcessor  # noqa: E402
+
+
+def processor(**settings):
+    return ImageProcessor({"cache": {"persistent": False}, **settings})
+
+
+def test_cache_scope_follows_backend_settings(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    default = processor().cache_scope()
+    assert processor().cache_scope() == default
+    assert processor(backends={"openai": {"model": "gpt-4o"}}).cache_scope() != default
+    assert processor(backends={"openai": {"preprocess": {"binarize": True}}}).cache_scope() != default
+    assert processor(regions={"enabled": False}).cache_scope() != default
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from app.regions import RegionExtractor, TextRegionDetector
+from synthetic import load_font
+
+# Spellings that used to be cut apart: at the colon, the decimal point or
+# between a value and its unit
+VALUES = ["7:25", "45 min", "7.5 hours", "$ 1,250.00", "12.5%", "1:02:03",
+          "1h 30m", "30 EUR", "2024-03-15"]
+
+
+def render(font_size=12, scale=1, dark=False, columns=2):
+    """Labelled rows of VALUES, with the label and value box of every row"""
+    font = load_font(font_size * scale)
+    row_height = int(font_size * 2.2) * scale
+    rows = -(-len(VALUES) // columns)
+    background, ink = ((32, 32, 32), (230, 230, 230)) if dark else ((255, 255, 255), (20, 20, 20))
+    image = Image.new("RGB", ((260 * columns + 40) * scale, rows * row_height + 60 * scale),
+                      background)
+    draw = ImageDraw.Draw(image)
+    draw.text((20 * scale, 16 * scale), "Task", fill=ink, font=font)
+    rows_drawn = []
+    for i, value in enumerate(VALUES):
+        x = 20 * scale + i // rows * 260 * scale
+        y = 50 * scale + i % rows * row_height
+        draw.line((x, y - 6 * scale, x + 230 * scale, y - 6 * scale), fill=(220, 220, 220))
+        label = f"Task {i + 1}"
+        draw.text((x, y), label, fill=ink, font=font)
+        draw.text((x + 140 * scale, y), value, fill=ink, font=font)
+        rows_drawn.append((value, draw.textbbox((x, y), label, font=font),
+                           draw.textbbox((x + 140 * scale, y), value, font=font)))
+    return np.asarray(image), rows_drawn
+
+
+def containing(boxes, bbox):
+    x0, y0, x1, y1 = bbox
+    return [box for box in boxes
+            if box[0] <= x0 and box[1] <= y0 and x1 <= box[0] + box[2] and y1 <= box[1] + box[3]]
+
+
+@pytest.mark.parametrize("font_size, scale, dark", [
+    (10, 1, False), (12, 1, False), (14, 1, False), (16, 1, False), (12, 2, False), (12, 1, True),
+])
+def test_values_stay_whole(font_size, scale, dark):
+    capture, rows = render(font_size, scale, dark)
+    boxes, _ = TextRegionDetector().detect(capture)
+    for value, _, bbox in rows:
+        assert containing(boxes, bbox), f"{value!r} is split over several regions"
+
+
+@pytest.mark.parametrize("columns", [1, 2, 3])
+def test_mosaic_keeps_labels_on_the_line_of_their_value(columns):
+    capture, rows = render(columns=columns)
+    boxes, _ = TextRegionDetector().detect(capture)
+    placements, (width, height) = RegionExtractor.layout(boxes, 4)
+    shelf = dict(zip(boxes, (y for _, y in placements)))
+    for value, label_bbox, value_bbox in rows:
+        (label_box,), (value_box,) = containing(boxes, label_bbox), containing(boxes, value_bbox)
+        assert shelf[label_box] == shelf[value_box], value
+
+    mosaic = RegionExtractor.mosaic(capture, boxes, 4)
+    assert mosaic.shape == (height, width, 3)
+    assert mosaic.size < capture.size
@@ -0,0 +1,149 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.backends import ExtractionResult
+from app.history_window import HistoryWindow
+from app.router import BackendRouter, Tier
+
+IMAGE = np.zeros((10, 20, 3), np.uint8)
+
+
+class FakeBackend:
+    """Answers text with confidence, or raises error, after waiting for release"""
+
+    def __init__(self, text="", confidence=None, error=None, hang=False):
+        self.text = text
+        self.confidence = confidence
+        self.error = error
+        self.release = threading.Event()
+        if not hang:
+            self.release.set()
+        self.calls = 0
+
+    def extract(self, image, progress=None, device_pixel_ratio=1.0, on_text=None):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        if on_text:
+            on_text(self.text)
+        return ExtractionResult(self.text, self.confidence)
+
+
+def router(*tiers, **options):
+    return BackendRouter([Tier(f"tier{i}", backend, **limits)
+                          for i, (backend, limits) in enumerate(tiers)], **options)
+
+
+def outcomes(result):
+    return [(a["backend"], a["outcome"]) for a in result.route["attempts"]]
+
+
+def test_first_confident_answer_wins():
+    second = FakeBackend("2:00")
+    result = router((FakeBackend("1:00", 0.9), {"min_confidence": 0.8}), (second, {})).extract(IMAGE)
+    assert result.text == "1:00"
+    assert result.route["backend"] == "tier0"
+    assert second.calls == 0
+
+
+def test_escalates_on_low_confidence():
+    result = router((FakeBackend("1:00", 0.3), {"min_confidence": 0.8}),
+                    (FakeBackend("2:00", 0.95), {})).extract(IMAGE)
+    assert result.text == "2:00"
+    assert outcomes(result) == [("tier0", "low confidence"), ("tier1", "ok")]
+    assert result.route["attempts"][0]["confidence"] == 0.3
+
+
+def test_escalates_on_timeout():
+    slow = FakeBackend("1:00", hang=True)
+    result = router((slow, {"timeout": 0.05}), (FakeBackend("2:00"), {})).extract(IMAGE)
+    slow.release.set()
+    assert result.text == "2:00"
+    assert outcomes(result) == [("tier0", "timeout"), ("tier1", "ok")]
+
+
+def test_escalates_on_error():
+    result = router((FakeBackend(error=RuntimeError("down")), {}),
+                    (FakeBackend("2:00"), {})).extract(IMAGE)
+    assert result.text == "2:00"
+    assert outcomes(result) == [("tier0", "error"), ("tier1", "ok")]
+
+
+def test_error_on_the_last_tier_is_raised():
+    with pytest.raises(RuntimeError):
+        router((FakeBackend(error=RuntimeError("down")), {})).extract(IMAGE)
+
+
+def test_cancellation_is_not_a_tier_failure():
+    class Cancelled(Exception):
+        pass
+
+    second = FakeBackend("2:00")
+    with pytest.raises(Cancelled):
+        router((FakeBackend(error=Cancelled()), {}), (second, {}),
+               reraise=(Cancelled,)).extract(IMAGE)
+    assert second.calls == 0
+
+
+def test_last_tier_answer_is_kept_even_with_low_confidence():
+    streamed = []
+    result = router((FakeBackend("1:00", 0.3), {"min_confidence": 0.8}),
+                    (FakeBackend("2:00", 0.4), {"min_confidence": 0.8})
+                    ).extract(IMAGE, on_text=streamed.append)
+    assert result.text == "2:00"
+    assert outcomes(result)[-1] == ("tier1", "low confidence")
+    assert streamed == ["2:00"]  # Only the last resort streams
+
+
+def test_earlier_answer_kept_when_last_tier_times_out():
+    slow = FakeBackend("2:00", hang=True)
+    result = router((FakeBackend("1:00", 0.3), {"min_confidence": 0.8}),
+                    (slow, {"timeout": 0.05})).extract(IMAGE)
+    slow.release.set()
+    assert result.text == "1:00"
+    assert result.route["backend"] == "tier0"
+
+
+def test_too_large_capture_skips_tier():
+    small = FakeBackend("1:00")
+    result = router((small, {"max_pixels": 100}), (FakeBackend("2:00"), {})).extract(IMAGE)
+    assert small.calls == 0
+    assert outcomes(result) == [("tier0", "skipped (too large)"), ("tier1", "ok")]
+
+
+def test_failing_tier_is_skipped_then_probed():
+    failing = FakeBackend(error=RuntimeError("down"))
+    routed = router((failing, {}), (FakeBackend("2:00"), {}), min_samples=3, probe_every=5)
+    for _ in range(3):
+        routed.extract(IMAGE)
+    assert failing.calls == 3
+
+    results = [routed.extract(IMAGE) for _ in range(5)]
+    # Skipped four times, then tried again to see if it recovered
+    assert failing.calls == 4
+    assert [outcomes(r)[0][1] for r in results] == ["skipped (failing)"] * 4 + ["error"]
+
+
+def test_slow_tier_is_skipped():
+    slow = FakeBackend("1:00")
+    routed = router((slow, {}), (FakeBackend("2:00"), {}), latency_target=0.5, min_samples=2)
+    for _ in range(2):
+        slow.extract(IMAGE)
+        routed.tiers[0].stats.record("ok", 2.0)
+    calls = slow.calls
+    result = routed.extract(IMAGE)
+    assert slow.calls == calls
+    assert outcomes(result)[0] == ("tier0", "skipped (slow)")
+
+
+def test_route_shown_in_history(qapp):
+    result = router((FakeBackend("1:00", 0.3), {"min_confidence": 0.8}),
+                    (FakeBackend("2:00", 0.9), {})).extract(IMAGE)
+    item = HistoryWindow.route_item({"backend": result.route["backend"], "route": result.route})
+    assert item.text() == "tier0 → tier1"
+    tooltip = item.toolTip().splitlines()
+    assert tooltip[0].startswith("tier0: low confidence, confidence 0.30, ")
+    assert tooltip[1].startswith("tier1: ok, confidence 0.90, ")
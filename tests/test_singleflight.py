@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+class Cancelled(Exception):
+    pass
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def work():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return {"total": 90}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("k", work)))
+    leader.start()
+    started.wait()
+    results.append(flights.do("k", work))
+    leader.join()
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True]
+    assert all(result == {"total": 90} for result, _ in results)
+
+
+def test_cancelled_leader_hands_off_to_a_waiter():
+    flights = SingleFlight(retry_on=Cancelled)
+    started = threading.Event()
+    cancel = threading.Event()
+
+    def cancelled_work():
+        started.set()
+        cancel.wait()
+        raise Cancelled()
+
+    errors = []
+
+    def lead():
+        try:
+            flights.do("k", cancelled_work)
+        except Cancelled as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    started.wait()
+    threading.Timer(0.1, cancel.set).start()
+    # The waiter isn't cancelled with the leader, it runs the call itself
+    result, shared = flights.do("k", lambda: "mine")
+    leader.join()
+    assert (result, shared) == ("mine", False)
+    assert len(errors) == 1
+
+
+def test_waiter_stops_waiting_when_cancelled():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait()
+        return 1
+
+    leader = threading.Thread(target=flights.do, args=("k", slow))
+    leader.start()
+    started.wait()
+    with pytest.raises(Cancelled):
+        flights.do("k", slow, is_cancelled=lambda: True, cancelled=Cancelled)
+    release.set()
+    leader.join()
@@ -0,0 +1,28 @@
+from collections import Counter
+
+import pytest
+
+from app.tiling import TiledExtractor
+from app.tokenizer import durations_by_line, scan
+from synthetic import render_grid
+from tiling_check import LayoutBackend
+
+
+def parse(text):
+    return scan(text).duration_text
+
+
+@pytest.mark.parametrize("dense", [False, True])
+@pytest.mark.parametrize("parse_lines", [None, durations_by_line])
+def test_no_value_lost_or_counted_twice(dense, parse_lines):
+    capture, boxes = render_grid(900, 500, dense=dense, seed=3)
+    tiler = TiledExtractor(LayoutBackend(capture, boxes, 0), parse, max_tile_width=240,
+                           max_tile_height=120, overlap=48, max_workers=4,
+                           parse_lines=parse_lines)
+    tiles, seams = tiler.plan(tiler.ink_mask(capture))
+    assert len(tiles) > 4
+    if dense:
+        assert seams  # Nowhere to cut but through text
+
+    result = tiler.extract(capture)
+    assert Counter(parse(result.text)) == Counter(value for _, value in boxes)
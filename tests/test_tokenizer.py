@@ -0,0 +1,54 @@
+from app.tokenizer import durations_by_line, scan
+
+
+def test_decimal_comma_hours():
+    assert scan("1,5 h").duration_text == ["1:30"]
+    assert scan("worked 1,5 hours").duration_text == ["1:30"]
+    # Not a decimal: neither 1.25 hours nor 250 hours
+    assert scan("1,250 h").duration_text == []
+
+
+def test_clock_durations():
+    tokens = scan("Task 2:15\nTask 25:30\nTotal 1:02:03")
+    assert tokens.duration_text == ["2:15", "25:30", "1:02:03"]
+    assert tokens.durations.tolist() == [8100, 91800, 3723]
+
+
+def test_spelled_out_durations():
+    assert scan("1h 30m, 45 min, 7.5 hours").duration_text == ["1:30", "0:45", "7:30"]
+
+
+def test_not_durations():
+    assert scan("").duration_text == []
+    assert scan("no numbers here").duration_text == []
+    assert scan("12:60").duration_text == []
+    # Part of a version, a URL or a list without spaces
+    assert scan("v1.2:30").duration_text == []
+    assert scan("http://x/1:30").duration_text == []
+    assert scan("2:15,3:30").duration_text == []
+
+
+def test_amounts_and_percentages():
+    tokens = scan("$1,250.00 and 30 EUR and 12.5% and -3,5 %")
+    assert tokens.amounts.tolist() == [1250.0, 30.0]
+    assert tokens.currencies.tolist() == ["USD", "EUR"]
+    assert tokens.percentages.tolist() == [12.5, -3.5]
+
+
+def test_invalid_dates_are_dropped():
+    tokens = scan("2024-02-30 and 2024-02-29 and 15.03.2024 and 03/15/24")
+    assert tokens.dates.astype(str).tolist() == ["2024-02-29", "2024-03-15", "2024-03-15"]
+
+
+def test_line_by_line_matches_all_at_once():
+    text = "Task 1 1h 30m\nTask 2 2:15 (12.5%)\nTask 3 $40 on 2024-03-15\n"
+    lines = [scan(line) for line in text.splitlines()]
+    tokens = scan(text)
+    assert sum((t.duration_text for t in lines), []) == tokens.duration_text
+    assert sum(t.amounts.size for t in lines) == tokens.amounts.size
+
+
+def test_durations_by_line_matches_scan_of_each_line():
+    text = "a 2:15\n\nb 1h 30m 3:00\r\nno values\n5 min 2024-03-15\n1:02:03"
+    assert durations_by_line(text) == [scan(line).duration_text for line in text.splitlines()]
+    assert durations_by_line("") == []
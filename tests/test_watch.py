@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from PyQt6.QtCore import QRect
+
+from app import watch
+from app.watch import RegionWatcher
+
+
+def screen(caret=False, value=False):
+    image = np.full((360, 300, 3), 255, np.uint8)
+    image[50:64, 20:60] = 20  # A label
+    if value:
+        image[50:64, 180:190] = 20
+    if caret:
+        image[50:64, 100] = 0
+    return image
+
+
+@pytest.fixture
+def watcher(qapp, monkeypatch):
+    frames = []
+    monkeypatch.setattr(watch, "grab_rect", lambda rect: (frames.pop(0), 1.0))
+    watcher = RegionWatcher(interval_seconds=3600)
+    watcher.frames = frames
+    watcher.emitted = []
+    watcher.changed.connect(lambda image, ratio: watcher.emitted.append(image))
+    watcher.pin(QRect(0, 0, 300, 360), screen())
+    watcher.done()
+    yield watcher
+    watcher.stop()
+
+
+def tick(watcher, image):
+    watcher.frames.append(image)
+    watcher.check()
+    if watcher.busy:
+        watcher.done()
+
+
+def test_caret_is_ignored(watcher):
+    for caret in (True, False, True, True):
+        tick(watcher, screen(caret=caret))
+    assert len(watcher.emitted) == 1
+
+
+def test_change_waits_until_it_holds_still(watcher):
+    tick(watcher, screen(value=True))
+    assert len(watcher.emitted) == 1
+    tick(watcher, screen(value=True))
+    assert len(watcher.emitted) == 2
+    assert watcher.counters["unsettled"] == 1
+
+
+def test_passing_change_is_not_extracted(watcher):
+    tick(watcher, screen(value=True))
+    tick(watcher, screen())
+    tick(watcher, screen())
+    assert len(watcher.emitted) == 1